@@ -0,0 +1,45 @@
+"""Add conversations and chatbot history index
+
+Revision ID: 3f6a9c1d5e27
+Revises: 8d1e4b7a2c90
+Create Date: 2026-10-18 14:03:52.118406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f6a9c1d5e27'
+down_revision: Union[str, None] = '8d1e4b7a2c90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('conversations',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('summary', sa.String(), nullable=False, server_default=''),
+    sa.Column('summarized_until_id', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_conversations_id'), 'conversations', ['id'], unique=False)
+    op.add_column('chatbot_responses', sa.Column('conversation_id', sa.Integer(), nullable=True))
+    op.create_index(op.f('ix_chatbot_responses_conversation_id'), 'chatbot_responses', ['conversation_id'], unique=False)
+    op.create_foreign_key('fk_chatbot_responses_conversation_id', 'chatbot_responses', 'conversations', ['conversation_id'], ['id'])
+    op.create_index('ix_chatbot_responses_user_id_created_at', 'chatbot_responses', ['user_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_chatbot_responses_user_id_created_at', table_name='chatbot_responses')
+    op.drop_constraint('fk_chatbot_responses_conversation_id', 'chatbot_responses', type_='foreignkey')
+    op.drop_index(op.f('ix_chatbot_responses_conversation_id'), table_name='chatbot_responses')
+    op.drop_column('chatbot_responses', 'conversation_id')
+    op.drop_index(op.f('ix_conversations_id'), table_name='conversations')
+    op.drop_table('conversations')
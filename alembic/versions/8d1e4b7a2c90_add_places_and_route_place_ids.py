@@ -0,0 +1,72 @@
+"""Add places table and canonical place ids to route_emissions
+
+Revision ID: 8d1e4b7a2c90
+Revises: 5adf7ad3c42a
+Create Date: 2026-10-18 10:12:31.402117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from backend.address import canonicalize_address
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d1e4b7a2c90'
+down_revision: Union[str, None] = '5adf7ad3c42a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('places',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('canonical_address', sa.String(), nullable=False),
+    sa.Column('lat', sa.Float(), nullable=True),
+    sa.Column('lng', sa.Float(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_places_id'), 'places', ['id'], unique=False)
+    op.create_index(op.f('ix_places_canonical_address'), 'places', ['canonical_address'], unique=True)
+    op.add_column('route_emissions', sa.Column('origin_place_id', sa.Integer(), nullable=True))
+    op.add_column('route_emissions', sa.Column('destination_place_id', sa.Integer(), nullable=True))
+    op.create_index(op.f('ix_route_emissions_origin_place_id'), 'route_emissions', ['origin_place_id'], unique=False)
+    op.create_index(op.f('ix_route_emissions_destination_place_id'), 'route_emissions', ['destination_place_id'], unique=False)
+    op.create_foreign_key('fk_route_emissions_origin_place_id', 'route_emissions', 'places', ['origin_place_id'], ['id'])
+    op.create_foreign_key('fk_route_emissions_destination_place_id', 'route_emissions', 'places', ['destination_place_id'], ['id'])
+
+    #  Backfill: one place per canonical address already used in route_emissions
+    conn = op.get_bind()
+    addresses = conn.execute(sa.text(
+        "SELECT origin FROM route_emissions UNION SELECT destination FROM route_emissions"
+    )).scalars().all()
+
+    place_ids = {}
+    for address in addresses:
+        canonical = canonicalize_address(address)
+        if canonical not in place_ids:
+            place_ids[canonical] = conn.execute(
+                sa.text("INSERT INTO places (canonical_address) VALUES (:canonical) RETURNING id"),
+                {"canonical": canonical}
+            ).scalar_one()
+
+        for column in ('origin', 'destination'):
+            conn.execute(
+                sa.text(f"UPDATE route_emissions SET {column}_place_id = :place_id WHERE {column} = :address"),
+                {"place_id": place_ids[canonical], "address": address}
+            )
+
+
+def downgrade() -> None:
+    op.drop_constraint('fk_route_emissions_destination_place_id', 'route_emissions', type_='foreignkey')
+    op.drop_constraint('fk_route_emissions_origin_place_id', 'route_emissions', type_='foreignkey')
+    op.drop_index(op.f('ix_route_emissions_destination_place_id'), table_name='route_emissions')
+    op.drop_index(op.f('ix_route_emissions_origin_place_id'), table_name='route_emissions')
+    op.drop_column('route_emissions', 'destination_place_id')
+    op.drop_column('route_emissions', 'origin_place_id')
+    op.drop_index(op.f('ix_places_canonical_address'), table_name='places')
+    op.drop_index(op.f('ix_places_id'), table_name='places')
+    op.drop_table('places')
@@ -0,0 +1,59 @@
+"""Add user_features
+
+Revision ID: b7c2e9f4a1d3
+Revises: 3f6a9c1d5e27
+Create Date: 2026-10-18 16:21:07.530912
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from backend.user_features import MODE_GROUPS, MODE_GROUP_COLUMNS
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7c2e9f4a1d3'
+down_revision: Union[str, None] = '3f6a9c1d5e27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('user_features',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('trip_count', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('total_emissions', sa.Float(), nullable=False, server_default='0'),
+    sa.Column('total_miles', sa.Float(), nullable=False, server_default='0'),
+    sa.Column('car_trips', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('transit_trips', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('active_trips', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('air_trips', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('other_trips', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+    #  Backfill from existing trips in one GROUP BY pass
+    group_counts = []
+    for group, column in MODE_GROUP_COLUMNS.items():
+        if group == "other":
+            known = ", ".join(f"'{mode}'" for modes in MODE_GROUPS.values() for mode in modes)
+            condition = f"LOWER(transport_mode) NOT IN ({known})"
+        else:
+            condition = "LOWER(transport_mode) IN ({})".format(", ".join(f"'{mode}'" for mode in MODE_GROUPS[group]))
+        group_counts.append(f"SUM(CASE WHEN {condition} THEN 1 ELSE 0 END)")
+
+    columns = ", ".join(MODE_GROUP_COLUMNS.values())
+    op.execute(
+        f"INSERT INTO user_features (user_id, trip_count, total_emissions, total_miles, {columns}, updated_at) "
+        f"SELECT user_id, COUNT(id), COALESCE(SUM(emission_value), 0), COALESCE(SUM(miles), 0), "
+        f"{', '.join(group_counts)}, CURRENT_TIMESTAMP "
+        f"FROM emission_history GROUP BY user_id"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('user_features')
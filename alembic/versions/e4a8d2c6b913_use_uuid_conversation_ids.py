@@ -0,0 +1,42 @@
+"""Use generated string ids for conversations
+
+Revision ID: e4a8d2c6b913
+Revises: b7c2e9f4a1d3
+Create Date: 2026-10-18 17:42:19.604228
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a8d2c6b913'
+down_revision: Union[str, None] = 'b7c2e9f4a1d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    #  Existing integer ids are kept as their decimal strings
+    op.drop_constraint('fk_chatbot_responses_conversation_id', 'chatbot_responses', type_='foreignkey')
+    op.alter_column('conversations', 'id', existing_type=sa.Integer(), type_=sa.String(length=32),
+                    server_default=None, existing_nullable=False, postgresql_using='id::text')
+    op.execute('DROP SEQUENCE IF EXISTS conversations_id_seq')
+    op.alter_column('chatbot_responses', 'conversation_id', existing_type=sa.Integer(), type_=sa.String(length=32),
+                    existing_nullable=True, postgresql_using='conversation_id::text')
+    op.create_foreign_key('fk_chatbot_responses_conversation_id', 'chatbot_responses', 'conversations', ['conversation_id'], ['id'])
+
+
+def downgrade() -> None:
+    #  Only possible while every conversation id is still numeric
+    op.drop_constraint('fk_chatbot_responses_conversation_id', 'chatbot_responses', type_='foreignkey')
+    op.alter_column('chatbot_responses', 'conversation_id', existing_type=sa.String(length=32), type_=sa.Integer(),
+                    existing_nullable=True, postgresql_using='conversation_id::integer')
+    op.execute('CREATE SEQUENCE IF NOT EXISTS conversations_id_seq OWNED BY conversations.id')
+    op.alter_column('conversations', 'id', existing_type=sa.String(length=32), type_=sa.Integer(),
+                    existing_nullable=False, postgresql_using='id::integer')
+    op.execute("SELECT setval('conversations_id_seq', COALESCE((SELECT MAX(id) FROM conversations), 0) + 1, false)")
+    op.alter_column('conversations', 'id', server_default=sa.text("nextval('conversations_id_seq')"))
+    op.create_foreign_key('fk_chatbot_responses_conversation_id', 'chatbot_responses', 'conversations', ['conversation_id'], ['id'])
@@ -0,0 +1,90 @@
+import re
+
+#  Street-type abbreviations, expanded when they end the street part of a segment ("123 Main St")
+STREET_SUFFIXES = {
+    "st": "street",
+    "str": "street",
+    "ave": "avenue",
+    "av": "avenue",
+    "rd": "road",
+    "blvd": "boulevard",
+    "dr": "drive",
+    "ln": "lane",
+    "ct": "court",
+    "pl": "place",
+    "sq": "square",
+    "ter": "terrace",
+    "cir": "circle",
+    "hwy": "highway",
+    "pkwy": "parkway",
+    "fwy": "freeway",
+    "expy": "expressway",
+    "trl": "trail",
+    "aly": "alley",
+}
+
+#  Abbreviations expanded wherever they appear in a segment
+WORD_ABBREVIATIONS = {
+    "mt": "mount",
+    "ft": "fort",
+    "apt": "apartment",
+    "ste": "suite",
+    "fl": "floor",
+    "bldg": "building",
+    "univ": "university",
+    "intl": "international",
+}
+
+#  Single-letter and compound compass directions ("N Main St", "123 Broadway NW")
+DIRECTIONS = {
+    "n": "north",
+    "s": "south",
+    "e": "east",
+    "w": "west",
+    "ne": "northeast",
+    "nw": "northwest",
+    "se": "southeast",
+    "sw": "southwest",
+}
+
+#  Tokens that may follow the street name within a segment ("Main St Apt 4", "Main St #4")
+UNIT_DESIGNATORS = {"apt", "apartment", "ste", "suite", "fl", "floor", "unit", "bldg", "building"}
+
+_PUNCTUATION = re.compile(r"[^\w\s,]")
+_NUMBER_SIGN = re.compile(r"#\s*(?=\w)")
+
+
+def _canonicalize_segment(segment: str) -> str:
+    tokens = segment.split()
+    if not tokens:
+        return ""
+
+    canonical = []
+    for i, token in enumerate(tokens):
+        ends_street = i == len(tokens) - 1 or tokens[i + 1] in UNIT_DESIGNATORS
+        if token in WORD_ABBREVIATIONS:
+            token = WORD_ABBREVIATIONS[token]
+        elif token == "st" and i == 0 and len(tokens) > 1:
+            token = "saint"  #  "St Louis", "St. Paul"
+        elif ends_street and i > 0 and token in STREET_SUFFIXES:
+            token = STREET_SUFFIXES[token]
+        elif token in DIRECTIONS and len(tokens) > 1:
+            token = DIRECTIONS[token]
+        canonical.append(token)
+
+    return " ".join(canonical)
+
+
+def canonicalize_address(address: str) -> str:
+    """
+    Canonical form of a free-text address, so variants of the same address share one key:
+    case, whitespace and punctuation (including commas) are normalized and common
+    abbreviations are expanded. Commas are only used to find where street names end.
+
+    "123 N. Main St., Springfield" and "123  North Main Street, SPRINGFIELD" both become
+    "123 north main street springfield".
+    """
+    address = _NUMBER_SIGN.sub("suite ", address.lower())
+    address = _PUNCTUATION.sub(" ", address.replace("'", ""))
+    segments = (_canonicalize_segment(segment) for segment in address.split(","))
+    return " ".join(segment for segment in segments if segment)
@@ -1,20 +1,33 @@
-from fastapi import FastAPI, Depends, Query, HTTPException
+from fastapi import FastAPI, Depends, Query, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from models.emission_calculator import CarbonCalculator
 from models.recommendation_model import RecommendationModel
 from .dependencies import get_db # Importing the dependency for database handling
+from backend.dependencies import SessionLocal, WRITE_BEHIND_MAX_SIZE, WRITE_BEHIND_BATCH_SIZE, WRITE_BEHIND_FLUSH_INTERVAL, WRITE_BEHIND_ENQUEUE_TIMEOUT
+from backend.dependencies import ROUTE_LATENCY_BUDGET, CHAT_LATENCY_BUDGET, GEOCODE_CACHE_MEMORY_SIZE
+from backend.deadline import Deadline
 from backend.schemas import FuelVehicleRequest, FuelVehicleResponse, ElectricVehicleRequest, ElectricVehicleResponse, PublicTransportRequest, PublicTransportResponse
 from sqlalchemy.sql import func 
-from backend.models import EmissionHistory, User, Recommendation, RecommendationFeedback, EcoFriendlyRoute, RouteEmissions, PredictedEmissions, ChatbotResponse, Progress
-import datetime, traceback, json
+from backend.models import EmissionHistory, User, Recommendation, RecommendationFeedback, EcoFriendlyRoute, RouteEmissions, PredictedEmissions, Progress
+import datetime, traceback, json, codecs
 from datetime import datetime, timezone, timedelta
 from backend.ai_manager import AIManager
-from backend.maps_api import MapsAPI
-from backend.llm_integration import chat_with_ai
+from backend.maps_api import MapsAPI, AsyncMapsAPI
+from backend.offline_maps import OfflineMapsAPI
+from backend.places import PlaceIndex
+from backend.chat_memory import new_conversation_id, get_conversation, load_context, queue_turn
+from backend.write_behind import WriteBehindQueue
+from backend.user_features import apply_deltas, add_trip, empty_delta
+from backend.http_client import http_metrics
+from backend.llm_integration import chat_with_ai, stream_chat_with_ai, invalidate_user_emissions, groq_flights, first_token_latency, emission_summaries, generic_replies, personal_replies, groq_guard
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
 from passlib.context import CryptContext
-from typing import Optional
+from typing import Optional, List
+import numpy as np
 
 
 app = FastAPI()
@@ -30,10 +43,51 @@ app.add_middleware(
 )
 
 maps_api = MapsAPI()
+async_maps_api = AsyncMapsAPI(geocode_cache=maps_api.geocode_cache, route_cache=maps_api.route_cache)
+offline_maps_api = OfflineMapsAPI()
+place_index = PlaceIndex()
+audit_writer = WriteBehindQueue(  #  Batches chatbot/prediction log rows off the request path
+    SessionLocal,
+    max_size=WRITE_BEHIND_MAX_SIZE,
+    batch_size=WRITE_BEHIND_BATCH_SIZE,
+    flush_interval=WRITE_BEHIND_FLUSH_INTERVAL,
+    enqueue_timeout=WRITE_BEHIND_ENQUEUE_TIMEOUT
+)
 calculator = CarbonCalculator()
 reccomendation_model = RecommendationModel()
 ai_manager = AIManager()
 
+MAX_ROUTE_MATRIX_CELLS = 2500  # Upper bound on origins × destinations for /route_emissions/batch
+MAX_BULK_ROW_CHARS = 64 * 1024  # Longest single row accepted by /log_trips/bulk; longer rows are skipped
+
+
+@app.on_event("startup")
+def start_background_training():
+    """
+    Loads (or trains, in the background) the clustering model used by AI recommendations,
+    and seeds the geocode cache with the coordinates of known places.
+    """
+    ai_manager.ai_agent.start_background_training(SessionLocal)
+
+    db = SessionLocal()
+    try:
+        place_index.warm_geocode_cache(db, maps_api.geocode_cache, limit=GEOCODE_CACHE_MEMORY_SIZE)
+    except Exception as e:
+        print(f"[WARNING] Could not seed the geocode cache from places: {e}")
+    finally:
+        db.close()
+
+
+@app.on_event("shutdown")
+async def close_clients():
+    """
+    Closes the async Maps client's connection pool, drains the write-behind queue and
+    stops background model training on shutdown.
+    """
+    await async_maps_api.aclose()
+    await run_in_threadpool(audit_writer.close)
+    ai_manager.ai_agent.stop_background_training()
+
 
 class TripLogRequest(BaseModel):
     user_id: int
@@ -56,42 +110,13 @@ def log_trip(request: TripLogRequest, db: Session = Depends(get_db)):
     if not user:
         raise HTTPException(status_code=400, detail="User does not exist")
 
-    #  Define emission factors
-    emission_factors = {
-        "gasoline_car": 0.89, "diesel_car": 1.02, "hybrid_car": 0.43, "motorcycle": 0.46,
-        "rideshare_solo": 0.89, "rideshare_shared": 0.45,
-        "bus": 6.8, "diesel_bus": 16, "train": 200, "subway": 80, "high_speed_rail": 100,
-        "airplane": 54000, "long_haul_flight": 172000, "ferry": 300,
-        "electric_car": 0.06, "electric_scooter": 0.02, "electric_bike": 0.01,
-        "bike": 0.00, "walking": 0.00
-    }
-    co2_per_kwh = 0.450  # Grid emissions per kWh
-    co2_per_gallon = {"gasoline": 19.6, "diesel": 22.4}  # CO₂ per gallon burned
-
-    #  Ensure transport_mode matches dictionary keys
-    mode_map = {
-        "driving": "gasoline_car",
-        "electric": "electric_car",
-        "public_transport": "bus"
-    }
-    corrected_mode = mode_map.get(request.transport_mode, request.transport_mode)
-    print(f"DEBUG: Corrected mode={corrected_mode}")  #  Print for debugging
-
-    #  Calculate emissions based on mode
-    emissions = 0
-    if corrected_mode in emission_factors:
-        emissions = emission_factors[corrected_mode] * request.distance_miles
-    elif request.transport_mode == "electric":
-        if not request.miles_per_kwh:
-            raise HTTPException(status_code=400, detail="Miles per kWh is required for electric vehicles.")
-        emissions = (request.distance_miles / request.miles_per_kwh) * co2_per_kwh
-    elif request.fuel_type.lower() in co2_per_gallon:
-        mpg = request.miles_per_kwh or 25  # Default MPG if not provided
-        fuel_type = request.fuel_type.lower()
-
-        if mpg > 0:
-            emissions = (co2_per_gallon[fuel_type] / mpg) * request.distance_miles
-            print(f"DEBUG: Fuel-based calculation, emissions={emissions}")
+    #  Resolve factors (and mode aliases) from the shared registry
+    emissions = calculator.estimate_trip_emissions(
+        request.transport_mode,
+        request.distance_miles,
+        fuel_type=request.fuel_type,
+        mpg=request.miles_per_kwh or 25  # Default MPG if not provided
+    )
 
     #  Ensure category is set
     category = "transport"
@@ -111,8 +136,11 @@ def log_trip(request: TripLogRequest, db: Session = Depends(get_db)):
     )
 
     db.add(trip_entry)
+    apply_deltas(db, {request.user_id: add_trip(empty_delta(), trip_entry.transport_mode, trip_entry.miles, trip_entry.emission_value)})
     db.commit()
     db.refresh(trip_entry)
+    invalidate_user_emissions(request.user_id)  #  Chatbot summary is stale now
+    ai_manager.ai_agent.record_new_trips(1, [request.user_id])
 
     return {
         "message": "Trip logged successfully!",
@@ -124,6 +152,251 @@ def log_trip(request: TripLogRequest, db: Session = Depends(get_db)):
     }
 
 
+def _array_element_end(text: str, state=(0, False, False)):
+    """
+    Scans `text` for the `,` or `]` ending the current JSON array element, ignoring
+    delimiters inside strings and nested brackets. `state` is (depth, in_string, escaped)
+    carried over from a previous chunk. Returns (index or None, state at the end of `text`).
+    """
+    depth, in_string, escaped = state
+    for i, ch in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "[{":
+            depth += 1
+        elif ch in "]}":
+            if depth == 0:
+                return i, (0, False, False)
+            depth -= 1
+        elif ch == "," and depth == 0:
+            return i, (0, False, False)
+    return None, (depth, in_string, escaped)
+
+
+async def _iter_trip_rows(request: Request):
+    """
+    Incrementally parses a request body as NDJSON (one object per line) or as a JSON array.
+    Yields (row_index, row_dict, error) tuples; error is set when a row cannot be decoded.
+    A malformed or oversized row is reported and skipped; parsing continues with the next row.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()  # Chunks may split multi-byte characters
+    buffer = ""
+    is_array = None
+    skip_state = None  # Scanner state while skipping the rest of an oversized array element
+    skip_line = False  # Skipping the rest of an oversized NDJSON line
+    row_index = 0
+
+    def array_rows(final: bool):
+        """
+        Decodes as many complete array elements as the buffer holds, as (row, error) pairs.
+        """
+        nonlocal buffer, skip_state
+        while True:
+            if skip_state is not None:
+                end, skip_state = _array_element_end(buffer, skip_state)
+                if end is None:
+                    buffer = ""
+                    return
+                buffer, skip_state = buffer[end:], None
+
+            buffer = buffer.lstrip(" \t\r\n,")
+            if not buffer or buffer.startswith("]"):
+                return
+            try:
+                row, end = decoder.raw_decode(buffer)
+                if final or buffer[end:].strip():  #  A following character shows the element is complete
+                    buffer = buffer[end:]
+                    yield (row, None) if end <= MAX_BULK_ROW_CHARS else (None, f"Row exceeds {MAX_BULK_ROW_CHARS} characters")
+                    continue
+            except ValueError:
+                pass
+
+            end, state = _array_element_end(buffer)
+            if end is not None:
+                buffer = buffer[end:]
+                yield None, "Invalid JSON array element"
+            elif final:
+                buffer = ""
+                yield None, "Invalid JSON array element or unterminated array"
+            elif len(buffer) > MAX_BULK_ROW_CHARS:
+                buffer, skip_state = "", state
+                yield None, f"Row exceeds {MAX_BULK_ROW_CHARS} characters"
+            else:
+                return  # Element is incomplete; wait for more data
+
+    async for chunk in request.stream():
+        buffer += utf8.decode(chunk)
+
+        if is_array is None:
+            stripped = buffer.lstrip()
+            if not stripped:
+                continue
+            is_array = stripped.startswith("[")
+            buffer = stripped[1:] if is_array else stripped
+
+        if is_array:
+            for row, error in array_rows(final=False):
+                yield row_index, row, error
+                row_index += 1
+        else:
+            *lines, buffer = buffer.split("\n")
+            if skip_line and lines:
+                lines, skip_line = lines[1:], False  #  Rest of the oversized line
+            for line in lines:
+                if not line.strip():
+                    continue
+                if len(line) > MAX_BULK_ROW_CHARS:
+                    yield row_index, None, f"Row exceeds {MAX_BULK_ROW_CHARS} characters"
+                else:
+                    try:
+                        yield row_index, json.loads(line), None
+                    except ValueError as e:
+                        yield row_index, None, f"Invalid JSON: {e}"
+                row_index += 1
+            if skip_line:
+                buffer = ""
+            elif len(buffer) > MAX_BULK_ROW_CHARS:
+                buffer, skip_line = "", True
+                yield row_index, None, f"Row exceeds {MAX_BULK_ROW_CHARS} characters"
+                row_index += 1
+
+    #  Whatever is left once the stream ends
+    if is_array:
+        for row, error in array_rows(final=True):
+            yield row_index, row, error
+            row_index += 1
+    elif buffer.strip() and not skip_line:
+        #  Anything still buffered is under MAX_BULK_ROW_CHARS (checked after every chunk)
+        try:
+            yield row_index, json.loads(buffer), None
+        except ValueError as e:
+            yield row_index, None, f"Invalid JSON: {e}"
+
+
+def _insert_trip_chunk(rows: list, known_user_ids: set, db: Session):
+    """
+    Checks users, computes emissions for a chunk of validated trips in one batch,
+    and bulk inserts them with a single commit. Returns a list of per-row errors.
+    """
+    errors = []
+
+    #  One user lookup per chunk instead of one per trip
+    unknown_ids = {trip.user_id for _, trip in rows} - known_user_ids
+    if unknown_ids:
+        found = db.query(User.id).filter(User.id.in_(unknown_ids)).all()
+        known_user_ids.update(user_id for (user_id,) in found)
+
+    valid_rows = []
+    for row_index, trip in rows:
+        if trip.user_id in known_user_ids:
+            valid_rows.append(trip)
+        else:
+            errors.append({"row": row_index, "error": "User does not exist"})
+
+    if not valid_rows:
+        return errors
+
+    emissions = calculator.estimate_emissions_batch(
+        modes=[trip.transport_mode for trip in valid_rows],  # Aliases resolve through the registry
+        miles=[trip.distance_miles for trip in valid_rows],
+        fuel_types=[(trip.fuel_type or "").lower() for trip in valid_rows],
+        mpg=[trip.miles_per_kwh or 25 for trip in valid_rows]  # Default MPG if not provided (as in log_trip)
+    )
+
+    timestamp = datetime.now(timezone.utc)
+    mappings = [
+        {
+            "user_id": trip.user_id,
+            "origin": trip.origin,
+            "destination": trip.destination,
+            "transport_mode": trip.transport_mode,
+            "fuel_type": trip.fuel_type,
+            "miles": trip.distance_miles,
+            "passengers": trip.passengers,
+            "emission_value": round(float(emission), 2),
+            "timestamp": timestamp,
+            "category": "transport"
+        }
+        for trip, emission in zip(valid_rows, emissions)
+    ]
+    db.bulk_insert_mappings(EmissionHistory, mappings)
+
+    #  One user_features update per user in the chunk, committed with the trips
+    deltas = {}
+    for row in mappings:
+        add_trip(deltas.setdefault(row["user_id"], empty_delta()), row["transport_mode"], row["miles"], row["emission_value"])
+    apply_deltas(db, deltas)
+    db.commit()
+    invalidate_user_emissions(*{trip.user_id for trip in valid_rows})
+    ai_manager.ai_agent.record_new_trips(len(valid_rows), {trip.user_id for trip in valid_rows})
+
+    return errors
+
+
+@app.post("/log_trips/bulk")
+async def log_trips_bulk(
+    request: Request,
+    chunk_size: int = Query(500, ge=1, le=10000, description="Rows written per bulk insert"),
+    db: Session = Depends(get_db)
+):
+    """
+    Logs many trips from a streamed NDJSON or JSON-array body.
+    - Rows are validated as they arrive; invalid rows are reported and skipped.
+    - Emissions are computed per chunk in one vectorized pass.
+    - Each chunk is written with a single bulk insert and commit.
+    """
+    errors = []
+    pending = []
+    known_user_ids = set()
+    inserted = 0
+    total_rows = 0
+
+    async def flush():
+        nonlocal inserted
+        try:
+            chunk_errors = await run_in_threadpool(_insert_trip_chunk, pending, known_user_ids, db)
+        except Exception as e:
+            await run_in_threadpool(db.rollback)
+            print(f"[ERROR] Bulk insert failed: {e}")
+            chunk_errors = [{"row": row_index, "error": "Database error occurred"} for row_index, _ in pending]
+        errors.extend(chunk_errors)
+        inserted += len(pending) - len(chunk_errors)
+        pending.clear()
+
+    async for row_index, row, error in _iter_trip_rows(request):
+        total_rows += 1
+        if error:
+            errors.append({"row": row_index, "error": error})
+            continue
+        try:
+            pending.append((row_index, TripLogRequest.model_validate(row)))
+        except ValidationError as e:
+            errors.append({"row": row_index, "error": e.errors(include_url=False)})
+            continue
+
+        if len(pending) >= chunk_size:
+            await flush()
+
+    if pending:
+        await flush()
+
+    return {
+        "message": "Bulk trip import finished.",
+        "total_rows": total_rows,
+        "inserted": inserted,
+        "failed": len(errors),
+        "errors": sorted(errors, key=lambda e: e["row"])
+    }
+
+
 class UserLogin(BaseModel):
     email: str
     password: str
@@ -269,27 +542,78 @@ def track_progress(user_id: int, db: Session = Depends(get_db)):
     }
 
 
+def _sse(event: str, data: dict) -> str:
+    """
+    Formats one server-sent event. Values are encoded like FastAPI's JSON responses
+    (e.g. datetimes as ISO 8601), so the `done` event matches the non-streaming reply.
+    """
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+
+def _stream_chat_events(user_id: int, conversation_id: str, query: str, tokens):
+    """
+    Relays reply fragments as `token` events, then queues the full reply for saving
+    and sends a final `done` event.
+    """
+    fragments = []
+    for token in tokens:
+        fragments.append(token)
+        yield _sse("token", {"token": token})
+
+    ai_response = "".join(fragments)
+    timestamp = queue_turn(audit_writer, conversation_id, user_id, query, ai_response)
+    yield _sse("done", {
+        "user_id": user_id, "conversation_id": conversation_id, "query": query, "response": ai_response, "timestamp": timestamp
+    })
+
+
 @app.post("/chatbot/")
-def chatbot(user_id: int, query: str, db: Session = Depends(get_db)):
+def chatbot(
+    user_id: int,
+    query: str,
+    conversation_id: Optional[str] = Query(None, description="Continue this conversation; omit to start a new one"),
+    stream: bool = Query(False, description="Stream the reply as server-sent events"),
+    db: Session = Depends(get_db)
+):
     """
     AI-powered chatbot for real-time sustainability advice.
     - Accepts user queries and generates AI responses.
     - Uses user emissions data for personalized recommendations.
+    - Remembers the conversation: recent turns are sent verbatim, older ones as a rolling summary.
+      Pass the returned conversation_id to continue it.
     - Saves responses to the database.
+    - stream=true: returns text/event-stream with a `token` event per reply fragment
+      and a final `done` event (same fields as the JSON response) once the reply is complete.
     """
-    ai_response = chat_with_ai(user_id, query, db)  #  Pass DB to fetch emissions
+    if conversation_id is None:
+        conversation_id = new_conversation_id()  #  Created with its first turn, off the request path
+        history = None
+    else:
+        conversation = get_conversation(db, conversation_id, user_id)
+        if not conversation:
+            raise HTTPException(status_code=404, detail="Conversation not found")
+        history = load_context(db, conversation, user_id)
+
+    deadline = Deadline(CHAT_LATENCY_BUDGET)  #  Bounds the Groq call
+    if stream:
+        tokens = stream_chat_with_ai(user_id, query, db, deadline=deadline, history=history)
+        return StreamingResponse(
+            _stream_chat_events(user_id, conversation_id, query, tokens),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
 
-    #  Save chatbot interaction in the database
-    chat_entry = ChatbotResponse(user_id=user_id, user_query=query, bot_response=ai_response)
-    db.add(chat_entry)
-    db.commit()
-    db.refresh(chat_entry)
+    ai_response = chat_with_ai(user_id, query, db, deadline=deadline, history=history)  #  Pass DB to fetch emissions
+
+    #  Save chatbot interaction (and update the conversation summary) off the request path
+    timestamp = queue_turn(audit_writer, conversation_id, user_id, query, ai_response)
 
     return {
         "user_id": user_id,
+        "conversation_id": conversation_id,
         "query": query,
         "response": ai_response,
-        "timestamp": chat_entry.created_at
+        "timestamp": timestamp
     }
 
 import logging
@@ -324,14 +648,11 @@ def predict_carbon_footprint(user_id: int, db: Session = Depends(get_db)):
     predicted_footprint = float(predicted_footprint)  # Convert np.float64 → Python float
     logging.info(f" Prediction for user_id {user_id}: {predicted_footprint} lbs CO₂")
 
-    #  Save only valid predictions
-    prediction_entry = PredictedEmissions(
+    #  Save only valid predictions (written behind; the client does not wait for it)
+    audit_writer.submit(lambda write_db: write_db.add(PredictedEmissions(
         user_id=user_id,
         predicted_co2=predicted_footprint
-    )
-    db.add(prediction_entry)
-    db.commit()
-    db.refresh(prediction_entry)
+    )))
 
     return {
         "user_id": user_id,
@@ -340,8 +661,33 @@ def predict_carbon_footprint(user_id: int, db: Session = Depends(get_db)):
     }
 
 
+def _save_route_emission(user_id: int, origin: str, destination: str, mode: str, fuel_type: str, distance_miles: float, emissions: float, db: Session):
+    """
+    Logs a calculated route emission for a user (runs in the threadpool).
+    """
+    user = db.query(User).filter(User.id == user_id).first()
+    if not user:
+        raise HTTPException(status_code=400, detail="User does not exist")
+
+    #  Coordinates are already in the geocode cache if Google was used for this route
+    emission_entry = RouteEmissions(
+        user_id=user_id,
+        origin=origin,
+        destination=destination,
+        transport_mode=mode,
+        fuel_type=fuel_type,
+        distance_miles=distance_miles,
+        co2_emissions=emissions,
+        origin_place_id=place_index.resolve(db, origin, maps_api.geocode_cache.get(origin)),
+        destination_place_id=place_index.resolve(db, destination, maps_api.geocode_cache.get(destination))
+    )
+    db.add(emission_entry)
+    db.commit()
+    db.refresh(emission_entry)
+
+
 @app.get("/route_emissions/")
-def calculate_route_emissions(
+async def calculate_route_emissions(
     origin: str,
     destination: str,
     mode: str = "driving",
@@ -349,12 +695,27 @@ def calculate_route_emissions(
     passengers: int = 1,
     miles_per_kwh: float = None,
     user_id: int = None,
+    exact: bool = Query(True, description="Use Google routing; false uses the offline estimate first"),
     db: Session = Depends(get_db)
 ):
     """
     Calculates CO₂ emissions for a route and logs it in the database.
+    Geocoding and routing run on the async Maps client; database work runs in the threadpool.
+    - exact=false: use the offline haversine estimate, falling back to Google for unknown places.
+    - If Google cannot return a route, the offline estimate is used when available.
     """
-    distance_miles, duration_minutes = maps_api.get_route_details(origin, destination, mode)
+    deadline = Deadline(ROUTE_LATENCY_BUDGET)  #  Bounds all upstream calls for this request
+    source = "offline"
+    distance_miles, duration_minutes = offline_maps_api.get_route_details(origin, destination, mode) if not exact else (None, None)
+
+    if distance_miles is None:
+        source = "google"
+        distance_miles, duration_minutes = await async_maps_api.get_route_details(origin, destination, mode, deadline=deadline)
+
+    if distance_miles is None and exact:
+        source = "offline"
+        distance_miles, duration_minutes = offline_maps_api.get_route_details(origin, destination, mode)
+
     if distance_miles is None:
         return {"error": "Could not retrieve route details."}
 
@@ -374,22 +735,9 @@ def calculate_route_emissions(
 
     # Log emissions data if user_id is provided
     if user_id:
-        user = db.query(User).filter(User.id == user_id).first()
-        if not user:
-            raise HTTPException(status_code=400, detail="User does not exist")
-
-        emission_entry = RouteEmissions(
-            user_id=user_id,
-            origin=origin,
-            destination=destination,
-            transport_mode=mode,
-            fuel_type=fuel_type,
-            distance_miles=distance_miles,
-            co2_emissions=emissions
+        await run_in_threadpool(
+            _save_route_emission, user_id, origin, destination, mode, fuel_type, distance_miles, emissions, db
         )
-        db.add(emission_entry)
-        db.commit()
-        db.refresh(emission_entry)
     
     return {
         "origin": origin,
@@ -397,52 +745,162 @@ def calculate_route_emissions(
         "mode": mode,
         "distance_miles": round(distance_miles, 2),
         "duration_minutes": round(duration_minutes, 2),
-        "estimated_emissions_lbs": round(emissions, 2)
+        "estimated_emissions_lbs": round(emissions, 2),
+        "distance_source": source
     }
 
 
+#  Travel modes compared by /compare_modes/ (FastAPI name, Google travel mode)
+COMPARED_MODES = (("driving", "DRIVE"), ("transit", "TRANSIT"), ("bicycling", "BICYCLE"), ("walking", "WALK"))
 
-@app.get("/eco_friendly_routes/")
-def get_eco_routes(
-    user_id: int,
-    origin: str = Query(..., description="Starting location"),
-    destination: str = Query(..., description="Destination"),
-    mode: str = Query("DRIVE", description="Mode of transport (DRIVE, WALK, BICYCLE, TRANSIT)"),
-    db: Session = Depends(get_db)
+
+@app.get("/compare_modes/")
+async def compare_transport_modes(
+    origin: str,
+    destination: str,
+    fuel_type: str = Query("gasoline_car", description="Vehicle or fuel used for the driving option"),
+    transit_type: str = Query("bus", description="Public transport type used for the transit option"),
+    passengers: int = 1
 ):
     """
-    Fetches eco-friendly route alternatives from Google Maps API, selects the optimal route,
-    calculates CO₂ savings using actual emissions from route_emissions, and saves them.
+    Compares driving, transit, cycling and walking for one trip side by side.
+    The addresses are geocoded once and the four route lookups run concurrently.
     """
-    eco_routes = maps_api.get_eco_friendly_routes(origin, destination)
-    print("Eco Routes Response:", eco_routes)
+    deadline = Deadline(ROUTE_LATENCY_BUDGET)
+    routes = await async_maps_api.get_routes_for_modes(
+        origin, destination, [google_mode for _, google_mode in COMPARED_MODES], deadline=deadline
+    )
+
+    distances = [routes[google_mode][0] or 0 for _, google_mode in COMPARED_MODES]
+    emissions = calculator.estimate_emissions_batch(
+        modes=[fuel_type, transit_type, "bike", "walking"],
+        miles=distances,
+        passengers=[passengers] * len(COMPARED_MODES),
+        fuel_types=[fuel_type, "", "", ""],  # Fuel-based fallback only applies to driving
+        mpg=[25, 0, 0, 0]
+    )
+
+    comparison = []
+    for (mode, google_mode), emission in zip(COMPARED_MODES, emissions):
+        distance_miles, duration_minutes = routes[google_mode]
+        if distance_miles is None:
+            comparison.append({"mode": mode, "error": "Could not retrieve route details."})
+            continue
+        comparison.append({
+            "mode": mode,
+            "distance_miles": round(distance_miles, 2),
+            "duration_minutes": round(duration_minutes, 2),
+            "estimated_emissions_lbs": round(float(emission), 2)
+        })
+
+    if all("error" in option for option in comparison):
+        return {"error": "Could not retrieve route details."}
+
+    return {
+        "origin": origin,
+        "destination": destination,
+        "modes": comparison
+    }
+
+
+class RouteMatrixRequest(BaseModel):
+    origins: List[str]
+    destinations: List[str]
+    mode: str = "driving"
+    fuel_type: str = "gasoline_car"
+    passengers: int = 1
+    miles_per_kwh: Optional[float] = None
+
+
+@app.post("/route_emissions/batch")
+def calculate_route_emissions_batch(request: RouteMatrixRequest):
+    """
+    Calculates CO₂ emissions for every origin × destination pair.
+    - Distinct addresses are geocoded once; routes come from chunked route-matrix calls.
+    - Emissions for all cells are computed in one vectorized pass, using the same rules as /route_emissions/.
+    """
+    if not request.origins or not request.destinations:
+        raise HTTPException(status_code=400, detail="At least one origin and one destination are required.")
+    if len(request.origins) * len(request.destinations) > MAX_ROUTE_MATRIX_CELLS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_ROUTE_MATRIX_CELLS} origin/destination pairs per request.")
+
+    mode = request.mode
+    fuel_type = request.fuel_type
+    if mode not in ["driving", "transit", "walking", "bicycling"] and "electric" in fuel_type and request.miles_per_kwh is None:
+        raise HTTPException(status_code=400, detail="Miles per kWh is required for electric vehicles.")
+
+    matrix = maps_api.get_route_matrix(request.origins, request.destinations, mode)
+    cells = [cell for row in matrix for cell in row]
+    miles = np.array([cell["distance_miles"] or 0 for cell in cells], dtype=np.float64)
+
+    #  Same branches as /route_emissions/, applied to every cell at once
+    if mode in ["walking", "bicycling"]:
+        emissions = np.zeros(len(cells))
+    elif mode == "transit":
+        emissions = calculator.estimate_emissions_batch(
+            np.full(len(cells), fuel_type), miles, passengers=np.full(len(cells), request.passengers)
+        )
+    else:
+        is_electric = mode != "driving" and "electric" in fuel_type
+        emissions = calculator.estimate_emissions_batch(
+            np.full(len(cells), fuel_type),
+            miles,
+            passengers=np.full(len(cells), request.passengers),
+            fuel_types=None if is_electric else np.full(len(cells), fuel_type),
+            mpg=None if is_electric else np.full(len(cells), 25.0),
+            miles_per_kwh=np.full(len(cells), request.miles_per_kwh) if is_electric else None
+        )
+
+    results = []
+    for cell, emission in zip(cells, emissions):
+        result = {
+            "origin": cell["origin"],
+            "destination": cell["destination"],
+            "mode": mode,
+            "distance_miles": round(cell["distance_miles"], 2) if cell["distance_miles"] is not None else None,
+            "duration_minutes": round(cell["duration_minutes"], 2) if cell["duration_minutes"] is not None else None,
+            "estimated_emissions_lbs": round(float(emission), 2) if cell["distance_miles"] is not None else None
+        }
+        if "error" in cell:
+            result["error"] = cell["error"]
+        results.append(result)
+
+    return {
+        "origins": len(request.origins),
+        "destinations": len(request.destinations),
+        "results": results
+    }
 
-    if not eco_routes:
-        print("[ERROR] No eco-friendly routes retrieved.")
-        return {"error": "Could not retrieve eco-friendly routes."}
 
-    # Select the most eco-friendly route (shortest distance)
-    best_route = min(eco_routes, key=lambda r: r["distance_miles"])
+def _save_eco_route(user_id: int, origin: str, destination: str, mode: str, eco_routes: list, db: Session):
+    """
+    Ranks every route alternative by estimated emissions, calculates CO₂ savings against
+    logged route emissions and saves the greenest route (runs in the threadpool).
+    Returns the API response.
+    """
+    #  Score all alternatives in one batched pass; the greenest route comes first
+    ranked_routes = calculator.rank_routes(eco_routes)
+    best_route = ranked_routes[0]
     print("[INFO] Best route selected:", best_route)
 
-    #  Use actual emissions from route_emissions instead of estimating
-    worst_route_emission = db.query(RouteEmissions).filter(
-        RouteEmissions.origin == origin,
-        RouteEmissions.destination == destination
-    ).order_by(RouteEmissions.co2_emissions.desc()).first()
+    #  Use actual emissions from route_emissions instead of estimating.
+    #  Matching on canonical place IDs also finds trips logged with other spellings of the addresses.
+    origin_place_id = place_index.lookup(db, origin)
+    destination_place_id = place_index.lookup(db, destination)
+    worst_route_emission = None
+    if origin_place_id is not None and destination_place_id is not None:
+        worst_route_emission = db.query(RouteEmissions).filter(
+            RouteEmissions.origin_place_id == origin_place_id,
+            RouteEmissions.destination_place_id == destination_place_id
+        ).order_by(RouteEmissions.co2_emissions.desc()).first()
 
     if worst_route_emission:
         worst_route_emissions = worst_route_emission.co2_emissions
     else:
-        worst_route_distance = max(r["distance_miles"] for r in eco_routes)  # Worst-case distance
-        worst_route_emissions = calculator.estimate_fuel_vehicle_emissions(
-            "gasoline_car", mpg=25, miles=worst_route_distance, passengers=1
-        )  # Estimate only if no real data is found
-
-    # Calculate emissions for the best route
-    best_route_emissions = calculator.estimate_fuel_vehicle_emissions(
-        "gasoline_car", mpg=25, miles=best_route["distance_miles"], passengers=1
-    )
+        worst_route_emissions = ranked_routes[-1]["estimated_emissions_lbs"]  # Estimate only if no real data is found
+
+    # Emissions for the best route
+    best_route_emissions = best_route["estimated_emissions_lbs"]
 
     # Calculate CO₂ savings
     co2_savings = worst_route_emissions - best_route_emissions if worst_route_emissions > best_route_emissions else 0
@@ -470,10 +928,36 @@ def get_eco_routes(
     return {
         "message": "Optimal eco-friendly route saved successfully!",
         "optimal_route": best_route,
-        "all_routes": eco_routes,
+        "all_routes": ranked_routes,  # Ranked greenest first
+        "co2_savings_lbs": round(co2_savings, 2)
     }
 
 
+@app.get("/eco_friendly_routes/")
+async def get_eco_routes(
+    user_id: int,
+    origin: str = Query(..., description="Starting location"),
+    destination: str = Query(..., description="Destination"),
+    mode: str = Query("DRIVE", description="Mode of transport (DRIVE, WALK, BICYCLE, TRANSIT)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Fetches eco-friendly route alternatives from Google Maps API, ranks all of them by
+    estimated emissions, calculates CO₂ savings using actual emissions from route_emissions,
+    and saves the greenest route.
+    Geocoding and routing run on the async Maps client; database work runs in the threadpool.
+    """
+    deadline = Deadline(ROUTE_LATENCY_BUDGET)  #  Bounds all upstream calls for this request
+    eco_routes = await async_maps_api.get_eco_friendly_routes(origin, destination, deadline=deadline)
+    print("Eco Routes Response:", eco_routes)
+
+    if not eco_routes:
+        print("[ERROR] No eco-friendly routes retrieved.")
+        return {"error": "Could not retrieve eco-friendly routes."}
+
+    return await run_in_threadpool(_save_eco_route, user_id, origin, destination, mode, eco_routes, db)
+
+
 
 
 @app.get("/get_ai_recommendations/{user_id}")
@@ -691,6 +1175,39 @@ def calculate_public_transport_emissions(request: PublicTransportRequest):
     )
 
 
+@app.get("/metrics/")
+def get_metrics():
+    """
+    Cache and client counters for monitoring.
+    """
+    return {
+        "geocode_cache": maps_api.geocode_cache.stats(),
+        "route_cache": maps_api.route_cache.stats(),
+        "place_index": place_index.stats(),
+        "emission_summaries": emission_summaries.stats(),
+        "write_behind": audit_writer.stats(),
+        "clustering_model": ai_manager.ai_agent.model_stats(),
+        "chat_replies": {"generic": generic_replies.stats(), "personal": personal_replies.stats()},
+        "http_clients": {**http_metrics(), "maps_async": async_maps_api.http.metrics()},
+        "singleflight": {
+            "maps": maps_api.flights.stats(),
+            "maps_async": async_maps_api.async_flights.stats(),
+            "groq": groq_flights.stats()
+        },
+        "chatbot_time_to_first_token": first_token_latency.stats(),
+        "groq_guard": groq_guard.stats()
+    }
+
+
+@app.post("/route_cache/invalidate")
+def invalidate_route_cache(origin: Optional[str] = None, destination: Optional[str] = None, mode: Optional[str] = None):
+    """
+    Drops cached routes matching the given filters (all cached routes if none are given).
+    """
+    removed = maps_api.invalidate_routes(origin, destination, mode)
+    return {"message": "Route cache invalidated.", "removed": removed}
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="127.0.0.1", port=8000)
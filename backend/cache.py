@@ -0,0 +1,94 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = None):
+        """
+        Thread-safe in-process LRU cache with optional TTL.
+        - max_size: Entries kept before the least recently used one is evicted.
+        - ttl_seconds: Age after which an entry counts as a miss (None = never expires).
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (value, stored_at)
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        """
+        Returns the cached value for `key`, or `default` on a miss or expired entry.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            value, stored_at = entry
+            if self.ttl_seconds is not None and time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """
+        Stores `value`, evicting the least recently used entries past `max_size`.
+        """
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key) -> bool:
+        """
+        Removes `key` from the cache. Returns True if it was present.
+        """
+        with self._lock:
+            return self._entries.pop(key, None) is not None
+
+    def delete_where(self, predicate) -> int:
+        """
+        Removes every entry whose key matches `predicate(key)`. Returns the number removed.
+        """
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        """
+        Returns hit/miss counters and current size.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
@@ -0,0 +1,140 @@
+import re
+import threading
+import uuid
+from datetime import datetime, UTC
+from sqlalchemy.orm import Session
+from backend.models import ChatbotResponse, Conversation
+from backend.dependencies import CHAT_HISTORY_TURNS, CHAT_SUMMARY_MAX_CHARS
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+#  conversation_id -> [(user_query, bot_response, created_at)] queued but not yet written
+_pending_turns = {}
+#  conversation_id -> user_id for conversations whose first turn is still queued
+_pending_owners = {}
+_pending_lock = threading.Lock()
+
+
+def _gist(text: str, max_chars: int = 160) -> str:
+    """
+    First sentence of a message, shortened to `max_chars`.
+    """
+    sentence = _SENTENCE_END.split(" ".join(text.split()), maxsplit=1)[0]
+    return sentence if len(sentence) <= max_chars else sentence[:max_chars - 3].rstrip() + "..."
+
+
+def new_conversation_id() -> str:
+    """
+    Id for a new conversation. Nothing is written until its first turn is recorded
+    (see record_turn), so starting a conversation costs no database round trip.
+    """
+    return uuid.uuid4().hex
+
+
+def get_conversation(db: Session, conversation_id: str, user_id: int):
+    """
+    Returns the user's conversation, or None if it does not exist or belongs to someone else.
+    A conversation whose first turn is still queued is returned as an unsaved Conversation.
+    """
+    conversation = db.query(Conversation).filter(Conversation.id == conversation_id, Conversation.user_id == user_id).first()
+    if conversation is None:
+        with _pending_lock:
+            if _pending_owners.get(conversation_id) == user_id:
+                conversation = Conversation(id=conversation_id, user_id=user_id, summary="", summarized_until_id=0)
+    return conversation
+
+
+def load_context(db: Session, conversation: Conversation, user_id: int, max_turns: int = CHAT_HISTORY_TURNS):
+    """
+    Returns (summary, turns): the rolling summary of older turns and the last
+    `max_turns` (user_query, bot_response) pairs, oldest first. Turns still waiting
+    in the write-behind queue are included.
+    """
+    rows = db.query(ChatbotResponse.user_query, ChatbotResponse.bot_response).filter(
+        ChatbotResponse.user_id == user_id,
+        ChatbotResponse.conversation_id == conversation.id
+    ).order_by(ChatbotResponse.created_at.desc(), ChatbotResponse.id.desc()).limit(max_turns).all()
+
+    turns = [(query, reply) for query, reply in reversed(rows)]
+    with _pending_lock:
+        pending = list(_pending_turns.get(conversation.id, ()))
+    #  A turn can be both written and still pending for a moment; do not send it twice
+    turns += [(query, reply) for query, reply, _ in pending if (query, reply) not in turns]
+
+    return conversation.summary, turns[-max_turns:]
+
+
+def queue_turn(writer, conversation_id: str, user_id: int, user_query: str, bot_response: str) -> datetime:
+    """
+    Hands a chatbot turn to the write-behind `writer` (backend.write_behind.WriteBehindQueue)
+    and returns its timestamp. Until the turn is written, load_context still sees it.
+    """
+    created_at = datetime.now(UTC)
+    turn = (user_query, bot_response, created_at)
+    with _pending_lock:
+        _pending_turns.setdefault(conversation_id, []).append(turn)
+        _pending_owners.setdefault(conversation_id, user_id)
+
+    def forget():
+        with _pending_lock:
+            pending = _pending_turns.get(conversation_id, [])
+            if turn in pending:
+                pending.remove(turn)
+            if not pending:
+                _pending_turns.pop(conversation_id, None)
+                _pending_owners.pop(conversation_id, None)
+
+    writer.submit(
+        lambda db: record_turn(db, conversation_id, user_id, user_query, bot_response, created_at=created_at),
+        on_done=forget
+    )
+    return created_at
+
+
+def record_turn(
+    db: Session,
+    conversation_id: str,
+    user_id: int,
+    user_query: str,
+    bot_response: str,
+    created_at: datetime = None,
+    max_turns: int = CHAT_HISTORY_TURNS,
+    max_summary_chars: int = CHAT_SUMMARY_MAX_CHARS
+) -> ChatbotResponse:
+    """
+    Saves a chatbot turn and folds turns that fell out of the context window into the
+    conversation's rolling summary, creating the conversation on its first turn. Only
+    turns not yet summarized are read, so the work per call stays constant as the
+    conversation grows. Flushes; the caller commits.
+    """
+    conversation = db.get(Conversation, conversation_id)
+    if conversation is None:
+        conversation = Conversation(id=conversation_id, user_id=user_id, summary="", summarized_until_id=0)
+        db.add(conversation)
+    chat_entry = ChatbotResponse(
+        user_id=user_id, conversation_id=conversation_id, user_query=user_query, bot_response=bot_response,
+        created_at=created_at or datetime.now(UTC)
+    )
+    db.add(chat_entry)
+    db.flush()
+
+    unsummarized = db.query(ChatbotResponse.id, ChatbotResponse.user_query, ChatbotResponse.bot_response).filter(
+        ChatbotResponse.conversation_id == conversation_id,
+        ChatbotResponse.id > conversation.summarized_until_id
+    ).order_by(ChatbotResponse.id).all()
+
+    overflow = unsummarized[:max(0, len(unsummarized) - max_turns)]
+    if overflow:
+        lines = conversation.summary.splitlines() if conversation.summary else []
+        lines += [f"User asked: {_gist(query)} Assistant: {_gist(reply)}" for _, query, reply in overflow]
+
+        #  Oldest summary lines are dropped first
+        while len(lines) > 1 and len("\n".join(lines)) > max_summary_chars:
+            lines.pop(0)
+
+        conversation.summary = "\n".join(lines)[-max_summary_chars:]
+        conversation.summarized_until_id = overflow[-1][0]
+
+    conversation.updated_at = datetime.now(UTC)
+    db.flush()
+    return chat_entry
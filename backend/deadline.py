@@ -0,0 +1,159 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, wait
+import numpy as np
+import requests
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """
+    Raised when a request's latency budget is used up before an upstream call is made.
+    Subclasses requests' Timeout so existing timeout handling also covers it.
+    """
+
+
+class Deadline:
+    def __init__(self, budget_seconds: float):
+        """
+        Latency budget for one API request. Created in the FastAPI handler and passed
+        down to every upstream call, which derives its timeout from what is left.
+        """
+        self.budget_seconds = budget_seconds
+        self.expires_at = time.monotonic() + budget_seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def timeout(self, default: float) -> float:
+        """
+        Timeout for the next call: the default, capped by the remaining budget.
+        Raises DeadlineExceeded if nothing is left.
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded(f"Latency budget of {self.budget_seconds}s exhausted")
+        return min(default, remaining)
+
+
+class LatencyTracker:
+    def __init__(self, window: int = 500, min_samples: int = 20):
+        """
+        Rolling window of recent call latencies, used to derive the hedging delay.
+        """
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.min_samples = min_samples
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, q: float):
+        """
+        q-th percentile of recent latencies in seconds, or None until enough samples exist.
+        """
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            return float(np.percentile(self._samples, q))
+
+    def stats(self) -> dict:
+        p50, p95 = self.percentile(50), self.percentile(95)
+        return {
+            "samples": len(self._samples),
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None
+        }
+
+
+def _discard(future):
+    """
+    Gets rid of a hedged attempt whose result is no longer wanted: cancelled if it
+    has not started, otherwise its result (e.g. a response holding a pooled
+    connection) is closed as soon as it finishes.
+    """
+    if future.cancel():
+        return
+
+    def close(finished):
+        if not finished.cancelled() and finished.exception() is None:
+            close_result = getattr(finished.result(), "close", None)
+            if close_result is not None:
+                close_result()
+
+    future.add_done_callback(close)
+
+
+def hedged_call(executor, fn, hedge_delay: float, timeout: float = None, slots: threading.Semaphore = None):
+    """
+    Runs `fn` in `executor`; if it has not finished after `hedge_delay` seconds,
+    starts a duplicate and returns whichever finishes first. The first failure is
+    only raised if the other attempt also fails. The losing attempt is cancelled or,
+    if already running, has its result closed when it finishes.
+    `slots` bounds the hedges in flight: when none is free the executor is treated
+    as saturated and the call just waits for the first attempt. Returns (result, hedged).
+    """
+    started = time.monotonic()
+    remaining = lambda: None if timeout is None else max(0.0, timeout - (time.monotonic() - started))
+    primary = executor.submit(fn)
+    done, _ = wait([primary], timeout=hedge_delay)
+    if done:
+        return primary.result(), False
+
+    if slots is not None and not slots.acquire(blocking=False):
+        done, _ = wait([primary], timeout=remaining())
+        if done:
+            return primary.result(), False
+        _discard(primary)
+        raise DeadlineExceeded("Request timed out")
+
+    hedge = executor.submit(fn)
+    if slots is not None:
+        hedge.add_done_callback(lambda _: slots.release())
+
+    pending = {primary, hedge}
+    error = None
+    try:
+        while pending:
+            done, pending = wait(pending, timeout=remaining(), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                if future.exception() is None:
+                    pending |= done - {future}
+                    return future.result(), True
+                error = future.exception()
+    finally:
+        for future in pending:
+            _discard(future)
+
+    raise error or DeadlineExceeded("Hedged request timed out")
+
+
+async def async_hedged_call(coro_fn, hedge_delay: float):
+    """
+    asyncio version of hedged_call. The losing attempt is cancelled. Returns (result, hedged).
+    """
+    primary = asyncio.ensure_future(coro_fn())
+    done, _ = await asyncio.wait([primary], timeout=hedge_delay)
+    if done:
+        return primary.result(), False
+
+    pending = {primary, asyncio.ensure_future(coro_fn())}
+    error = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result(), True
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
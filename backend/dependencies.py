@@ -16,9 +16,84 @@ load_dotenv(dotenv_path=env_path)
 # Get environment variables
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./test.db")  # Default to SQLite if not provided
 GOOGLE_MAPS_API_KEY = os.getenv("GOOGLE_MAPS_API_KEY", "API_KEY_HERE")
+GOOGLE_GEOCODE_URL = os.getenv("GOOGLE_GEOCODE_URL", "https://maps.googleapis.com/maps/api/geocode/json")
+GOOGLE_ROUTES_URL = os.getenv("GOOGLE_ROUTES_URL", "https://routes.googleapis.com/directions/v2:computeRoutes")
+GOOGLE_ROUTE_MATRIX_URL = os.getenv("GOOGLE_ROUTE_MATRIX_URL", "https://routes.googleapis.com/distanceMatrix/v2:computeRouteMatrix")
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")  #  Load Groq API key from .env
 GROQ_API_URL = os.getenv("GROQ_API_URL", "https://api.groq.com/v1/chat/completions")  # Load Groq API URL
 
+# Geocode cache (in-process LRU + SQLite file)
+GEOCODE_CACHE_DB = os.getenv("GEOCODE_CACHE_DB", "./geocode_cache.db")
+GEOCODE_CACHE_TTL_SECONDS = float(os.getenv("GEOCODE_CACHE_TTL_SECONDS", 30 * 24 * 3600))
+GEOCODE_CACHE_MAX_ROWS = int(os.getenv("GEOCODE_CACHE_MAX_ROWS", 50000))
+GEOCODE_CACHE_MEMORY_SIZE = int(os.getenv("GEOCODE_CACHE_MEMORY_SIZE", 2048))
+
+# Route cache (keyed on origin, destination, mode and time-of-day bucket)
+ROUTE_CACHE_MAX_SIZE = int(os.getenv("ROUTE_CACHE_MAX_SIZE", 4096))
+ROUTE_CACHE_TTL_SECONDS = float(os.getenv("ROUTE_CACHE_TTL_SECONDS", 900))
+ROUTE_CACHE_BUCKET_MINUTES = int(os.getenv("ROUTE_CACHE_BUCKET_MINUTES", 30))
+
+# Shared HTTP clients (Google Maps and Groq)
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", 3.05))
+MAPS_READ_TIMEOUT = float(os.getenv("MAPS_READ_TIMEOUT", 10))
+GROQ_READ_TIMEOUT = float(os.getenv("GROQ_READ_TIMEOUT", 30))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", 2))
+HTTP_BACKOFF_FACTOR = float(os.getenv("HTTP_BACKOFF_FACTOR", 0.3))
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", 20))
+
+# Latency budgets (seconds) per API request, and optional request hedging
+ROUTE_LATENCY_BUDGET = float(os.getenv("ROUTE_LATENCY_BUDGET", 8))
+CHAT_LATENCY_BUDGET = float(os.getenv("CHAT_LATENCY_BUDGET", 20))
+MAPS_HEDGING = os.getenv("MAPS_HEDGING", "false").lower() == "true"
+GROQ_HEDGING = os.getenv("GROQ_HEDGING", "false").lower() == "true"
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", 95))  # Hedge after this latency percentile
+
+# Per-user emission summary used in chatbot prompts
+EMISSION_SUMMARY_MAX_TOKENS = int(os.getenv("EMISSION_SUMMARY_MAX_TOKENS", 250))
+EMISSION_SUMMARY_CACHE_SIZE = int(os.getenv("EMISSION_SUMMARY_CACHE_SIZE", 4096))
+EMISSION_SUMMARY_TTL_SECONDS = float(os.getenv("EMISSION_SUMMARY_TTL_SECONDS", 3600))  # Bounds staleness across workers
+
+# Chatbot reply cache (cross-user tier for generic questions, per-summary tier otherwise)
+CHAT_CACHE_GENERIC_SIZE = int(os.getenv("CHAT_CACHE_GENERIC_SIZE", 512))
+CHAT_CACHE_PERSONAL_SIZE = int(os.getenv("CHAT_CACHE_PERSONAL_SIZE", 4096))
+CHAT_CACHE_TTL_SECONDS = float(os.getenv("CHAT_CACHE_TTL_SECONDS", 6 * 3600))
+
+# Chatbot conversation memory
+CHAT_HISTORY_TURNS = int(os.getenv("CHAT_HISTORY_TURNS", 6))  # Recent turns sent verbatim
+CHAT_SUMMARY_MAX_CHARS = int(os.getenv("CHAT_SUMMARY_MAX_CHARS", 1200))  # Cap on the rolling summary of older turns
+
+# Write-behind queue for audit rows (chatbot turns, predictions)
+WRITE_BEHIND_MAX_SIZE = int(os.getenv("WRITE_BEHIND_MAX_SIZE", 10000))
+WRITE_BEHIND_BATCH_SIZE = int(os.getenv("WRITE_BEHIND_BATCH_SIZE", 200))
+WRITE_BEHIND_FLUSH_INTERVAL = float(os.getenv("WRITE_BEHIND_FLUSH_INTERVAL", 1.0))  # Seconds
+WRITE_BEHIND_ENQUEUE_TIMEOUT = float(os.getenv("WRITE_BEHIND_ENQUEUE_TIMEOUT", 2.0))  # Block this long when full, then write inline
+
+# Groq load protection: concurrency cap, token-bucket rate limit (match the account quota), circuit breaker
+GROQ_MAX_CONCURRENCY = int(os.getenv("GROQ_MAX_CONCURRENCY", 8))
+GROQ_QUEUE_TIMEOUT = float(os.getenv("GROQ_QUEUE_TIMEOUT", 2.0))  # Max wait for a slot/token before failing fast
+GROQ_REQUESTS_PER_MINUTE = float(os.getenv("GROQ_REQUESTS_PER_MINUTE", 30))
+GROQ_BURST = float(os.getenv("GROQ_BURST", 10))
+GROQ_BREAKER_FAILURE_RATE = float(os.getenv("GROQ_BREAKER_FAILURE_RATE", 0.5))
+GROQ_BREAKER_MIN_CALLS = int(os.getenv("GROQ_BREAKER_MIN_CALLS", 10))
+GROQ_BREAKER_WINDOW = int(os.getenv("GROQ_BREAKER_WINDOW", 20))  # Recent calls considered
+GROQ_BREAKER_COOLDOWN = float(os.getenv("GROQ_BREAKER_COOLDOWN", 30))  # Seconds open before a trial call
+
+# Clustering model used by AIAgent (persisted, retrained in the background)
+AI_MODEL_DIR = os.getenv("AI_MODEL_DIR", str(Path(__file__).resolve().parent.parent / "model_store"))
+AI_RETRAIN_INTERVAL_SECONDS = float(os.getenv("AI_RETRAIN_INTERVAL_SECONDS", 6 * 3600))
+AI_RETRAIN_AFTER_TRIPS = int(os.getenv("AI_RETRAIN_AFTER_TRIPS", 1000))  # Also retrain after this many new trips
+AI_ONLINE_LEARNING = os.getenv("AI_ONLINE_LEARNING", "true").lower() == "true"  # partial_fit updated users between full refits
+AI_ONLINE_BATCH_SIZE = int(os.getenv("AI_ONLINE_BATCH_SIZE", 64))  # Users per online update
+AI_ONLINE_FLUSH_SECONDS = float(os.getenv("AI_ONLINE_FLUSH_SECONDS", 30))  # Max wait before a partial batch is applied
+AI_ONLINE_QUEUE_SIZE = int(os.getenv("AI_ONLINE_QUEUE_SIZE", 10000))
+AI_DRIFT_MAX_CENTROID_SHIFT = float(os.getenv("AI_DRIFT_MAX_CENTROID_SHIFT", 0.5))  # In standardized units, since the last full fit
+AI_DRIFT_MAX_INERTIA_RATIO = float(os.getenv("AI_DRIFT_MAX_INERTIA_RATIO", 2.0))  # Batch inertia per user vs. the full fit's
+AI_SIMILAR_USERS = int(os.getenv("AI_SIMILAR_USERS", 20))  # Nearest users whose recommendations refine a user's
+AI_NEIGHBOR_OVERLAY_MAX = int(os.getenv("AI_NEIGHBOR_OVERLAY_MAX", 1000))  # Online-updated users before the tree is rebuilt
+
+# Offline distance estimates (defined in backend.maps_settings, which needs no database)
+from backend.maps_settings import GAZETTEER_PATH, OFFLINE_DETOUR_FACTOR
+
 # SQLAlchemy Engine
 engine = create_engine(DATABASE_URL)
 
@@ -0,0 +1,89 @@
+"""
+Local fake of the Google Geocoding and Routes APIs for load tests and benchmarks.
+
+Run it and point the backend at it:
+
+    uvicorn backend.fake_maps_server:app --port 8001
+    GOOGLE_GEOCODE_URL=http://127.0.0.1:8001/maps/api/geocode/json
+    GOOGLE_ROUTES_URL=http://127.0.0.1:8001/directions/v2:computeRoutes
+    GOOGLE_ROUTE_MATRIX_URL=http://127.0.0.1:8001/distanceMatrix/v2:computeRouteMatrix
+
+Known places come from the offline gazetteer; unknown addresses get stable pseudo-random
+coordinates so any address works. Set FAKE_MAPS_LATENCY_MS to simulate upstream latency.
+"""
+import asyncio
+import hashlib
+import os
+from fastapi import FastAPI, Request
+from backend.offline_maps import OfflineMapsAPI, OFFLINE_SPEEDS_MPH
+
+app = FastAPI()
+offline_maps = OfflineMapsAPI()
+FAKE_MAPS_LATENCY_MS = float(os.getenv("FAKE_MAPS_LATENCY_MS", 0))
+
+
+async def simulate_latency():
+    if FAKE_MAPS_LATENCY_MS > 0:
+        await asyncio.sleep(FAKE_MAPS_LATENCY_MS / 1000)
+
+
+def fake_coordinates(address: str) -> dict:
+    """
+    Gazetteer coordinates, or a deterministic point in the continental U.S. derived from the address.
+    """
+    coords = offline_maps.get_coordinates_from_address(address)
+    if coords:
+        return coords
+
+    digest = hashlib.sha256(address.lower().encode("utf-8")).digest()
+    return {
+        "lat": 25 + int.from_bytes(digest[:4], "big") / 2**32 * 24,
+        "lng": -124 + int.from_bytes(digest[4:8], "big") / 2**32 * 57
+    }
+
+
+def to_coords(waypoint: dict) -> dict:
+    lat_lng = waypoint["location"]["latLng"]
+    return {"lat": lat_lng["latitude"], "lng": lat_lng["longitude"]}
+
+
+def fake_route(origin_coords: dict, destination_coords: dict, travel_mode: str, detour: float = 1.0) -> dict:
+    distance_miles, _ = offline_maps._estimate(origin_coords, destination_coords, travel_mode)
+    distance_miles *= detour
+    duration_seconds = int(distance_miles / OFFLINE_SPEEDS_MPH.get(travel_mode, OFFLINE_SPEEDS_MPH["DRIVE"]) * 3600)
+    return {"distanceMeters": int(distance_miles * 1609.34), "duration": f"{duration_seconds}s"}
+
+
+@app.get("/maps/api/geocode/json")
+async def geocode(address: str, key: str = None):
+    await simulate_latency()
+    return {"status": "OK", "results": [{"geometry": {"location": fake_coordinates(address)}}]}
+
+
+@app.post("/directions/v2:computeRoutes")
+async def compute_routes(request: Request):
+    await simulate_latency()
+    body = await request.json()
+    origin = to_coords(body["origin"])
+    destination = to_coords(body["destination"])
+    travel_mode = body.get("travelMode", "DRIVE")
+
+    routes = [{**fake_route(origin, destination, travel_mode), "description": "Fake primary route"}]
+    if body.get("computeAlternativeRoutes"):
+        routes.append({**fake_route(origin, destination, travel_mode, detour=1.12), "description": "Fake alternative route"})
+    return {"routes": routes}
+
+
+@app.post("/distanceMatrix/v2:computeRouteMatrix")
+async def compute_route_matrix(request: Request):
+    await simulate_latency()
+    body = await request.json()
+    travel_mode = body.get("travelMode", "DRIVE")
+    origins = [to_coords(o["waypoint"]) for o in body["origins"]]
+    destinations = [to_coords(d["waypoint"]) for d in body["destinations"]]
+
+    return [
+        {"originIndex": i, "destinationIndex": j, "condition": "ROUTE_EXISTS", **fake_route(o, d, travel_mode)}
+        for i, o in enumerate(origins)
+        for j, d in enumerate(destinations)
+    ]
@@ -0,0 +1,167 @@
+import sqlite3
+import threading
+import time
+from backend.cache import LRUCache
+from backend.address import canonicalize_address
+
+
+def normalize_address_key(address: str) -> str:
+    """
+    Cache key for an address: its canonical form (see backend.address.canonicalize_address),
+    so spelling variants of the same address share one entry.
+    """
+    return canonicalize_address(address)
+
+
+class GeocodeCache:
+    def __init__(self, db_path: str, ttl_seconds: float = 30 * 24 * 3600, max_rows: int = 50000, memory_size: int = 2048):
+        """
+        Two-tier geocode cache.
+        - Tier 1: in-process LRU (no I/O).
+        - Tier 2: SQLite table that survives restarts and is shared by workers on the same host.
+        Entries older than `ttl_seconds` are treated as misses. Once the table may have
+        grown past `max_rows` plus some slack, expired rows are dropped and the least
+        recently used rows are evicted down to `max_rows`.
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_rows = max_rows
+        self.evict_slack = max(1, max_rows // 10)
+        self.memory = LRUCache(max_size=memory_size, ttl_seconds=ttl_seconds)
+        self._lock = threading.Lock()
+
+        self.sqlite_hits = 0
+        self.sqlite_misses = 0
+        self.sqlite_evictions = 0
+        self.sqlite_expirations = 0
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS geocode_cache (
+                address TEXT PRIMARY KEY,
+                lat REAL NOT NULL,
+                lng REAL NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_geocode_cache_last_used ON geocode_cache (last_used)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_geocode_cache_created_at ON geocode_cache (created_at)")
+        #  Upper bound on the rows in the table (replacing an entry still counts as a write);
+        #  corrected by an exact count whenever eviction runs
+        (self._rows,) = self._conn.execute("SELECT COUNT(*) FROM geocode_cache").fetchone()
+
+    def get(self, address: str):
+        """
+        Returns cached {"lat", "lng"} for an address, or None on a miss.
+        A SQLite hit is promoted into the in-process LRU.
+        """
+        coords = self.get_memory(address)
+        return coords if coords is not None else self.get_persistent(address)
+
+    def get_memory(self, address: str):
+        """
+        In-process tier only; never blocks, so it is safe to call on the event loop.
+        """
+        return self.memory.get(normalize_address_key(address))
+
+    def get_persistent(self, address: str):
+        """
+        SQLite tier only (blocking I/O). A hit is promoted into the in-process LRU.
+        """
+        key = normalize_address_key(address)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT lat, lng, created_at FROM geocode_cache WHERE address = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self.sqlite_misses += 1
+                return None
+
+            lat, lng, created_at = row
+            if now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM geocode_cache WHERE address = ?", (key,))
+                self._rows -= 1
+                self.sqlite_expirations += 1
+                self.sqlite_misses += 1
+                return None
+
+            self._conn.execute("UPDATE geocode_cache SET last_used = ? WHERE address = ?", (now, key))
+            self.sqlite_hits += 1
+
+        coords = {"lat": lat, "lng": lng}
+        self.memory.set(key, coords)
+        return coords
+
+    def set(self, address: str, coords: dict):
+        """
+        Stores coordinates in both tiers.
+        """
+        self.set_memory(address, coords)
+        self.set_persistent(address, coords)
+
+    def set_memory(self, address: str, coords: dict):
+        self.memory.set(normalize_address_key(address), coords)
+
+    def set_persistent(self, address: str, coords: dict):
+        """
+        SQLite tier only (blocking I/O). Enforces the row limit once the table may have
+        outgrown it by the slack, so most writes are a single insert.
+        """
+        key = normalize_address_key(address)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO geocode_cache (address, lat, lng, created_at, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, coords["lat"], coords["lng"], now, now)
+            )
+            self._rows += 1
+            if self._rows > self.max_rows + self.evict_slack:
+                self._evict()
+
+    def _evict(self):
+        """
+        Drops expired rows, then least recently used rows beyond `max_rows`.
+        """
+        expired = self._conn.execute(
+            "DELETE FROM geocode_cache WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+        ).rowcount
+        self.sqlite_expirations += expired
+
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM geocode_cache").fetchone()
+        overflow = count - self.max_rows
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM geocode_cache WHERE address IN "
+                "(SELECT address FROM geocode_cache ORDER BY last_used ASC LIMIT ?)",
+                (overflow,)
+            )
+            self.sqlite_evictions += overflow
+            count = self.max_rows
+        self._rows = count
+
+    def clear(self):
+        self.memory.clear()
+        with self._lock:
+            self._conn.execute("DELETE FROM geocode_cache")
+            self._rows = 0
+
+    def stats(self) -> dict:
+        """
+        Returns hit/miss counters for both tiers.
+        """
+        with self._lock:
+            (rows,) = self._conn.execute("SELECT COUNT(*) FROM geocode_cache").fetchone()
+            return {
+                "memory": self.memory.stats(),
+                "sqlite": {
+                    "rows": rows,
+                    "max_rows": self.max_rows,
+                    "hits": self.sqlite_hits,
+                    "misses": self.sqlite_misses,
+                    "evictions": self.sqlite_evictions,
+                    "expirations": self.sqlite_expirations
+                }
+            }
@@ -0,0 +1,331 @@
+import asyncio
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+import requests
+import httpx
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import InvalidHeader, NewConnectionError
+from urllib3.util.retry import Retry, RequestHistory
+from backend.dependencies import HTTP_CONNECT_TIMEOUT, HTTP_MAX_RETRIES, HTTP_BACKOFF_FACTOR, HTTP_POOL_MAXSIZE, MAPS_READ_TIMEOUT, GROQ_READ_TIMEOUT
+from backend.dependencies import MAPS_HEDGING, GROQ_HEDGING, HEDGE_PERCENTILE
+from backend.deadline import Deadline, DeadlineExceeded, LatencyTracker, hedged_call, async_hedged_call
+
+
+class JitteredRetry(Retry):
+    """
+    urllib3 Retry whose exponential backoff gets a random jitter so that
+    retries from many workers do not hit the upstream at the same instant.
+    """
+    jitter = 0.25  # Maximum extra delay as a fraction of the backoff
+
+    def get_backoff_time(self) -> float:
+        backoff = super().get_backoff_time()
+        return backoff + random.uniform(0, backoff * self.jitter) if backoff > 0 else 0
+
+
+class HTTPClient:
+    def __init__(self, name: str, connect_timeout: float = 3.05, read_timeout: float = 10,
+                 max_retries: int = 2, backoff_factor: float = 0.3, pool_connections: int = 10, pool_maxsize: int = 20,
+                 hedging: bool = False):
+        """
+        Pooled keep-alive HTTP client shared by every request to an upstream.
+        - connect_timeout / read_timeout: Default timeouts applied to every call.
+        - max_retries: Bounded retries on connection errors and 429/5xx responses,
+          with jittered exponential backoff (read timeouts are not retried). Calls with
+          a deadline retry in request() instead, so waits never outlast the budget.
+        - pool_connections / pool_maxsize: Number of per-host pools and connections kept per host.
+        - hedging: Send a duplicate request when the first one is slower than the recent p95,
+          with at most half of pool_maxsize duplicates in flight.
+        """
+        self.name = name
+        self.timeout = (connect_timeout, read_timeout)
+        self.hedging = hedging
+        self.latency = LatencyTracker()
+        self._hedge_executor = ThreadPoolExecutor(max_workers=pool_maxsize, thread_name_prefix=f"{name}-hedge") if hedging else None
+        self._hedge_slots = threading.BoundedSemaphore(max(1, pool_maxsize // 2))  #  Leave room for first attempts
+
+        self.retry = JitteredRetry(
+            total=max_retries,
+            connect=max_retries,
+            read=0,
+            status=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset({"GET", "POST"}),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        self.adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=self.retry)
+
+        self.session = requests.Session()
+        self.session.mount("https://", self.adapter)
+        self.session.mount("http://", self.adapter)
+
+        #  Same connection pools, no urllib3 retries: used for calls with a deadline
+        self._deadline_adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=0)
+        self._deadline_adapter.poolmanager = self.adapter.poolmanager
+        self._deadline_session = requests.Session()
+        self._deadline_session.mount("https://", self._deadline_adapter)
+        self._deadline_session.mount("http://", self._deadline_adapter)
+
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.hedged = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.requests_by_host = {}
+
+    def request(self, method: str, url: str, deadline: Deadline = None, **kwargs) -> requests.Response:
+        """
+        Sends a request through the shared session. Uses the client's default
+        timeouts unless `timeout` is passed explicitly; with a `deadline`, every
+        attempt's timeouts and every retry wait (backoff or Retry-After) are capped by
+        the remaining budget.
+        Streaming requests (stream=True) are never hedged and are left out of the
+        latency window, since their response time is only the time to headers.
+        """
+        streaming = kwargs.get("stream", False)
+        timeout = kwargs.pop("timeout", self.timeout)
+        if deadline is not None:
+            deadline.timeout(timeout[0])  #  Fail fast if the budget is already spent
+            send = lambda: self._request_within(deadline, method, url, timeout, **kwargs)
+        else:
+            send = lambda: self.session.request(method, url, timeout=timeout, **kwargs)
+        host = urlsplit(url).netloc
+
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            self.requests_by_host[host] = self.requests_by_host.get(host, 0) + 1
+
+        started = time.monotonic()
+        try:
+            hedge_delay = self.latency.percentile(HEDGE_PERCENTILE) if self.hedging and not streaming else None
+            if hedge_delay is not None and (deadline is None or deadline.remaining() > hedge_delay):
+                response, hedged = hedged_call(
+                    self._hedge_executor,
+                    send,
+                    hedge_delay,
+                    timeout=deadline.remaining() if deadline is not None else None,
+                    slots=self._hedge_slots
+                )
+                if hedged:
+                    with self._lock:
+                        self.hedged += 1
+            else:
+                response = send()
+        except requests.RequestException:
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+        if not streaming:
+            self.latency.record(time.monotonic() - started)
+
+        retries = getattr(response.raw, "retries", None)
+        if retries is not None and retries.history:
+            with self._lock:
+                self.retries += len(retries.history)
+
+        return response
+
+    def _request_within(self, deadline: Deadline, method: str, url: str, timeout: tuple, **kwargs) -> requests.Response:
+        """
+        One call with the client's retry policy applied by hand against `deadline`:
+        connection failures and 429/5xx responses are retried with jittered backoff,
+        honouring Retry-After, but only while the wait fits in the remaining budget.
+        Otherwise the last response (or error) is returned to the caller.
+        """
+        for attempt in range(self.retry.total + 1):
+            can_retry = attempt < self.retry.total
+            try:
+                response = self._deadline_session.request(
+                    method, url, timeout=(deadline.timeout(timeout[0]), deadline.timeout(timeout[1])), **kwargs
+                )
+            except requests.ConnectionError as e:
+                reason = getattr(e.args[0], "reason", None) if e.args else None
+                if not can_retry or not (isinstance(e, requests.ConnectTimeout) or isinstance(reason, NewConnectionError)):
+                    raise
+                response, error = None, e
+            else:
+                if not can_retry or response.status_code not in self.retry.status_forcelist:
+                    return response
+
+            history = (RequestHistory(method, url, None, None, None),) * (attempt + 1)
+            delay = self.retry.new(history=history).get_backoff_time()
+            retry_after = response.headers.get("Retry-After") if response is not None else None
+            if retry_after:
+                try:
+                    delay = max(delay, self.retry.parse_retry_after(retry_after))
+                except InvalidHeader:
+                    pass
+            if delay >= deadline.remaining():
+                if response is None:
+                    raise error  #  No budget left to retry the connection failure
+                return response  #  No budget left to wait; the caller handles the 429/5xx
+
+            if response is not None:
+                response.close()
+            with self._lock:
+                self.retries += 1
+            time.sleep(delay)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def metrics(self) -> dict:
+        """
+        Request counters plus per-host connection pool usage.
+        """
+        pools = {}
+        for key in list(self.adapter.poolmanager.pools.keys()):
+            pool = self.adapter.poolmanager.pools.get(key)
+            if pool is None:
+                continue
+            pools[f"{pool.scheme}://{pool.host}:{pool.port}"] = {
+                "connections_created": pool.num_connections,
+                "requests": pool.num_requests,
+                "in_use": pool.pool.maxsize - pool.pool.qsize() if pool.pool is not None else 0,  # Checked-out connections
+                "max_size": pool.pool.maxsize if pool.pool is not None else 0
+            }
+
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "retries": self.retries,
+                "hedged": self.hedged,
+                "latency": self.latency.stats(),
+                "in_flight": self.in_flight,
+                "peak_in_flight": self.peak_in_flight,
+                "requests_by_host": dict(self.requests_by_host),
+                "timeout": {"connect": self.timeout[0], "read": self.timeout[1]},
+                "pools": pools
+            }
+
+
+#  Shared clients, one per upstream
+maps_client = HTTPClient(
+    "maps",
+    connect_timeout=HTTP_CONNECT_TIMEOUT,
+    read_timeout=MAPS_READ_TIMEOUT,
+    max_retries=HTTP_MAX_RETRIES,
+    backoff_factor=HTTP_BACKOFF_FACTOR,
+    pool_maxsize=HTTP_POOL_MAXSIZE,
+    hedging=MAPS_HEDGING
+)
+groq_client = HTTPClient(
+    "groq",
+    connect_timeout=HTTP_CONNECT_TIMEOUT,
+    read_timeout=GROQ_READ_TIMEOUT,
+    max_retries=HTTP_MAX_RETRIES,
+    backoff_factor=HTTP_BACKOFF_FACTOR,
+    pool_maxsize=HTTP_POOL_MAXSIZE,
+    hedging=GROQ_HEDGING
+)
+
+
+def http_metrics() -> dict:
+    """
+    Metrics for every shared client, keyed by client name.
+    """
+    return {client.name: client.metrics() for client in (maps_client, groq_client)}
+
+
+class AsyncHTTPClient:
+    def __init__(self, name: str, read_timeout: float = MAPS_READ_TIMEOUT, hedging: bool = False):
+        """
+        asyncio counterpart of HTTPClient built on a pooled keep-alive httpx client,
+        with the same timeouts and pool size. Connection failures are retried by the transport.
+        With a deadline, the whole call (including retries) is bounded by the remaining budget.
+        Create it once per process and close it on shutdown.
+        """
+        self.name = name
+        self.timeout = (HTTP_CONNECT_TIMEOUT, read_timeout)
+        self.hedging = hedging
+        self.latency = LatencyTracker()
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(read_timeout, connect=HTTP_CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=HTTP_POOL_MAXSIZE, max_keepalive_connections=HTTP_POOL_MAXSIZE),
+            transport=httpx.AsyncHTTPTransport(retries=HTTP_MAX_RETRIES)
+        )
+
+        self.requests = 0
+        self.errors = 0
+        self.hedged = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    async def request(self, method: str, url: str, deadline: Deadline = None, **kwargs) -> httpx.Response:
+        connect_timeout, read_timeout = self.timeout
+        budget = None
+        if deadline is not None:
+            budget = deadline.timeout(read_timeout + connect_timeout)
+            kwargs["timeout"] = httpx.Timeout(deadline.timeout(read_timeout), connect=deadline.timeout(connect_timeout))
+
+        self.requests += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        started = time.monotonic()
+        try:
+            hedge_delay = self.latency.percentile(HEDGE_PERCENTILE) if self.hedging else None
+            if hedge_delay is not None and (budget is None or budget > hedge_delay):
+                attempt = async_hedged_call(lambda: self.client.request(method, url, **kwargs), hedge_delay)
+            else:
+                attempt = self._single(method, url, **kwargs)
+            response, hedged = await asyncio.wait_for(attempt, timeout=budget)
+            if hedged:
+                self.hedged += 1
+        except asyncio.TimeoutError:
+            self.errors += 1
+            raise DeadlineExceeded(f"{self.name} request exceeded its latency budget")
+        except httpx.HTTPError:
+            self.errors += 1
+            raise
+        finally:
+            self.in_flight -= 1
+
+        self.latency.record(time.monotonic() - started)
+        return response
+
+    async def _single(self, method: str, url: str, **kwargs):
+        return await self.client.request(method, url, **kwargs), False
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    def metrics(self) -> dict:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "hedged": self.hedged,
+            "latency": self.latency.stats(),
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "timeout": {"connect": self.timeout[0], "read": self.timeout[1]}
+        }
+
+
+def create_async_client(read_timeout: float = MAPS_READ_TIMEOUT) -> AsyncHTTPClient:
+    """
+    Async client for the Maps APIs, hedged like the sync Maps client.
+    """
+    return AsyncHTTPClient("maps_async", read_timeout=read_timeout, hedging=MAPS_HEDGING)
@@ -1,21 +1,166 @@
 import os
+import json
+import hashlib
+import re
+import time
 import requests
+from backend.http_client import groq_client
+from backend.singleflight import SingleFlight
+from backend.deadline import Deadline, LatencyTracker
+from backend.resilience import UpstreamGuard, UpstreamRejected, TokenBucket, CircuitBreaker
 from sqlalchemy.orm import Session
+from sqlalchemy import func, case
+from datetime import datetime, timedelta, UTC
 from backend.models import EmissionHistory
+from backend.cache import LRUCache
+from backend.dependencies import EMISSION_SUMMARY_MAX_TOKENS, EMISSION_SUMMARY_CACHE_SIZE, EMISSION_SUMMARY_TTL_SECONDS
+from backend.dependencies import CHAT_CACHE_GENERIC_SIZE, CHAT_CACHE_PERSONAL_SIZE, CHAT_CACHE_TTL_SECONDS
+from backend.dependencies import (
+    GROQ_MAX_CONCURRENCY, GROQ_QUEUE_TIMEOUT, GROQ_REQUESTS_PER_MINUTE, GROQ_BURST,
+    GROQ_BREAKER_FAILURE_RATE, GROQ_BREAKER_MIN_CALLS, GROQ_BREAKER_WINDOW, GROQ_BREAKER_COOLDOWN
+)
 
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 GROQ_API_URL = os.getenv("GROQ_API_URL", "https://api.groq.com/openai/v1/chat/completions")  
 GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")  
 
+groq_flights = SingleFlight()
+first_token_latency = LatencyTracker()  #  Time to first streamed token
+emission_summaries = LRUCache(max_size=EMISSION_SUMMARY_CACHE_SIZE, ttl_seconds=EMISSION_SUMMARY_TTL_SECONDS)
+
+generic_replies = LRUCache(max_size=CHAT_CACHE_GENERIC_SIZE, ttl_seconds=CHAT_CACHE_TTL_SECONDS)  #  Shared by all users
+personal_replies = LRUCache(max_size=CHAT_CACHE_PERSONAL_SIZE, ttl_seconds=CHAT_CACHE_TTL_SECONDS)
+fallback_replies = LRUCache(max_size=CHAT_CACHE_PERSONAL_SIZE)  #  Last good reply per query, served while Groq is shedding load
+
+#  Concurrency cap, rate limit and circuit breaker around every Groq call
+groq_guard = UpstreamGuard(
+    max_concurrency=GROQ_MAX_CONCURRENCY,
+    queue_timeout=GROQ_QUEUE_TIMEOUT,
+    rate_limiter=TokenBucket(GROQ_REQUESTS_PER_MINUTE / 60, capacity=GROQ_BURST),
+    breaker=CircuitBreaker(
+        failure_rate=GROQ_BREAKER_FAILURE_RATE,
+        min_calls=GROQ_BREAKER_MIN_CALLS,
+        window=GROQ_BREAKER_WINDOW,
+        cooldown_seconds=GROQ_BREAKER_COOLDOWN
+    )
+)
+GROQ_BUSY_REPLY = "Error: The AI assistant is busy right now. Please try again in a moment."
+
+#  Starter questions offered by the chatbot page; always answered without personal data
+GENERIC_QUERIES = {
+    "tell me about electric vehicles",
+    "how do i reduce plastic waste",
+    "what are some energy saving tips"
+}
+_QUERY_PUNCTUATION = re.compile(r"[^\w\s]")
+
+SUMMARY_TOP_MODES = 5
+SUMMARY_TOP_ROUTES = 3
+
 def get_user_emissions(user_id: int, db: Session):
-    emissions = db.query(EmissionHistory).filter(EmissionHistory.user_id == user_id).all()
-    if not emissions:
+    """
+    Compact emission summary for the prompt, cached per user until their next logged trip.
+    """
+    summary = emission_summaries.get(user_id)
+    if summary is None:
+        summary = summarize_user_emissions(user_id, db)
+        emission_summaries.set(user_id, summary)
+    return summary
+
+
+def invalidate_user_emissions(*user_ids: int):
+    """
+    Drops cached summaries; call after logging trips for these users.
+    """
+    for user_id in user_ids:
+        emission_summaries.delete(user_id)
+
+
+def summarize_user_emissions(user_id: int, db: Session, max_tokens: int = EMISSION_SUMMARY_MAX_TOKENS) -> str:
+    """
+    Summarizes a user's emission history with SQL aggregates instead of loading every row:
+    totals, totals by category and mode, the last 30 days against the 30 before, and the
+    most frequent routes. Lines are dropped from the end to stay within `max_tokens`.
+    """
+    user_filter = EmissionHistory.user_id == user_id
+
+    trips, total_emissions, total_miles = db.query(
+        func.count(EmissionHistory.id), func.sum(EmissionHistory.emission_value), func.sum(EmissionHistory.miles)
+    ).filter(user_filter).one()
+    if not trips:
         return "No emissions data available."
-    
-    return "\n".join([f"{entry.category}: {entry.emission_value} kg CO2" for entry in emissions])
 
-def chat_with_ai(user_id: int, user_query: str, db: Session):
-    user_emissions = get_user_emissions(user_id, db)
+    by_category = db.query(
+        EmissionHistory.category, func.count(EmissionHistory.id), func.sum(EmissionHistory.emission_value)
+    ).filter(user_filter).group_by(EmissionHistory.category).order_by(func.sum(EmissionHistory.emission_value).desc()).all()
+
+    by_mode = db.query(
+        EmissionHistory.transport_mode, func.count(EmissionHistory.id),
+        func.sum(EmissionHistory.emission_value), func.sum(EmissionHistory.miles)
+    ).filter(user_filter).group_by(EmissionHistory.transport_mode).order_by(
+        func.sum(EmissionHistory.emission_value).desc()
+    ).limit(SUMMARY_TOP_MODES).all()
+
+    now = datetime.now(UTC)
+    last_30, previous_30 = db.query(
+        func.sum(case((EmissionHistory.timestamp >= now - timedelta(days=30), EmissionHistory.emission_value), else_=0)),
+        func.sum(case((EmissionHistory.timestamp < now - timedelta(days=30), EmissionHistory.emission_value), else_=0))
+    ).filter(user_filter, EmissionHistory.timestamp >= now - timedelta(days=60)).one()
+
+    top_routes = db.query(
+        EmissionHistory.origin, EmissionHistory.destination, func.count(EmissionHistory.id), func.sum(EmissionHistory.emission_value)
+    ).filter(user_filter).group_by(EmissionHistory.origin, EmissionHistory.destination).order_by(
+        func.count(EmissionHistory.id).desc()
+    ).limit(SUMMARY_TOP_ROUTES).all()
+
+    lines = [f"Trips logged: {trips} ({total_emissions or 0:.1f} lbs CO2 over {total_miles or 0:.1f} miles)"]
+    lines.append("By category: " + "; ".join(
+        f"{category}: {emissions or 0:.1f} lbs ({count} trips)" for category, count, emissions in by_category
+    ))
+    lines.append("By mode: " + "; ".join(
+        f"{mode}: {emissions or 0:.1f} lbs, {miles or 0:.1f} mi ({count} trips)" for mode, count, emissions, miles in by_mode
+    ))
+
+    last_30, previous_30 = last_30 or 0, previous_30 or 0
+    trend = f"Last 30 days: {last_30:.1f} lbs vs {previous_30:.1f} lbs in the 30 days before"
+    if previous_30 > 0:
+        trend += f" ({(last_30 - previous_30) / previous_30 * 100:+.0f}%)"
+    lines.append(trend)
+
+    lines.append("Most frequent routes: " + "; ".join(
+        f"{origin} -> {destination} ({count} trips, {emissions or 0:.1f} lbs)" for origin, destination, count, emissions in top_routes
+    ))
+
+    #  Rough budget of 4 characters per token
+    max_chars = max_tokens * 4
+    while len(lines) > 1 and len("\n".join(lines)) > max_chars:
+        lines.pop()
+    return "\n".join(lines)[:max_chars]
+
+
+def normalize_query(user_query: str) -> str:
+    """
+    Cache key form of a chatbot query: lowercase, punctuation removed, whitespace collapsed.
+    """
+    return " ".join(_QUERY_PUNCTUATION.sub(" ", user_query.lower()).split())
+
+
+def is_generic_query(normalized_query: str) -> bool:
+    """
+    True for the starter questions, whose answer does not depend on the user's own data.
+    Everything else gets the personalized prompt and the per-user cache tier.
+    """
+    return normalized_query in GENERIC_QUERIES
+
+
+def build_chat_request(user_id: int, user_query: str, db: Session, personalized: bool = True, history: tuple = None):
+    """
+    Builds the Groq chat completion payload and headers for a user's query.
+    With personalized=False the user's emission data is left out of the prompt.
+    `history` is (summary, turns) from backend.chat_memory.load_context; the summary
+    and recent turns are sent ahead of the new query.
+    """
+    user_emissions = get_user_emissions(user_id, db) if personalized else "Not needed for this general question."
 
     prompt = f"""
     You are an AI sustainability assistant. 
@@ -41,19 +186,196 @@ def chat_with_ai(user_id: int, user_query: str, db: Session):
         "Authorization": f"Bearer {GROQ_API_KEY}",
         "Content-Type": "application/json"
     }
+    messages = [{"role": "system", "content": "Keep responses concise and interactive."}]
+    if history:
+        summary, turns = history
+        if summary:
+            messages.append({"role": "system", "content": f"Summary of earlier conversation:\n{summary}"})
+        for past_query, past_reply in turns:
+            messages.append({"role": "user", "content": past_query})
+            messages.append({"role": "assistant", "content": past_reply})
+    messages.append({"role": "user", "content": prompt})
+
     payload = {
         "model": GROQ_MODEL,  
-        "messages": [
-            {"role": "system", "content": "Keep responses concise and interactive."},
-            {"role": "user", "content": prompt}
-        ],
+        "messages": messages,
         "temperature": 0.7
     }
+    return payload, headers
+
 
-    response = requests.post(GROQ_API_URL, json=payload, headers=headers)
-    response_data = response.json()
+def _prepare_chat(user_id: int, user_query: str, db: Session, history: tuple = None):
+    """
+    Picks the reply cache tier for a query and builds its request.
+    Generic questions share one cross-user entry and are asked without personal data;
+    other questions are keyed on the query plus a hash of the user's emission summary.
+    Follow-ups in a conversation with history are not cached (cache is None).
+    Returns (cache, cache_key, payload, headers).
+    """
+    if history and (history[0] or history[1]):
+        payload, headers = build_chat_request(user_id, user_query, db, history=history)
+        return None, None, payload, headers
+
+    normalized = normalize_query(user_query)
+    if is_generic_query(normalized):
+        payload, headers = build_chat_request(user_id, user_query, db, personalized=False)
+        return generic_replies, normalized, payload, headers
+
+    summary_hash = hashlib.sha256(get_user_emissions(user_id, db).encode("utf-8")).hexdigest()
+    payload, headers = build_chat_request(user_id, user_query, db)
+    return personal_replies, (normalized, summary_hash), payload, headers
+
+
+def _fallback_key(user_id: int, cache: LRUCache, cache_key):
+    """
+    Key for the last good reply to a query, served when Groq calls are being rejected.
+    Personal replies are only reused for the same user.
+    """
+    if cache is generic_replies:
+        return ("generic", cache_key)
+    if cache is personal_replies:
+        return ("user", user_id, cache_key[0])
+    return None
+
+
+def _remember_reply(user_id: int, cache: LRUCache, cache_key, reply: str):
+    cache.set(cache_key, reply)
+    fallback_replies.set(_fallback_key(user_id, cache, cache_key), reply)
+
+
+def chat_with_ai(user_id: int, user_query: str, db: Session, deadline: Deadline = None, history: tuple = None):
+    cache, cache_key, payload, headers = _prepare_chat(user_id, user_query, db, history)
+    cached = cache.get(cache_key) if cache is not None else None
+    if cached is not None:
+        return cached
+
+    #  Identical prompts in flight at the same time share one Groq call
+    flight_key = hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+    reply = groq_flights.do(flight_key, _call_groq, payload, headers, deadline)
+    if reply == GROQ_BUSY_REPLY:
+        fallback_key = _fallback_key(user_id, cache, cache_key)
+        return (fallback_replies.get(fallback_key) if fallback_key else None) or reply
+    if cache is not None and not reply.startswith("Error:"):
+        _remember_reply(user_id, cache, cache_key, reply)
+    return reply
+
+
+def _call_groq(payload: dict, headers: dict, deadline: Deadline = None) -> str:
+    """
+    Sends one chat completion request to Groq and returns the reply text (or an error message).
+    The request timeout is capped by the remaining `deadline` budget, if given.
+    Returns GROQ_BUSY_REPLY without calling Groq when groq_guard rejects the call.
+    """
+    try:
+        with groq_guard.slot(deadline):
+            response = groq_client.post(GROQ_API_URL, json=payload, headers=headers, deadline=deadline)
+            _raise_for_upstream_error(response)
+        response_data = response.json()
+    except UpstreamRejected as e:
+        print(f"[WARNING] Groq call rejected: {e.reason}")
+        return GROQ_BUSY_REPLY
+    except (requests.RequestException, ValueError) as e:
+        print(f"[ERROR] Groq request failed: {e}")
+        return "Error: The AI assistant is unavailable right now. Please try again."
 
     if response.status_code == 200 and "choices" in response_data:
         return response_data["choices"][0]["message"]["content"]
     else:
         return f"Error: {response_data.get('error', 'Unknown error')}"
+
+
+def _raise_for_upstream_error(response: requests.Response):
+    """
+    Raises for rate limiting and server errors, which count against the circuit breaker.
+    Other 4xx responses are request problems, not Groq outages.
+    """
+    if response.status_code == 429 or response.status_code >= 500:
+        raise requests.HTTPError(f"Groq returned {response.status_code}", response=response)
+
+
+def stream_chat_with_ai(user_id: int, user_query: str, db: Session, deadline: Deadline = None, history: tuple = None):
+    """
+    Streaming version of chat_with_ai. The prompt is built (and `db` used) immediately;
+    returns a generator of reply text fragments as Groq produces them. A cached reply
+    is yielded as a single fragment.
+    """
+    cache, cache_key, payload, headers = _prepare_chat(user_id, user_query, db, history)
+    if cache is None:
+        return _stream_groq({**payload, "stream": True}, headers, deadline)
+
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return iter([cached])
+    fallback = fallback_replies.get(_fallback_key(user_id, cache, cache_key))
+    return _cache_stream(user_id, cache, cache_key, _stream_groq({**payload, "stream": True}, headers, deadline, fallback))
+
+
+def _cache_stream(user_id: int, cache: LRUCache, cache_key, fragments):
+    """
+    Passes fragments through and caches the full reply if the stream completed
+    (`fragments` returns True, as _stream_groq does on success).
+    """
+    reply = []
+    while True:
+        try:
+            fragment = next(fragments)
+        except StopIteration as stop:
+            completed = stop.value
+            break
+        reply.append(fragment)
+        yield fragment
+
+    if completed:
+        _remember_reply(user_id, cache, cache_key, "".join(reply))
+
+
+def _stream_groq(payload: dict, headers: dict, deadline: Deadline = None, fallback: str = None):
+    """
+    Sends a streaming chat completion request to Groq and yields content deltas from
+    its server-sent events. Failures are yielded as an error message, like _call_groq.
+    If groq_guard rejects the call, `fallback` (or GROQ_BUSY_REPLY) is yielded instead.
+    Returns True if the reply was received in full.
+    """
+    started = time.monotonic()
+    first_token = True
+    try:
+        with groq_guard.slot(deadline):  #  Held until the stream ends
+            response = groq_client.post(GROQ_API_URL, json=payload, headers=headers, deadline=deadline, stream=True)
+            with response:
+                _raise_for_upstream_error(response)
+                if response.status_code != 200:
+                    try:
+                        error = response.json().get("error", "Unknown error")
+                    except ValueError:
+                        error = "Unknown error"
+                    yield f"Error: {error}"
+                    return False
+
+                for line in response.iter_lines(decode_unicode=True):
+                    if not line or not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+
+                    choices = json.loads(data).get("choices") or [{}]
+                    delta = choices[0].get("delta", {}).get("content")
+                    if delta:
+                        if first_token:
+                            first_token_latency.record(time.monotonic() - started)
+                            first_token = False
+                        yield delta
+    except UpstreamRejected as e:
+        print(f"[WARNING] Groq call rejected: {e.reason}")
+        yield fallback or GROQ_BUSY_REPLY
+        return False
+    except (requests.RequestException, ValueError) as e:
+        if first_token:
+            print(f"[ERROR] Groq request failed: {e}")
+            yield "Error: The AI assistant is unavailable right now. Please try again."
+        else:
+            print(f"[ERROR] Groq stream interrupted: {e}")
+            yield "\n[Response interrupted. Please try again.]"
+        return False
+
+    return not first_token  #  An empty reply is not worth caching
@@ -1,161 +1,531 @@
 import googlemaps
 import datetime
-import requests
-from backend.dependencies import GOOGLE_MAPS_API_KEY
+import asyncio
+from backend.dependencies import GOOGLE_MAPS_API_KEY, GOOGLE_GEOCODE_URL, GOOGLE_ROUTES_URL, GOOGLE_ROUTE_MATRIX_URL, GEOCODE_CACHE_DB, GEOCODE_CACHE_TTL_SECONDS, GEOCODE_CACHE_MAX_ROWS, GEOCODE_CACHE_MEMORY_SIZE
+from backend.dependencies import ROUTE_CACHE_MAX_SIZE, ROUTE_CACHE_TTL_SECONDS, ROUTE_CACHE_BUCKET_MINUTES
+from backend.geocode_cache import GeocodeCache, normalize_address_key
+from backend.http_client import maps_client, create_async_client
+from backend.route_cache import RouteCache
+from backend.singleflight import SingleFlight, AsyncSingleFlight
+from backend.deadline import Deadline
+from backend.maps_settings import GOOGLE_TRAVEL_MODES  # FastAPI mode names -> Google Maps API travel modes
+
+#  Fields requested for eco-friendly route alternatives
+ECO_ROUTES_FIELD_MASK = ",".join([
+    "routes.distanceMeters",
+    "routes.duration",
+    "routes.description",
+    "routes.routeLabels",
+    "routes.polyline.encodedPolyline",
+    "routes.travelAdvisory.fuelConsumptionMicroliters"
+])
 
 class MapsAPI:
-    def __init__(self):
+    def __init__(self, geocode_cache: GeocodeCache = None, route_cache: RouteCache = None):
         """
         Initialize Google Maps API Client.
+        Caches can be passed in to share them with another client (e.g. AsyncMapsAPI).
         """
         self.api_key = GOOGLE_MAPS_API_KEY
-        self.geocode_url = "https://maps.googleapis.com/maps/api/geocode/json"
-        self.routes_url = "https://routes.googleapis.com/directions/v2:computeRoutes"
+        self.geocode_url = GOOGLE_GEOCODE_URL
+        self.routes_url = GOOGLE_ROUTES_URL
+        self.route_matrix_url = GOOGLE_ROUTE_MATRIX_URL
+        self.http = maps_client  # Shared keep-alive session with timeouts and retries
+        self.geocode_cache = geocode_cache or GeocodeCache(
+            GEOCODE_CACHE_DB,
+            ttl_seconds=GEOCODE_CACHE_TTL_SECONDS,
+            max_rows=GEOCODE_CACHE_MAX_ROWS,
+            memory_size=GEOCODE_CACHE_MEMORY_SIZE
+        )
+        self.route_cache = route_cache or RouteCache(
+            max_size=ROUTE_CACHE_MAX_SIZE,
+            ttl_seconds=ROUTE_CACHE_TTL_SECONDS,
+            bucket_minutes=ROUTE_CACHE_BUCKET_MINUTES
+        )
+        self.flights = SingleFlight()  # Coalesces identical in-flight upstream calls
+
+    # ---- Request building & response parsing (shared by the sync and async clients) ----
+
+    def _geocode_params(self, address: str) -> dict:
+        return {
+            "address": address,
+            "key": self.api_key
+        }
+
+    @staticmethod
+    def _parse_geocode(response_data: dict):
+        """
+        Extracts {"lat", "lng"} from a Geocoding API response, or None if nothing was found.
+        """
+        if response_data.get("status") == "OK":
+            location = response_data["results"][0]["geometry"]["location"]
+            return {"lat": location["lat"], "lng": location["lng"]}
+        return None  # No coordinates found
+
+    def _routes_headers(self, field_mask: str = "routes.distanceMeters,routes.duration") -> dict:
+        return {
+            "Content-Type": "application/json",
+            "X-Goog-Api-Key": self.api_key,
+            "X-Goog-FieldMask": field_mask  # Required FieldMask
+        }
+
+    @staticmethod
+    def _routes_payload(origin_coords: dict, destination_coords: dict, google_mode: str, alternatives: bool = False) -> dict:
+        payload = {
+            "origin": {"location": {"latLng": {"latitude": origin_coords["lat"], "longitude": origin_coords["lng"]}}},
+            "destination": {"location": {"latLng": {"latitude": destination_coords["lat"], "longitude": destination_coords["lng"]}}},
+            "travelMode": google_mode
+        }
+        if google_mode in ("DRIVE", "TWO_WHEELER"):
+            payload["routingPreference"] = "TRAFFIC_AWARE_OPTIMAL"  # Only valid for motorized modes
+        if alternatives:
+            payload["computeAlternativeRoutes"] = True  # Request alternative eco-friendly routes
+        return payload
+
+    @classmethod
+    def _eco_routes_payload(cls, origin_coords: dict, destination_coords: dict) -> dict:
+        """
+        Driving routes with alternatives, plus per-route fuel consumption estimates.
+        """
+        payload = cls._routes_payload(origin_coords, destination_coords, "DRIVE", alternatives=True)
+        payload["extraComputations"] = ["FUEL_CONSUMPTION"]
+        payload["routeModifiers"] = {"vehicleInfo": {"emissionType": "GASOLINE"}}
+        return payload
+
+    @staticmethod
+    def _parse_duration_minutes(duration) -> float:
+        # Convert duration from string to integer (handle cases where 's' is missing)
+        duration = str(duration)
+        duration_seconds = int(duration.replace("s", "")) if "s" in duration else int(duration)
+        return duration_seconds / 60  # Convert seconds to minutes
+
+    def _parse_route_details(self, response_data: dict):
+        """
+        Returns (distance_miles, duration_minutes) of the first route, or (None, None).
+        """
+        if "routes" not in response_data or not response_data["routes"]:
+            print("[ERROR] No routes found in API response.")
+            return None, None
 
-    def get_coordinates_from_address(self, address: str):
+        # Extract the first route
+        route = response_data["routes"][0]
+        distance_miles = route["distanceMeters"] / 1609.34  # Convert meters to miles
+        return distance_miles, self._parse_duration_minutes(route["duration"])
+
+    def _parse_eco_routes(self, response_data: dict):
+        """
+        Returns every route alternative from a Routes API response, or None.
+        Each route has distance, duration, a summary, route labels, the encoded polyline
+        and the fuel consumption estimate (liters) when the API provides them.
+        """
+        # Check if 'routes' exist and are non-empty
+        if "routes" not in response_data or not response_data["routes"]:
+            print("Error: No routes found in API response.")
+            return None
+
+        routes = []
+        for index, route in enumerate(response_data["routes"]):
+            # Skip alternatives missing 'distanceMeters' or 'duration'
+            if "distanceMeters" not in route or "duration" not in route:
+                print(f"Error: Missing distance or duration for route {index} in API response.")
+                continue
+
+            fuel_microliters = route.get("travelAdvisory", {}).get("fuelConsumptionMicroliters")
+            routes.append({
+                "distance_miles": round(route["distanceMeters"] / 1609.34, 2),  # Convert meters to miles
+                "duration_minutes": round(self._parse_duration_minutes(route["duration"]), 2),
+                "summary": route.get("description") or ("Optimal Route" if index == 0 else f"Alternative Route {index}"),
+                "route_labels": route.get("routeLabels", []),
+                "polyline": route.get("polyline", {}).get("encodedPolyline"),
+                "fuel_consumption_liters": int(fuel_microliters) / 1e6 if fuel_microliters is not None else None
+            })
+
+        return routes or None
+
+    # ---- Public API ----
+
+    def get_coordinates_from_address(self, address: str, deadline: Deadline = None):
         """
         Converts an address into latitude and longitude using the Geocoding API.
-        
+        Results are served from the geocode cache when available.
+
         :param address: The address to be geocoded
+        :param deadline: Optional request latency budget that caps the call's timeout
         :return: Dictionary with latitude and longitude
         """
-        try:
-            params = {
-                "address": address,
-                "key": self.api_key
-            }
+        cached = self.geocode_cache.get(address)
+        if cached is not None:
+            return cached
 
-            response = requests.get(self.geocode_url, params=params)
-            response_data = response.json()
+        #  Concurrent lookups of the same address share one upstream call
+        return self.flights.do(("geocode", normalize_address_key(address)), self._fetch_coordinates, address, deadline)
 
-            if response_data["status"] == "OK":
-                location = response_data["results"][0]["geometry"]["location"]
-                return {"lat": location["lat"], "lng": location["lng"]}
-            else:
-                return None  # No coordinates found
+    def _fetch_coordinates(self, address: str, deadline: Deadline = None):
+        """
+        Calls the Geocoding API (no caching).
+        """
+        try:
+            response = self.http.get(self.geocode_url, params=self._geocode_params(address), deadline=deadline)
+            coords = self._parse_geocode(response.json())
+            if coords:
+                self.geocode_cache.set(address, coords)
+            return coords
 
         except Exception as e:
             print(f"Error geocoding address: {e}")
             return None
 
-    def get_route_details(self, origin: str, destination: str, mode="driving"):
+    def get_route_details(self, origin: str, destination: str, mode="driving", deadline: Deadline = None):
         """
         Fetches route details (distance, duration) using Google Maps Routes API.
+        Results are cached per origin/destination, mode and time-of-day bucket.
+        An optional `deadline` bounds the geocoding and routing calls.
+        """
+        google_mode = GOOGLE_TRAVEL_MODES.get(mode.lower(), "DRIVE")  # Default to DRIVE if invalid mode
+
+        cached = self.route_cache.get("details", origin, destination, google_mode)
+        if cached is not None:
+            return cached
+
+        flight_key = self.route_cache.make_key("details", origin, destination, google_mode)
+        result = self.flights.do(flight_key, self._fetch_route_details, origin, destination, google_mode, deadline)
+        if result[0] is not None:
+            self.route_cache.set("details", origin, destination, google_mode, result)
+        return result
+
+    def _fetch_route_details(self, origin: str, destination: str, google_mode: str, deadline: Deadline = None):
+        """
+        Calls the Routes API for a single route (no caching).
         """
         try:
             # Convert origin and destination to coordinates
-            origin_coords = self.get_coordinates_from_address(origin)
-            destination_coords = self.get_coordinates_from_address(destination)
+            origin_coords = self.get_coordinates_from_address(origin, deadline)
+            destination_coords = self.get_coordinates_from_address(destination, deadline)
 
             if not origin_coords or not destination_coords:
                 print("[ERROR] Could not convert addresses to coordinates.")
-                return None, None  
-
-            # Fix: Convert FastAPI mode names to Google Maps API format
-            mode_mapping = {
-                "driving": "DRIVE",
-                "bicycling": "BICYCLE",
-                "walking": "WALK",
-                "transit": "TRANSIT"
-            }
-            google_mode = mode_mapping.get(mode.lower(), "DRIVE")  # Default to DRIVE if invalid mode
-
-            headers = {
-                "Content-Type": "application/json",
-                "X-Goog-Api-Key": self.api_key,
-                "X-Goog-FieldMask": "routes.distanceMeters,routes.duration"
-            }
-
-            payload = {
-                "origin": {"location": {"latLng": {"latitude": origin_coords["lat"], "longitude": origin_coords["lng"]}}},
-                "destination": {"location": {"latLng": {"latitude": destination_coords["lat"], "longitude": destination_coords["lng"]}}},
-                "travelMode": google_mode,  # ✅ FIX: Use mapped mode
-                "routingPreference": "TRAFFIC_AWARE_OPTIMAL"
-            }
+                return None, None
 
+            payload = self._routes_payload(origin_coords, destination_coords, google_mode)
             print("[INFO] Route Details Request Payload:", payload)
 
-            response = requests.post(self.routes_url, json=payload, headers=headers)
+            response = self.http.post(self.routes_url, json=payload, headers=self._routes_headers(), deadline=deadline)
             response_data = response.json()
             print("[INFO] Route Details API Response:", response_data)
 
-            if "routes" not in response_data or not response_data["routes"]:
-                print("[ERROR] No routes found in API response.")
-                return None, None
-
-            # Extract the first route
-            route = response_data["routes"][0]
-            distance_miles = route["distanceMeters"] / 1609.34  # Convert meters to miles
-            duration_seconds = int(route["duration"].replace("s", "")) if "s" in route["duration"] else int(route["duration"])
-            duration_minutes = duration_seconds / 60  # Convert seconds to minutes
-
-            return distance_miles, duration_minutes
+            return self._parse_route_details(response_data)
 
         except Exception as e:
             print(f"[ERROR] Exception in get_route_details: {e}")
             return None, None
 
 
+    def get_eco_friendly_routes(self, origin: str, destination: str, deadline: Deadline = None):
+        """
+        Fetches eco-friendly driving routes. Results are cached like `get_route_details`.
+        """
+        cached = self.route_cache.get("eco", origin, destination, "DRIVE")
+        if cached is not None:
+            return cached
+
+        flight_key = self.route_cache.make_key("eco", origin, destination, "DRIVE")
+        routes = self.flights.do(flight_key, self._fetch_eco_friendly_routes, origin, destination, deadline)
+        if routes:
+            self.route_cache.set("eco", origin, destination, "DRIVE", routes)
+        return routes
 
+    def invalidate_routes(self, origin: str = None, destination: str = None, mode: str = None) -> int:
+        """
+        Drops cached routes matching the given origin, destination and/or mode
+        (FastAPI or Google mode name). Returns the number of entries removed.
+        """
+        if mode:
+            mode = GOOGLE_TRAVEL_MODES.get(mode.lower(), mode)
+        return self.route_cache.invalidate(origin, destination, mode)
 
-    def get_eco_friendly_routes(self, origin: str, destination: str):
+    def _fetch_eco_friendly_routes(self, origin: str, destination: str, deadline: Deadline = None):
+        """
+        Calls the Routes API for driving routes with alternatives (no caching).
+        """
         try:
             # Convert origin and destination to coordinates
-            origin_coords = self.get_coordinates_from_address(origin)
-            destination_coords = self.get_coordinates_from_address(destination)
+            origin_coords = self.get_coordinates_from_address(origin, deadline)
+            destination_coords = self.get_coordinates_from_address(destination, deadline)
 
             if not origin_coords or not destination_coords:
                 print("Error: Could not get coordinates for origin or destination.")
                 return None  # Coordinates not found
 
-            headers = {
-                "Content-Type": "application/json",
-                "X-Goog-Api-Key": self.api_key,
-                "X-Goog-FieldMask": "routes.distanceMeters,routes.duration"  # Required FieldMask
-            }
-
-            payload = {
-                "origin": {"location": {"latLng": {"latitude": origin_coords["lat"], "longitude": origin_coords["lng"]}}},
-                "destination": {"location": {"latLng": {"latitude": destination_coords["lat"], "longitude": destination_coords["lng"]}}},
-                "travelMode": "DRIVE",
-                "routingPreference": "TRAFFIC_AWARE_OPTIMAL",
-                "computeAlternativeRoutes": True  # Request alternative eco-friendly routes
-}
-
-
+            payload = self._eco_routes_payload(origin_coords, destination_coords)
             print("Eco Routes Request Payload (Fixed):", payload)
 
-            response = requests.post(self.routes_url, json=payload, headers=headers)
+            response = self.http.post(self.routes_url, json=payload, headers=self._routes_headers(ECO_ROUTES_FIELD_MASK), deadline=deadline)
             response_data = response.json()
             print("Eco Routes API Response:", response_data)  # Debugging line
 
-            # Check if 'routes' exist and are non-empty
-            if "routes" not in response_data or not response_data["routes"]:
-                print("Error: No routes found in API response.")
-                return None
+            return self._parse_eco_routes(response_data)
 
-            # Extract the first valid route
-            route = response_data["routes"][0]
+        except Exception as e:
+            print(f"Error fetching eco-friendly routes: {e}")
+            return None
 
-            # Ensure 'distanceMeters' and 'duration' exist
-            if "distanceMeters" not in route or "duration" not in route:
-                print("Error: Missing distance or duration in API response.")
-                return None
 
-            distance_miles = route["distanceMeters"] / 1609.34  # Convert meters to miles
+    def get_route_matrix(self, origins: list, destinations: list, mode="driving"):
+        """
+        Fetches distance and duration for every origin × destination pair.
+        - Addresses are deduplicated (after normalization) before geocoding.
+        - Pairs are sent to computeRouteMatrix in chunks that respect the API limits
+          (50 waypoints and 625 elements per request, 100 elements for TRANSIT).
+
+        Returns a list of rows (one per origin, in input order); each row holds one
+        dict per destination with distance_miles/duration_minutes (None if no route).
+        """
+        google_mode = GOOGLE_TRAVEL_MODES.get(mode.lower(), "DRIVE")
+
+        #  Geocode each distinct address once
+        unique_addresses = {}
+        for address in list(origins) + list(destinations):
+            unique_addresses.setdefault(normalize_address_key(address), address)
+        coords = {key: self.get_coordinates_from_address(address) for key, address in unique_addresses.items()}
+
+        origin_keys = [key for key in dict.fromkeys(normalize_address_key(a) for a in origins) if coords[key]]
+        destination_keys = [key for key in dict.fromkeys(normalize_address_key(a) for a in destinations) if coords[key]]
+
+        chunk_size = 10 if google_mode == "TRANSIT" else 25  # chunk_size² elements per request
+        results = {}
+        for o_start in range(0, len(origin_keys), chunk_size):
+            origin_chunk = origin_keys[o_start:o_start + chunk_size]
+            for d_start in range(0, len(destination_keys), chunk_size):
+                destination_chunk = destination_keys[d_start:d_start + chunk_size]
+                results.update(self._fetch_route_matrix_chunk(origin_chunk, destination_chunk, coords, google_mode))
+
+        matrix = []
+        for origin in origins:
+            origin_key = normalize_address_key(origin)
+            row = []
+            for destination in destinations:
+                destination_key = normalize_address_key(destination)
+                distance_miles, duration_minutes = results.get((origin_key, destination_key), (None, None))
+                cell = {
+                    "origin": origin,
+                    "destination": destination,
+                    "distance_miles": distance_miles,
+                    "duration_minutes": duration_minutes
+                }
+                if not coords[origin_key] or not coords[destination_key]:
+                    cell["error"] = "Could not convert address to coordinates."
+                elif distance_miles is None:
+                    cell["error"] = "No route found."
+                row.append(cell)
+            matrix.append(row)
+
+        return matrix
+
+    def _fetch_route_matrix_chunk(self, origin_keys: list, destination_keys: list, coords: dict, google_mode: str):
+        """
+        One computeRouteMatrix call. Returns {(origin_key, destination_key): (miles, minutes)}.
+        """
+        def waypoint(key):
+            return {"waypoint": {"location": {"latLng": {"latitude": coords[key]["lat"], "longitude": coords[key]["lng"]}}}}
+
+        payload = {
+            "origins": [waypoint(key) for key in origin_keys],
+            "destinations": [waypoint(key) for key in destination_keys],
+            "travelMode": google_mode
+        }
+        if google_mode in ("DRIVE", "TWO_WHEELER"):
+            payload["routingPreference"] = "TRAFFIC_AWARE"  # TRAFFIC_AWARE_OPTIMAL caps matrices at 100 elements
+
+        headers = {
+            "Content-Type": "application/json",
+            "X-Goog-Api-Key": self.api_key,
+            "X-Goog-FieldMask": "originIndex,destinationIndex,distanceMeters,duration,condition"
+        }
+
+        results = {}
+        try:
+            response = self.http.post(self.route_matrix_url, json=payload, headers=headers)
+            elements = response.json()
+            if not isinstance(elements, list):
+                print(f"[ERROR] Route matrix API error: {elements}")
+                return results
+
+            for element in elements:
+                if element.get("condition") != "ROUTE_EXISTS":
+                    continue
+                key = (origin_keys[element.get("originIndex", 0)], destination_keys[element.get("destinationIndex", 0)])
+                results[key] = (
+                    element.get("distanceMeters", 0) / 1609.34,  # Convert meters to miles
+                    self._parse_duration_minutes(element.get("duration", "0s"))
+                )
+
+        except Exception as e:
+            print(f"[ERROR] Exception in get_route_matrix: {e}")
+
+        return results
+
+
+class AsyncMapsAPI(MapsAPI):
+    def __init__(self, geocode_cache: GeocodeCache = None, route_cache: RouteCache = None):
+        """
+        asyncio variant of MapsAPI built on httpx.
+        Origin and destination are geocoded concurrently before the Routes API call,
+        so a request no longer holds a threadpool slot while waiting on Google.
+        Same method names as MapsAPI, but every lookup is a coroutine.
+        """
+        super().__init__(geocode_cache=geocode_cache, route_cache=route_cache)
+        self.http = create_async_client()
+        self.async_flights = AsyncSingleFlight()
+
+    async def aclose(self):
+        await self.http.aclose()
 
-            # Convert duration from string to integer (handle cases where 's' is missing)
-            duration_str = route["duration"]
-            duration_seconds = int(duration_str.replace("s", "")) if "s" in duration_str else int(duration_str)
-            duration_minutes = duration_seconds / 60  # Convert seconds to minutes
+    async def get_coordinates_from_address(self, address: str, deadline: Deadline = None):
+        """
+        Async version of MapsAPI.get_coordinates_from_address.
+        Only the in-memory cache tier is read on the event loop; the SQLite tier runs in a thread.
+        """
+        cached = self.geocode_cache.get_memory(address)
+        if cached is not None:
+            return cached
 
-            return [{
-                "distance_miles": round(distance_miles, 2),
-                "duration_minutes": round(duration_minutes, 2),
-                "summary": "Optimal Route"
-            }]
+        return await self.async_flights.do(("geocode", normalize_address_key(address)), self._fetch_coordinates, address, deadline)
+
+    async def _fetch_coordinates(self, address: str, deadline: Deadline = None):
+        try:
+            cached = await asyncio.to_thread(self.geocode_cache.get_persistent, address)
+            if cached is not None:
+                return cached
+
+            response = await self.http.get(self.geocode_url, params=self._geocode_params(address), deadline=deadline)
+            coords = self._parse_geocode(response.json())
+            if coords:
+                self.geocode_cache.set_memory(address, coords)
+                await asyncio.to_thread(self.geocode_cache.set_persistent, address, coords)
+            return coords
 
         except Exception as e:
-            print(f"Error fetching eco-friendly routes: {e}")
+            print(f"Error geocoding address: {e}")
             return None
 
+    async def _geocode_pair(self, origin: str, destination: str, deadline: Deadline = None):
+        """
+        Geocodes origin and destination concurrently.
+        """
+        return await asyncio.gather(
+            self.get_coordinates_from_address(origin, deadline),
+            self.get_coordinates_from_address(destination, deadline)
+        )
+
+    async def get_route_details(self, origin: str, destination: str, mode="driving", deadline: Deadline = None):
+        """
+        Async version of MapsAPI.get_route_details (shares the same route cache).
+        """
+        google_mode = GOOGLE_TRAVEL_MODES.get(mode.lower(), "DRIVE")  # Default to DRIVE if invalid mode
+
+        cached = self.route_cache.get("details", origin, destination, google_mode)
+        if cached is not None:
+            return cached
+
+        flight_key = self.route_cache.make_key("details", origin, destination, google_mode)
+        result = await self.async_flights.do(flight_key, self._fetch_route_details, origin, destination, google_mode, deadline)
+        if result[0] is not None:
+            self.route_cache.set("details", origin, destination, google_mode, result)
+        return result
+
+    async def _fetch_route_details(self, origin: str, destination: str, google_mode: str, deadline: Deadline = None):
+        try:
+            origin_coords, destination_coords = await self._geocode_pair(origin, destination, deadline)
+
+            if not origin_coords or not destination_coords:
+                print("[ERROR] Could not convert addresses to coordinates.")
+                return None, None
+
+            return await self._fetch_route_from_coords(origin_coords, destination_coords, google_mode, deadline)
+
+        except Exception as e:
+            print(f"[ERROR] Exception in get_route_details: {e}")
+            return None, None
+
+    async def _fetch_route_from_coords(self, origin_coords: dict, destination_coords: dict, google_mode: str, deadline: Deadline = None):
+        """
+        One computeRoutes call for already geocoded endpoints. Returns (miles, minutes) or (None, None).
+        """
+        payload = self._routes_payload(origin_coords, destination_coords, google_mode)
+        response = await self.http.post(self.routes_url, json=payload, headers=self._routes_headers(), deadline=deadline)
+        return self._parse_route_details(response.json())
+
+    async def get_routes_for_modes(self, origin: str, destination: str, google_modes=("DRIVE", "TRANSIT", "BICYCLE", "WALK"), deadline: Deadline = None):
+        """
+        Looks up one route per travel mode for the same origin/destination.
+        The pair is geocoded once and uncached modes are fetched concurrently,
+        so the call takes about as long as the slowest single route lookup.
+
+        Returns {google_mode: (distance_miles, duration_minutes)}; (None, None) if unavailable.
+        """
+        results = {}
+        missing = []
+        for google_mode in google_modes:
+            cached = self.route_cache.get("details", origin, destination, google_mode)
+            if cached is not None:
+                results[google_mode] = cached
+            else:
+                missing.append(google_mode)
+
+        if not missing:
+            return results
+
+        origin_coords, destination_coords = await self._geocode_pair(origin, destination, deadline)
+        if not origin_coords or not destination_coords:
+            print("[ERROR] Could not convert addresses to coordinates.")
+            return {**results, **{google_mode: (None, None) for google_mode in missing}}
+
+        fetched = await asyncio.gather(
+            *(
+                self.async_flights.do(
+                    self.route_cache.make_key("details", origin, destination, google_mode),
+                    self._fetch_route_from_coords, origin_coords, destination_coords, google_mode, deadline
+                )
+                for google_mode in missing
+            ),
+            return_exceptions=True
+        )
+        for google_mode, result in zip(missing, fetched):
+            if isinstance(result, Exception):
+                print(f"[ERROR] {google_mode} route lookup failed: {result}")
+                result = (None, None)
+            elif result[0] is not None:
+                self.route_cache.set("details", origin, destination, google_mode, result)
+            results[google_mode] = result
+
+        return results
+
+    async def get_eco_friendly_routes(self, origin: str, destination: str, deadline: Deadline = None):
+        """
+        Async version of MapsAPI.get_eco_friendly_routes (shares the same route cache).
+        """
+        cached = self.route_cache.get("eco", origin, destination, "DRIVE")
+        if cached is not None:
+            return cached
+
+        flight_key = self.route_cache.make_key("eco", origin, destination, "DRIVE")
+        routes = await self.async_flights.do(flight_key, self._fetch_eco_friendly_routes, origin, destination, deadline)
+        if routes:
+            self.route_cache.set("eco", origin, destination, "DRIVE", routes)
+        return routes
+
+    async def _fetch_eco_friendly_routes(self, origin: str, destination: str, deadline: Deadline = None):
+        try:
+            origin_coords, destination_coords = await self._geocode_pair(origin, destination, deadline)
+
+            if not origin_coords or not destination_coords:
+                print("Error: Could not get coordinates for origin or destination.")
+                return None  # Coordinates not found
+
+            payload = self._eco_routes_payload(origin_coords, destination_coords)
+            response = await self.http.post(self.routes_url, json=payload, headers=self._routes_headers(ECO_ROUTES_FIELD_MASK), deadline=deadline)
+            return self._parse_eco_routes(response.json())
+
+        except Exception as e:
+            print(f"Error fetching eco-friendly routes: {e}")
+            return None
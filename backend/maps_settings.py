@@ -0,0 +1,19 @@
+import os
+from pathlib import Path
+from dotenv import load_dotenv
+
+#  Maps settings that do not need the database. backend.dependencies connects to the
+#  database on import; the offline estimator and backend.fake_maps_server must run without it.
+load_dotenv(dotenv_path=Path(__file__).resolve().parent / ".env")
+
+# Offline distance estimates (local gazetteer + haversine)
+GAZETTEER_PATH = os.getenv("GAZETTEER_PATH", str(Path(__file__).resolve().parent / "data" / "gazetteer.csv"))
+OFFLINE_DETOUR_FACTOR = float(os.getenv("OFFLINE_DETOUR_FACTOR", 1.3))  # Road distance / straight-line distance
+
+#  FastAPI mode names -> Google Maps API travel modes
+GOOGLE_TRAVEL_MODES = {
+    "driving": "DRIVE",
+    "bicycling": "BICYCLE",
+    "walking": "WALK",
+    "transit": "TRANSIT"
+}
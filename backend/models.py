@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from backend.dependencies import Base  # Ensure this is the correct Base
@@ -24,17 +24,32 @@ class User(Base):
 
 class ChatbotResponse(Base):
     __tablename__ = "chatbot_responses"
+    __table_args__ = (
+        Index("ix_chatbot_responses_user_id_created_at", "user_id", "created_at"),  # Recent turns lookup
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)  # Nullable for guest users
+    conversation_id = Column(String(32), ForeignKey("conversations.id"), nullable=True, index=True)
     user_query = Column(String, nullable=False)  # Store user input
     bot_response = Column(String, nullable=False)  # Store chatbot response
-    created_at = Column(DateTime, default=datetime.now(UTC))  # Timestamp
+    created_at = Column(DateTime, default=lambda: datetime.now(UTC))  # Timestamp
 
     # Relationship to User model (Optional for tracking responses)
     user = relationship("User", back_populates="chatbot_responses")
 
 
+class Conversation(Base):
+    __tablename__ = "conversations"
+
+    id = Column(String(32), primary_key=True, index=True)  # uuid4 hex, generated by the API before the row is written
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    summary = Column(String, nullable=False, default="")  # Rolling summary of turns older than the context window
+    summarized_until_id = Column(Integer, nullable=False, default=0)  # Last chatbot_responses.id folded into summary
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(UTC))
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(UTC))
+
+
 class PredictedEmissions(Base):
     __tablename__ = "predicted_emissions"
 
@@ -64,6 +79,21 @@ class EmissionHistory(Base):
 
 
 
+class UserFeatures(Base):
+    __tablename__ = "user_features"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    trip_count = Column(Integer, nullable=False, default=0)
+    total_emissions = Column(Float, nullable=False, default=0.0)
+    total_miles = Column(Float, nullable=False, default=0.0)
+    car_trips = Column(Integer, nullable=False, default=0)  # Trip counts per mode group (see backend.user_features)
+    transit_trips = Column(Integer, nullable=False, default=0)
+    active_trips = Column(Integer, nullable=False, default=0)
+    air_trips = Column(Integer, nullable=False, default=0)
+    other_trips = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(UTC))
+
+
 class RouteEmissions(Base):
     __tablename__ = "route_emissions"
 
@@ -75,12 +105,24 @@ class RouteEmissions(Base):
     fuel_type = Column(String, nullable=False)  # Fuel type (gasoline, electric, etc.)
     distance_miles = Column(Float, nullable=False)  # Miles traveled
     co2_emissions = Column(Float, nullable=False)  # CO₂ emissions per trip
+    origin_place_id = Column(Integer, ForeignKey("places.id"), nullable=True, index=True)  # Canonical origin
+    destination_place_id = Column(Integer, ForeignKey("places.id"), nullable=True, index=True)  # Canonical destination
     created_at = Column(DateTime, default=datetime.now(UTC))
 
     # Relationship to User model
     user = relationship("User", back_populates="route_emissions")
 
 
+class Place(Base):
+    __tablename__ = "places"
+
+    id = Column(Integer, primary_key=True, index=True)
+    canonical_address = Column(String, unique=True, nullable=False, index=True)  # See backend.address
+    lat = Column(Float, nullable=True)  # Coordinates once geocoded; seed the geocode cache at startup
+    lng = Column(Float, nullable=True)
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(UTC))
+
+
 class EcoFriendlyRoute(Base):
     __tablename__ = "eco_friendly_routes"
 
@@ -0,0 +1,154 @@
+import csv
+import math
+import sqlite3
+import numpy as np
+from backend.maps_settings import GAZETTEER_PATH, OFFLINE_DETOUR_FACTOR, GOOGLE_TRAVEL_MODES
+from backend.geocode_cache import normalize_address_key
+
+EARTH_RADIUS_MILES = 3958.8
+
+#  Average door-to-door speeds used to estimate durations (mph)
+OFFLINE_SPEEDS_MPH = {
+    "DRIVE": 30,
+    "TRANSIT": 18,
+    "BICYCLE": 10,
+    "WALK": 3
+}
+
+
+def haversine_miles(lat1, lng1, lat2, lng2):
+    """
+    Great-circle distance in miles. Accepts scalars or NumPy arrays.
+    """
+    lat1, lng1, lat2, lng2 = map(np.radians, (lat1, lng1, lat2, lng2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(a))
+
+
+def load_gazetteer(path: str) -> dict:
+    """
+    Loads place -> {"lat", "lng"} from a CSV (name,lat,lng) or SQLite file (table `places`).
+    Names are keyed like the geocode cache; "City, ST" entries are also reachable as "City".
+    """
+    if path.endswith((".db", ".sqlite", ".sqlite3")):
+        conn = sqlite3.connect(path)
+        try:
+            rows = conn.execute("SELECT name, lat, lng FROM places").fetchall()
+        finally:
+            conn.close()
+    else:
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = [(row["name"], row["lat"], row["lng"]) for row in csv.DictReader(f)]
+
+    places = {}
+    short_names = {}
+    for name, lat, lng in rows:
+        coords = {"lat": float(lat), "lng": float(lng)}
+        places[normalize_address_key(name)] = coords
+        short_names.setdefault(normalize_address_key(name.split(",")[0]), coords)
+
+    for short_name, coords in short_names.items():
+        places.setdefault(short_name, coords)
+
+    return places
+
+
+class OfflineMapsAPI:
+    def __init__(self, gazetteer_path: str = GAZETTEER_PATH, detour_factor: float = OFFLINE_DETOUR_FACTOR):
+        """
+        Offline stand-in for MapsAPI (same method names and return shapes).
+        Coordinates come from a local gazetteer and distances are haversine distances
+        scaled by `detour_factor` to approximate road distance. No network calls.
+        """
+        self.detour_factor = detour_factor
+        try:
+            self.places = load_gazetteer(gazetteer_path)
+        except (OSError, sqlite3.Error, KeyError, ValueError) as e:
+            print(f"[WARNING] Could not load gazetteer {gazetteer_path}: {e}")
+            self.places = {}
+
+    def get_coordinates_from_address(self, address: str):
+        """
+        Looks an address up in the gazetteer. Also accepts literal "lat,lng" strings.
+        """
+        coords = self.places.get(normalize_address_key(address))
+        if coords:
+            return coords
+
+        parts = address.split(",")
+        if len(parts) == 2:
+            try:
+                return {"lat": float(parts[0]), "lng": float(parts[1])}
+            except ValueError:
+                pass
+        return None
+
+    def _estimate(self, origin_coords: dict, destination_coords: dict, google_mode: str):
+        distance_miles = float(haversine_miles(
+            origin_coords["lat"], origin_coords["lng"], destination_coords["lat"], destination_coords["lng"]
+        )) * self.detour_factor
+        duration_minutes = distance_miles / OFFLINE_SPEEDS_MPH.get(google_mode, OFFLINE_SPEEDS_MPH["DRIVE"]) * 60
+        return distance_miles, duration_minutes
+
+    def get_route_details(self, origin: str, destination: str, mode="driving"):
+        """
+        Estimates (distance_miles, duration_minutes), or (None, None) for unknown places.
+        """
+        origin_coords = self.get_coordinates_from_address(origin)
+        destination_coords = self.get_coordinates_from_address(destination)
+        if not origin_coords or not destination_coords:
+            return None, None
+
+        return self._estimate(origin_coords, destination_coords, GOOGLE_TRAVEL_MODES.get(mode.lower(), "DRIVE"))
+
+    def get_eco_friendly_routes(self, origin: str, destination: str):
+        """
+        Single estimated driving route in the same shape as MapsAPI.get_eco_friendly_routes.
+        """
+        distance_miles, duration_minutes = self.get_route_details(origin, destination, "driving")
+        if distance_miles is None:
+            return None
+
+        return [{
+            "distance_miles": round(distance_miles, 2),
+            "duration_minutes": round(duration_minutes, 2),
+            "summary": "Estimated Route (offline)",
+            "route_labels": [],
+            "polyline": None,
+            "fuel_consumption_liters": None
+        }]
+
+    def get_route_matrix(self, origins: list, destinations: list, mode="driving"):
+        """
+        Same output as MapsAPI.get_route_matrix, computed with one vectorized haversine pass.
+        """
+        google_mode = GOOGLE_TRAVEL_MODES.get(mode.lower(), "DRIVE")
+        origin_coords = [self.get_coordinates_from_address(address) for address in origins]
+        destination_coords = [self.get_coordinates_from_address(address) for address in destinations]
+
+        def as_array(coords_list):
+            return np.array([[c["lat"], c["lng"]] if c else [np.nan, np.nan] for c in coords_list], dtype=np.float64)
+
+        o = as_array(origin_coords)
+        d = as_array(destination_coords)
+        distances = haversine_miles(o[:, None, 0], o[:, None, 1], d[None, :, 0], d[None, :, 1]) * self.detour_factor
+        durations = distances / OFFLINE_SPEEDS_MPH.get(google_mode, OFFLINE_SPEEDS_MPH["DRIVE"]) * 60
+
+        matrix = []
+        for i, origin in enumerate(origins):
+            row = []
+            for j, destination in enumerate(destinations):
+                if math.isnan(distances[i, j]):
+                    row.append({
+                        "origin": origin, "destination": destination,
+                        "distance_miles": None, "duration_minutes": None,
+                        "error": "Could not convert address to coordinates."
+                    })
+                else:
+                    row.append({
+                        "origin": origin, "destination": destination,
+                        "distance_miles": float(distances[i, j]), "duration_minutes": float(durations[i, j])
+                    })
+            matrix.append(row)
+
+        return matrix
@@ -0,0 +1,98 @@
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from backend.address import canonicalize_address
+from backend.cache import LRUCache
+from backend.models import Place
+
+
+class PlaceIndex:
+    def __init__(self, max_size: int = 8192):
+        """
+        Maps free-text addresses to canonical place IDs in the `places` table.
+        Canonical address -> (place_id, has_coordinates) is memoized in-process, so
+        repeat lookups of a known place do not touch the database. Places created or
+        updated in a transaction are only memoized once it commits.
+        """
+        self.ids = LRUCache(max_size=max_size)
+
+    def lookup(self, db: Session, address: str):
+        """
+        Returns the place ID for an address, or None if it has never been indexed.
+        """
+        canonical = canonicalize_address(address)
+        cached = self.ids.get(canonical)
+        if cached is not None:
+            return cached[0]
+
+        place = db.query(Place).filter(Place.canonical_address == canonical).first()
+        if place is None:
+            return None
+
+        self.ids.set(canonical, (place.id, place.lat is not None))
+        return place.id
+
+    def resolve(self, db: Session, address: str, coords: dict = None) -> int:
+        """
+        Returns the place ID for an address, creating the place if needed.
+        Coordinates are stored the first time they are known. Changes are flushed,
+        not committed, so they land in the caller's transaction.
+        """
+        canonical = canonicalize_address(address)
+        cached = self.ids.get(canonical)
+        if cached is not None and (cached[1] or not coords):
+            return cached[0]
+
+        place = db.query(Place).filter(Place.canonical_address == canonical).first()
+        if place is None:
+            place = Place(canonical_address=canonical)
+            if coords:
+                place.lat, place.lng = coords["lat"], coords["lng"]
+            try:
+                with db.begin_nested():  #  Another worker may insert the same place concurrently
+                    db.add(place)
+            except IntegrityError:
+                place = db.query(Place).filter(Place.canonical_address == canonical).one()
+
+        if coords and place.lat is None:
+            place.lat, place.lng = coords["lat"], coords["lng"]
+            db.flush()
+
+        self._memoize_after_commit(db, canonical, (place.id, place.lat is not None))
+        return place.id
+
+    def _memoize_after_commit(self, db: Session, canonical: str, entry: tuple):
+        """
+        Memoizes `entry` once the session commits; a rollback discards it, so the
+        cache never holds the ID of a row that was never written.
+        """
+        if not db.info.get("place_index_listening"):
+            db.info["place_index_listening"] = True
+
+            def committed(session):
+                for key, value in session.info.pop("place_index_pending", {}).items():
+                    self.ids.set(key, value)
+
+            def rolled_back(session):
+                session.info.pop("place_index_pending", None)
+
+            event.listen(db, "after_commit", committed)
+            event.listen(db, "after_rollback", rolled_back)
+        db.info.setdefault("place_index_pending", {})[canonical] = entry
+
+    def warm_geocode_cache(self, db: Session, geocode_cache, limit: int = 2048) -> int:
+        """
+        Seeds the geocode cache's in-process tier with the coordinates of the most
+        recently created places, so a fresh worker (or host) resolves known places
+        without a Geocoding call. Returns the number of places loaded.
+        """
+        rows = db.query(Place.canonical_address, Place.lat, Place.lng).filter(
+            Place.lat.isnot(None), Place.lng.isnot(None)
+        ).order_by(Place.id.desc()).limit(limit).all()
+
+        for canonical, lat, lng in rows:
+            geocode_cache.set_memory(canonical, {"lat": lat, "lng": lng})
+        return len(rows)
+
+    def stats(self) -> dict:
+        return self.ids.stats()
@@ -0,0 +1,245 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from backend.deadline import Deadline, DeadlineExceeded
+
+
+class UpstreamRejected(Exception):
+    """
+    Raised when a call is not sent because of the concurrency cap, the rate limit
+    or an open circuit breaker. `reason` is "concurrency", "rate" or "circuit_open".
+    """
+
+    def __init__(self, reason: str):
+        super().__init__(f"Upstream call rejected: {reason}")
+        self.reason = reason
+
+
+class TokenBucket:
+    def __init__(self, rate_per_second: float, capacity: float):
+        """
+        Token-bucket rate limiter: `rate_per_second` sustained, bursts up to `capacity`.
+        """
+        self.rate = rate_per_second
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, timeout: float = 0) -> bool:
+        """
+        Takes one token, waiting up to `timeout` seconds for it. Returns False if none came.
+        """
+        give_up_at = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if now + wait > give_up_at:
+                return False
+            time.sleep(wait)
+
+    def available(self) -> float:
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._tokens
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_rate: float = 0.5, min_calls: int = 10, window: int = 20, cooldown_seconds: float = 30):
+        """
+        Opens when at least `failure_rate` of the last `window` calls failed (once
+        `min_calls` have been seen). While open, calls are rejected; after
+        `cooldown_seconds` one trial call is let through (half-open) and its outcome
+        closes or re-opens the circuit.
+        """
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.cooldown_seconds = cooldown_seconds
+        self._outcomes = deque(maxlen=window)
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.cooldown_seconds:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """
+        Whether a call may be made now. In half-open state only one trial call is allowed.
+        """
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN and time.monotonic() - self._opened_at < self.cooldown_seconds:
+                return False
+            if self._trial_in_flight:
+                return False
+            self._state = self.HALF_OPEN
+            self._trial_in_flight = True
+            return True
+
+    def record(self, success):
+        """
+        Records a call outcome. None means the call ended without an outcome (e.g. it was
+        abandoned by the client) and only releases a half-open trial.
+        """
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._trial_in_flight = False
+                if success is None:
+                    return
+                if success:
+                    self._state = self.CLOSED
+                    self._outcomes.clear()
+                else:
+                    self._open()
+                return
+
+            if success is None:
+                return
+            self._outcomes.append(success)
+            if self._state == self.CLOSED and len(self._outcomes) >= self.min_calls:
+                failures = self._outcomes.count(False)
+                if failures / len(self._outcomes) >= self.failure_rate:
+                    self._open()
+
+    def _open(self):
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        self.times_opened += 1
+
+
+class UpstreamGuard:
+    def __init__(
+        self,
+        max_concurrency: int,
+        queue_timeout: float,
+        rate_limiter: TokenBucket,
+        breaker: CircuitBreaker
+    ):
+        """
+        Protects the API from a slow or failing upstream:
+        - at most `max_concurrency` calls in flight; others wait up to `queue_timeout`,
+        - calls are paced by `rate_limiter`,
+        - `breaker` fails calls fast while the upstream is erroring.
+        Rejected calls raise UpstreamRejected instead of tying up a worker thread.
+        """
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self.rate_limiter = rate_limiter
+        self.breaker = breaker
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+
+        self.waiting = 0
+        self.in_flight = 0
+        self.successes = 0
+        self.failures = 0
+        self.budget_exhausted = 0
+        self.cancelled = 0
+        self.rejected = {"concurrency": 0, "rate": 0, "circuit_open": 0}
+
+    def _reject(self, reason: str):
+        with self._lock:
+            self.rejected[reason] += 1
+        raise UpstreamRejected(reason)
+
+    @contextmanager
+    def slot(self, deadline: Deadline = None):
+        """
+        Holds a concurrency slot for the duration of the block. Exceptions raised in the
+        block count as failures for the circuit breaker, except DeadlineExceeded: a
+        request that ran out of budget says nothing about the upstream's health. Nor does
+        one abandoned by its caller (a closed stream or a cancelled task), which is
+        counted as cancelled.
+        """
+        if deadline is not None and deadline.expired():
+            raise DeadlineExceeded(f"Latency budget of {deadline.budget_seconds}s exhausted before the upstream call")
+        if not self.breaker.allow():
+            self._reject("circuit_open")
+
+        timeout = self.queue_timeout if deadline is None else min(self.queue_timeout, deadline.remaining())
+        started = time.monotonic()
+        with self._lock:
+            self.waiting += 1
+        try:
+            acquired = self._slots.acquire(timeout=timeout)
+        finally:
+            with self._lock:
+                self.waiting -= 1
+        if not acquired:
+            self.breaker.record(None)
+            self._reject("concurrency")
+
+        if not self.rate_limiter.acquire(timeout=max(0.0, timeout - (time.monotonic() - started))):
+            self._slots.release()
+            self.breaker.record(None)
+            self._reject("rate")
+
+        with self._lock:
+            self.in_flight += 1
+        outcome = None
+        counter = None
+        try:
+            yield
+            outcome, counter = True, "successes"
+        except DeadlineExceeded:
+            counter = "budget_exhausted"  #  Outcome stays None
+            raise
+        except Exception:
+            outcome, counter = False, "failures"
+            raise
+        except (GeneratorExit, asyncio.CancelledError):
+            counter = "cancelled"
+            raise
+        finally:
+            self.breaker.record(outcome)
+            with self._lock:
+                self.in_flight -= 1
+                if counter == "successes":
+                    self.successes += 1
+                elif counter == "failures":
+                    self.failures += 1
+                elif counter == "budget_exhausted":
+                    self.budget_exhausted += 1
+                elif counter == "cancelled":
+                    self.cancelled += 1
+            self._slots.release()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "state": self.breaker.state,
+                "times_opened": self.breaker.times_opened,
+                "in_flight": self.in_flight,
+                "max_concurrency": self.max_concurrency,
+                "queue_depth": self.waiting,
+                "rate_tokens_available": round(self.rate_limiter.available(), 2),
+                "successes": self.successes,
+                "failures": self.failures,
+                "budget_exhausted": self.budget_exhausted,
+                "cancelled": self.cancelled,
+                "rejected": dict(self.rejected)
+            }
@@ -0,0 +1,55 @@
+from datetime import datetime
+from backend.cache import LRUCache
+from backend.geocode_cache import normalize_address_key
+
+
+class RouteCache:
+    def __init__(self, max_size: int = 4096, ttl_seconds: float = 900, bucket_minutes: int = 30):
+        """
+        Cache for Routes API results.
+        Keys combine the normalized origin/destination, the travel mode and a time-of-day
+        bucket, so traffic-aware results are only reused within the same part of the day.
+        - max_size: Entries kept before LRU eviction.
+        - ttl_seconds: Maximum age of a cached route.
+        - bucket_minutes: Width of the time-of-day bucket.
+        """
+        self.bucket_minutes = max(1, bucket_minutes)
+        self.entries = LRUCache(max_size=max_size, ttl_seconds=ttl_seconds)
+
+    def time_bucket(self, when: datetime = None) -> int:
+        """
+        Index of the time-of-day bucket for `when` (defaults to now, local time).
+        """
+        when = when or datetime.now()
+        return (when.hour * 60 + when.minute) // self.bucket_minutes
+
+    def make_key(self, kind: str, origin: str, destination: str, mode: str, when: datetime = None) -> tuple:
+        return (kind, normalize_address_key(origin), normalize_address_key(destination), mode.upper(), self.time_bucket(when))
+
+    def get(self, kind: str, origin: str, destination: str, mode: str):
+        return self.entries.get(self.make_key(kind, origin, destination, mode))
+
+    def set(self, kind: str, origin: str, destination: str, mode: str, value):
+        self.entries.set(self.make_key(kind, origin, destination, mode), value)
+
+    def invalidate(self, origin: str = None, destination: str = None, mode: str = None) -> int:
+        """
+        Drops cached routes matching every given filter (all routes if none are given).
+        Returns the number of entries removed.
+        """
+        origin = normalize_address_key(origin) if origin else None
+        destination = normalize_address_key(destination) if destination else None
+        mode = mode.upper() if mode else None
+
+        def matches(key):
+            _, key_origin, key_destination, key_mode, _ = key
+            return (
+                (origin is None or key_origin == origin)
+                and (destination is None or key_destination == destination)
+                and (mode is None or key_mode == mode)
+            )
+
+        return self.entries.delete_where(matches)
+
+    def stats(self) -> dict:
+        return {**self.entries.stats(), "bucket_minutes": self.bucket_minutes}
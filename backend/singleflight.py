@@ -0,0 +1,85 @@
+import asyncio
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self):
+        """
+        Coalesces concurrent identical calls made from threads (e.g. FastAPI's threadpool).
+        The first caller for a key runs the function; callers arriving while it is
+        in flight wait and receive the same result (or exception).
+        """
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.shared = 0
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self.executed += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"in_flight": len(self._calls), "executed": self.executed, "shared": self.shared}
+
+
+class AsyncSingleFlight:
+    def __init__(self):
+        """
+        asyncio version of SingleFlight. Concurrent awaits of the same key share one task.
+        Cancelling one waiter does not cancel the shared call for the others.
+        """
+        self._tasks = {}
+        self.executed = 0
+        self.shared = 0
+
+    async def do(self, key, coro_fn, *args, **kwargs):
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(coro_fn(*args, **kwargs))
+            self._tasks[key] = task
+            self.executed += 1
+
+            def forget(finished, key=key):
+                if self._tasks.get(key) is finished:
+                    del self._tasks[key]
+
+            task.add_done_callback(forget)
+        else:
+            self.shared += 1
+
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        return {"in_flight": len(self._tasks), "executed": self.executed, "shared": self.shared}
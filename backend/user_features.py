@@ -0,0 +1,103 @@
+from datetime import datetime, UTC
+from sqlalchemy import case, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from backend.models import EmissionHistory, UserFeatures
+
+#  Trip-log transport modes grouped for the per-user mode mix (matched case-insensitively)
+MODE_GROUPS = {
+    "car": (
+        "gasoline_car", "diesel_car", "hybrid_car", "electric_car", "motorcycle",
+        "rideshare_solo", "rideshare_shared", "driving", "electric", "car"
+    ),
+    "transit": (
+        "bus", "diesel_bus", "train", "subway", "high_speed_rail", "ferry", "public_transport", "transit"
+    ),
+    "active": ("bike", "bicycle", "walking", "walk", "electric_bike", "electric_scooter"),
+    "air": ("airplane", "long_haul_flight", "flight"),
+}
+MODE_GROUP_COLUMNS = {group: f"{group}_trips" for group in (*MODE_GROUPS, "other")}
+
+_MODE_TO_GROUP = {mode: group for group, modes in MODE_GROUPS.items() for mode in modes}
+
+
+def mode_group(transport_mode: str) -> str:
+    return _MODE_TO_GROUP.get((transport_mode or "").lower(), "other")
+
+
+def mode_group_case(mode_column):
+    """
+    SQL expression mapping a transport mode column to its mode group.
+    """
+    return case(
+        *[(func.lower(mode_column).in_(modes), group) for group, modes in MODE_GROUPS.items()],
+        else_="other"
+    )
+
+
+def empty_delta() -> dict:
+    return {"trip_count": 0, "total_emissions": 0.0, "total_miles": 0.0, **{column: 0 for column in MODE_GROUP_COLUMNS.values()}}
+
+
+def add_trip(delta: dict, transport_mode: str, miles: float, emission_value: float) -> dict:
+    """
+    Adds one trip to a feature delta (see empty_delta) and returns it.
+    """
+    delta["trip_count"] += 1
+    delta["total_emissions"] += emission_value or 0.0
+    delta["total_miles"] += miles or 0.0
+    delta[MODE_GROUP_COLUMNS[mode_group(transport_mode)]] += 1
+    return delta
+
+
+def apply_deltas(db: Session, deltas: dict):
+    """
+    Adds per-user deltas ({user_id: delta}) to user_features with one UPDATE per user,
+    inserting rows for users seen for the first time. Runs in the caller's transaction,
+    so features are committed together with the trips they describe.
+    """
+    now = datetime.now(UTC)
+    for user_id, delta in deltas.items():
+        values = {getattr(UserFeatures, column): getattr(UserFeatures, column) + amount for column, amount in delta.items()}
+        values[UserFeatures.updated_at] = now
+        updated = db.query(UserFeatures).filter(UserFeatures.user_id == user_id).update(values, synchronize_session=False)
+        if updated:
+            continue
+
+        try:
+            with db.begin_nested():  #  Another worker may create the row concurrently
+                db.add(UserFeatures(user_id=user_id, updated_at=now, **delta))
+        except IntegrityError:
+            db.query(UserFeatures).filter(UserFeatures.user_id == user_id).update(values, synchronize_session=False)
+
+
+def rebuild_user_features(db: Session) -> int:
+    """
+    Recomputes every user's features from emission_history with one GROUP BY query.
+    A full scan: meant for backfills and repair, never for the request path. Commits.
+    Returns the number of users written.
+    """
+    group = mode_group_case(EmissionHistory.transport_mode)
+    rows = db.query(
+        EmissionHistory.user_id,
+        func.count(EmissionHistory.id),
+        func.coalesce(func.sum(EmissionHistory.emission_value), 0.0),
+        func.coalesce(func.sum(EmissionHistory.miles), 0.0),
+        *[func.sum(case((group == name, 1), else_=0)) for name in MODE_GROUP_COLUMNS]
+    ).group_by(EmissionHistory.user_id).all()
+
+    now = datetime.now(UTC)
+    db.query(UserFeatures).delete(synchronize_session=False)
+    db.bulk_insert_mappings(UserFeatures, [
+        {
+            "user_id": user_id,
+            "trip_count": trip_count,
+            "total_emissions": float(total_emissions),
+            "total_miles": float(total_miles),
+            **{column: int(count or 0) for column, count in zip(MODE_GROUP_COLUMNS.values(), group_counts)},
+            "updated_at": now
+        }
+        for user_id, trip_count, total_emissions, total_miles, *group_counts in rows
+    ])
+    db.commit()
+    return len(rows)
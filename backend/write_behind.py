@@ -0,0 +1,169 @@
+import queue
+import threading
+import time
+import traceback
+
+
+class WriteBehindQueue:
+    def __init__(
+        self,
+        session_factory,
+        max_size: int = 10000,
+        batch_size: int = 200,
+        flush_interval: float = 1.0,
+        enqueue_timeout: float = 2.0
+    ):
+        """
+        Bounded in-process queue for writes the client does not wait on (audit/log rows).
+        A background thread applies queued writes in batches, one session and one commit
+        per batch, flushing when `batch_size` writes are queued or `flush_interval` seconds
+        after the first write of a batch.
+        - Back-pressure: when the queue is full, submit() blocks for up to `enqueue_timeout`
+          seconds, then writes inline on the caller's thread so nothing is dropped.
+        - close() drains everything still queued.
+        """
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self._queue = queue.Queue(maxsize=max_size)
+        self._stop = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._lock = threading.Lock()
+
+        self.submitted = 0
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+        self.blocked = 0
+        self.inline = 0
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+                self._thread.start()
+
+    def submit(self, write, on_done=None):
+        """
+        Queues `write(db)`, which should add rows to the session without committing.
+        `on_done()` runs after the write's batch has been committed (or has failed).
+        """
+        item = (write, on_done)
+        with self._lock:
+            self.submitted += 1
+
+        if self._stop.is_set():  #  Closed: nothing will drain the queue any more
+            with self._lock:
+                self.inline += 1
+            self._write_batch([item])
+            return
+
+        if self._thread is None:
+            self.start()
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            with self._lock:
+                self.blocked += 1
+            try:
+                self._queue.put(item, timeout=self.enqueue_timeout)
+            except queue.Full:
+                with self._lock:
+                    self.inline += 1
+                self._write_batch([item])
+                return
+
+        if self._stop.is_set():  #  close() ran between the check above and the put: it may have drained already
+            self._drain()
+
+    def _run(self):
+        while not (self._stop.is_set() and self._queue.empty()):
+            try:
+                batch = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+
+            flush_at = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    if self._stop.is_set():
+                        batch.append(self._queue.get_nowait())  #  Draining: do not wait for more
+                    else:
+                        batch.append(self._queue.get(timeout=max(0.0, flush_at - time.monotonic())))
+                except queue.Empty:
+                    break
+
+            self._write_batch(batch)
+
+    def _write_batch(self, batch: list):
+        """
+        Applies a batch in one transaction. If it fails, each write is retried on its own
+        so one bad row does not lose the rest.
+        """
+        db = self.session_factory()
+        try:
+            try:
+                for write, _ in batch:
+                    write(db)
+                db.commit()
+                written, failed = len(batch), 0
+            except Exception:
+                db.rollback()
+                written, failed = 0, 0
+                for write, _ in batch:
+                    try:
+                        write(db)
+                        db.commit()
+                        written += 1
+                    except Exception:
+                        db.rollback()
+                        failed += 1
+                        print("[ERROR] Write-behind insert failed:", traceback.format_exc())
+        finally:
+            db.close()
+            for _, on_done in batch:
+                if on_done is not None:
+                    on_done()
+
+        with self._lock:
+            self.batches += 1
+            self.written += written
+            self.failed += failed
+
+    def close(self, timeout: float = 10.0):
+        """
+        Stops the background thread after it has written everything queued.
+        Anything left (e.g. the thread did not finish in time) is written inline.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._drain()
+
+    def _drain(self):
+        """
+        Writes whatever is still queued on the caller's thread.
+        """
+        leftover = []
+        while True:
+            try:
+                leftover.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if leftover:
+            self._write_batch(leftover)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "queued": self._queue.qsize(),
+                "max_size": self._queue.maxsize,
+                "submitted": self.submitted,
+                "written": self.written,
+                "failed": self.failed,
+                "batches": self.batches,
+                "blocked": self.blocked,
+                "inline": self.inline
+            }
@@ -102,6 +102,54 @@ export const sendChatMessage = async (userId, query) => {
     }
 };
 
+// Stream a chatbot reply (server-sent events); onToken receives each text fragment as it arrives.
+// Pass the conversation_id from a previous reply to continue that conversation.
+export const streamChatMessage = async (userId, query, onToken, conversationId = null) => {
+    try {
+        const params = new URLSearchParams({ user_id: userId, query, stream: "true" });
+        if (conversationId !== null) {
+            params.append("conversation_id", conversationId);
+        }
+        const response = await fetch(`${API_BASE_URL}/chatbot/?${params}`, { method: "POST" });
+        if (!response.ok || !response.body) {
+            throw new Error(`HTTP ${response.status}`);
+        }
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = "";
+        let result = null;
+
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+
+            // Events are separated by a blank line
+            let boundary;
+            while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+                const rawEvent = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+
+                const event = rawEvent.match(/^event: (.*)$/m)?.[1];
+                const data = rawEvent.match(/^data: (.*)$/m)?.[1];
+                if (!data) continue;
+
+                const payload = JSON.parse(data);
+                if (event === "token") {
+                    onToken(payload.token);
+                } else if (event === "done") {
+                    result = payload;
+                }
+            }
+        }
+        return result;
+    } catch (error) {
+        console.error("Chatbot stream error:", error);
+        return null;
+    }
+};
+
 // Predict future carbon footprint
 export const predictCarbonFootprint = async (userId) => {
     try {
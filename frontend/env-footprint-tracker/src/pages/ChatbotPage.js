@@ -1,10 +1,11 @@
 import React, { useState } from "react";
-import { sendChatMessage } from "../api";
+import { streamChatMessage } from "../api";
 
 const ChatbotPage = () => {
     const [query, setQuery] = useState("");
     const [chatHistory, setChatHistory] = useState([]);
     const [loading, setLoading] = useState(false);
+    const [conversationId, setConversationId] = useState(null);
 
     const handleSend = async (message) => {
         const userId = localStorage.getItem("user_id");
@@ -19,11 +20,18 @@ const ChatbotPage = () => {
         setQuery("");
         setLoading(true);
 
-        // Fetch AI response
-        const data = await sendChatMessage(userId, message);
-        const aiResponse = data?.response || "No response from AI.";
+        // Stream the AI response into chat history as it arrives
+        let streamedText = "";
+        const data = await streamChatMessage(userId, message, (token) => {
+            streamedText += token;
+            setChatHistory([...newChat, { sender: "ai", text: streamedText }]);
+        }, conversationId);
+        if (data?.conversation_id) {
+            setConversationId(data.conversation_id);
+        }
+        const aiResponse = data?.response || streamedText || "No response from AI.";
 
-        // Add AI response to chat history
+        // Add the final AI response to chat history
         setChatHistory([...newChat, { sender: "ai", text: aiResponse }]);
         setLoading(false);
     };
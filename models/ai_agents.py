@@ -1,63 +1,452 @@
+import copy
+import os
+import queue
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, replace
+from datetime import datetime, UTC
+import joblib
 import numpy as np
 import pandas as pd
-from sklearn.cluster import KMeans
+import sklearn
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.neighbors import BallTree
+from sklearn.preprocessing import StandardScaler
 from sqlalchemy.orm import Session
-from backend.models import Recommendation, EmissionHistory, RecommendationFeedback
+from backend.models import Recommendation, EmissionHistory, RecommendationFeedback, UserFeatures
+from backend.user_features import rebuild_user_features
+from backend.dependencies import (
+    AI_MODEL_DIR, AI_RETRAIN_INTERVAL_SECONDS, AI_RETRAIN_AFTER_TRIPS,
+    AI_ONLINE_LEARNING, AI_ONLINE_BATCH_SIZE, AI_ONLINE_FLUSH_SECONDS, AI_ONLINE_QUEUE_SIZE,
+    AI_DRIFT_MAX_CENTROID_SHIFT, AI_DRIFT_MAX_INERTIA_RATIO, AI_SIMILAR_USERS, AI_NEIGHBOR_OVERLAY_MAX
+)
+from backend.deadline import LatencyTracker
+
+MODEL_FORMAT_VERSION = 3  # Bump when the persisted bundle layout or features change
+MODE_SHARE_COLUMNS = ["car_trips", "transit_trips", "active_trips", "air_trips"]
+FEATURES = [
+    "mean_emissions", "mean_miles", "trip_count",
+    "car_share", "transit_share", "active_share", "air_share"
+]
+
+
+@dataclass(frozen=True)
+class ClusterModel:
+    """
+    A trained scaler + MiniBatchKMeans pair. Never mutated; retraining and online
+    updates build a new one and swap the reference, so readers always see a consistent pair.
+    """
+    scaler: StandardScaler
+    kmeans: MiniBatchKMeans
+    version: str  # UTC training timestamp, e.g. "20260101T120000Z"; online updates append "+<n>"
+    n_samples: int
+
+    @property
+    def fit_version(self) -> str:
+        """
+        Version of the full fit this model derives from (online updates keep its scaler).
+        """
+        return self.version.split("+")[0]
+
+    def predict(self, X) -> np.ndarray:
+        return self.kmeans.predict(self.scaler.transform(X))
+
+
+@dataclass(frozen=True)
+class NeighborIndex:
+    """
+    BallTree over every user's standardized feature vector (the model's scaler), for
+    k-nearest similar-user lookups. Users updated online after the tree was built live
+    in a small `overlay` searched by brute force, until the tree is rebuilt.
+    """
+    fit_version: str
+    tree: BallTree
+    user_ids: np.ndarray  # Tree row -> user_id
+    overlay: dict  # user_id -> standardized vector
+    build_seconds: float
+
+    @classmethod
+    def build(cls, model: ClusterModel, user_data: pd.DataFrame) -> "NeighborIndex":
+        started = time.monotonic()
+        if user_data.empty:
+            return cls(model.fit_version, None, np.empty(0, dtype=int), {}, 0.0)
+        X = model.scaler.transform(user_data[FEATURES].values.astype(float))
+        return cls(model.fit_version, BallTree(X), user_data["user_id"].to_numpy(), {}, time.monotonic() - started)
+
+    def with_users(self, model: ClusterModel, user_data: pd.DataFrame) -> "NeighborIndex":
+        X = model.scaler.transform(user_data[FEATURES].values.astype(float))
+        return replace(self, overlay={**self.overlay, **{int(uid): row for uid, row in zip(user_data["user_id"], X)}})
+
+    def query(self, vector: np.ndarray, k: int, exclude: int = None) -> list:
+        """
+        user_ids of the `k` users closest to the standardized `vector`, nearest first.
+        """
+        candidates = []
+        if self.tree is not None:
+            #  Over-fetch so stale tree entries (now in the overlay) and `exclude` can be dropped
+            distances, rows = self.tree.query([vector], k=min(len(self.user_ids), k + len(self.overlay) + 1))
+            for distance, row in zip(distances[0], rows[0]):
+                uid = int(self.user_ids[row])
+                if uid != exclude and uid not in self.overlay:
+                    candidates.append((distance, uid))
+        if self.overlay:
+            overlay_ids = list(self.overlay)
+            distances = np.linalg.norm(np.array([self.overlay[uid] for uid in overlay_ids]) - vector, axis=1)
+            candidates += [(distance, uid) for distance, uid in zip(distances, overlay_ids) if uid != exclude]
+        return [uid for _, uid in sorted(candidates)[:k]]
+
 
 class AIAgent:
-    def __init__(self, n_clusters=3):
+    def __init__(self, n_clusters=3, model_dir: str = AI_MODEL_DIR, online_learning: bool = AI_ONLINE_LEARNING):
         """
         AI Agent using K-Means Clustering to refine recommendations.
+        The trained model is persisted to `model_dir` and loaded on startup.
+        With `online_learning`, users with new trips are folded into the model with
+        MiniBatchKMeans.partial_fit between full refits (see start_background_training).
         """
         self.n_clusters = n_clusters  # Number of user clusters
-        self.kmeans = None  # K-Means model
-    
-    def _get_user_data(self, db: Session):
+        self.model_path = os.path.join(model_dir, "ai_agent_kmeans.joblib")
+        self.model = self.load_model()  # Current ClusterModel (None until trained)
+        self.neighbor_index = None  # NeighborIndex for the current full fit, built likewise
+        self.neighbor_latency = LatencyTracker()
+
+        self._train_lock = threading.Lock()
+        self._retrain_requested = threading.Event()
+        self._stop = threading.Event()
+        self._trainer = None
+        self._trips_since_training = 0
+        self._count_lock = threading.Lock()
+
+        self.online_learning = online_learning
+        self._online_queue = queue.Queue(maxsize=AI_ONLINE_QUEUE_SIZE)  # user_ids whose features changed
+        self._online_worker = None
+        self._online_dropped = 0
+        self._reset_drift(self.model)
+
+    @property
+    def kmeans(self):
+        model = self.model
+        return model.kmeans if model is not None else None
+
+    def load_model(self):
+        """
+        Loads the persisted model, or returns None if it is missing, unreadable or
+        was written by an incompatible version.
+        """
+        if not os.path.exists(self.model_path):
+            return None
+        try:
+            bundle = joblib.load(self.model_path)
+        except Exception as e:
+            print(f"⚠️ Could not load clustering model {self.model_path}: {e}")
+            return None
+
+        if bundle.get("format_version") != MODEL_FORMAT_VERSION or bundle.get("n_clusters") != self.n_clusters:
+            print("⚠️ Persisted clustering model is from an incompatible version. Retraining.")
+            return None
+        if bundle.get("sklearn_version") != sklearn.__version__:
+            print(f"⚠️ Clustering model was saved with scikit-learn {bundle.get('sklearn_version')}; running {sklearn.__version__}.")
+
+        return ClusterModel(bundle["scaler"], bundle["kmeans"], bundle["version"], bundle["n_samples"])  #  Always a full fit
+
+    def save_model(self, model: ClusterModel):
+        """
+        Writes the model bundle atomically (temp file + rename), so a crash or a
+        concurrent reader never sees a partial file.
         """
-        Fetch user emissions with additional transport type & miles.
-        Ensures no NaN values exist before clustering.
+        os.makedirs(os.path.dirname(self.model_path), exist_ok=True)
+        bundle = {
+            "format_version": MODEL_FORMAT_VERSION,
+            "sklearn_version": sklearn.__version__,
+            "n_clusters": self.n_clusters,
+            "features": FEATURES,
+            "version": model.version,
+            "n_samples": model.n_samples,
+            "scaler": model.scaler,
+            "kmeans": model.kmeans
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.model_path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                joblib.dump(bundle, f)
+            os.replace(tmp_path, self.model_path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+    def _get_user_data(self, db: Session, user_id: int = None, user_ids: list = None):
         """
-        records = db.query(EmissionHistory).all()
+        Per-user feature rows from `user_features` (one row per user, kept up to date as
+        trips are logged), so clustering cost grows with users, not trips.
+        Features: mean emissions and miles per trip, trip count and mode-mix shares.
+        Pass `user_id` (or `user_ids`) to load only those users' rows. Ensures no NaN values exist before clustering.
+        """
+        query = db.query(
+            UserFeatures.user_id, UserFeatures.trip_count, UserFeatures.total_emissions, UserFeatures.total_miles,
+            *[getattr(UserFeatures, column) for column in MODE_SHARE_COLUMNS]
+        ).filter(UserFeatures.trip_count > 0)
+        if user_id is not None:
+            query = query.filter(UserFeatures.user_id == user_id)
+        if user_ids is not None:
+            query = query.filter(UserFeatures.user_id.in_(user_ids))
+        records = query.all()
 
         if not records:
-            return pd.DataFrame(columns=["user_id", "emission_value", "miles_traveled"])  
+            return pd.DataFrame(columns=["user_id", *FEATURES])
 
-        data = pd.DataFrame([
-            {
-                "user_id": rec.user_id,
-                "emission_value": rec.emission_value if rec.emission_value is not None else 0,
-                "miles_traveled": rec.miles if rec.miles is not None else 0
-            }
-            for rec in records
-        ])
+        raw = pd.DataFrame(records, columns=["user_id", "trip_count", "total_emissions", "total_miles", *MODE_SHARE_COLUMNS])
+        trips = raw["trip_count"].astype(float)
+
+        data = pd.DataFrame({"user_id": raw["user_id"]})
+        data["mean_emissions"] = raw["total_emissions"].astype(float) / trips
+        data["mean_miles"] = raw["total_miles"].astype(float) / trips
+        data["trip_count"] = trips
+        for column in MODE_SHARE_COLUMNS:
+            data[column.replace("_trips", "_share")] = raw[column].astype(float) / trips
 
-        # Convert to numeric & replace NaNs with 0
-        data["emission_value"] = pd.to_numeric(data["emission_value"], errors="coerce").fillna(0)
-        data["miles_traveled"] = pd.to_numeric(data["miles_traveled"], errors="coerce").fillna(0)
+        # Replace NaNs with 0
+        data[FEATURES] = data[FEATURES].fillna(0)
 
         return data
 
+    def _ensure_user_features(self, db: Session):
+        """
+        Backfills `user_features` from the trip log when it is empty but trips exist
+        (e.g. a database that predates the table).
+        """
+        if db.query(UserFeatures.user_id).first() is None and db.query(EmissionHistory.id).first() is not None:
+            users = rebuild_user_features(db)
+            print(f"[INFO] Rebuilt user_features for {users} users")
+
 
     
     def train_model(self, db: Session):
         """
-        Train K-Means Clustering on user emission behavior, transport type & miles.
+        Train K-Means Clustering on per-user emission behavior, trip volume & mode mix.
+        Features are standardized first. The new model is persisted, then swapped in.
         """
-        user_data = self._get_user_data(db)
-
+        with self._train_lock:
+            self._ensure_user_features(db)
+            user_data = self._get_user_data(db)
+
+            if len(user_data) < self.n_clusters:
+                print("⚠️ No valid training data available. Skipping clustering.")
+                return  # No training data
+
+            X = user_data[FEATURES].values.astype(float)  #  One row per user
+
+            #  Ensure no NaN values before training KMeans
+            if np.isnan(X).any():
+                print("⚠️ NaN detected in training data. Replacing NaNs with 0.")
+                X = np.nan_to_num(X)  #  Replace NaNs with 0 before training
+                user_data[FEATURES] = X
+
+            scaler = StandardScaler().fit(X)
+            kmeans = MiniBatchKMeans(n_clusters=self.n_clusters, random_state=42, n_init=10, batch_size=1024)
+            kmeans.fit(scaler.transform(X))  # Train model
+
+            model = ClusterModel(scaler, kmeans, datetime.now(UTC).strftime("%Y%m%dT%H%M%SZ"), len(X))
+            try:
+                self.save_model(model)
+            except OSError as e:
+                print(f"⚠️ Could not persist clustering model: {e}")
+            self.neighbor_index = NeighborIndex.build(model, user_data)
+            self.model = model  #  Atomic swap; readers keep using the model they already hold
+            self._reset_drift(model)
+            with self._count_lock:
+                self._trips_since_training = 0
+
+    def _reset_drift(self, model: ClusterModel):
+        """
+        Makes `model` (a full fit) the reference that online updates are measured against,
+        and records its cluster sizes from the fit's labels.
+        """
+        self._fit_centers = model.kmeans.cluster_centers_.copy() if model is not None else None
+        self.cluster_sizes = {}
+        if model is not None:
+            counts = np.bincount(model.kmeans.labels_, minlength=self.n_clusters)
+            self.cluster_sizes = {label: int(count) for label, count in enumerate(counts)}
+        self.drift = {
+            "fit_version": model.version if model is not None else None,
+            "baseline_inertia": float(model.kmeans.inertia_) / model.n_samples if model is not None else None,
+            "online_updates": 0,
+            "users_updated": 0,
+            "batch_inertia": None,
+            "inertia_ratio": None,
+            "centroid_shift": 0.0,
+            "refit_requested": False,
+            "refits_triggered": getattr(self, "drift", {}).get("refits_triggered", 0)
+        }
+
+    def record_new_trips(self, count: int = 1, user_ids=()):
+        """
+        Counts newly logged trips. With the online worker running, `user_ids` are queued
+        for a partial_fit and full refits are left to the drift threshold; otherwise a
+        background retrain is requested after AI_RETRAIN_AFTER_TRIPS.
+        """
+        with self._count_lock:
+            self._trips_since_training += count
+            trips = self._trips_since_training
+
+        if self._online_worker is not None:
+            for user_id in user_ids:
+                try:
+                    self._online_queue.put_nowait(user_id)
+                except queue.Full:
+                    self._online_dropped += 1  #  Still covered by the next full refit
+        elif trips >= AI_RETRAIN_AFTER_TRIPS:
+            self._retrain_requested.set()
+
+    def partial_fit(self, db: Session, user_ids: list):
+        """
+        Folds the current feature vectors of `user_ids` into the model with
+        MiniBatchKMeans.partial_fit (on a copy, swapped in like a retrain). The scaler
+        stays as fitted. Requests a full refit when the centroids moved more than
+        AI_DRIFT_MAX_CENTROID_SHIFT since the last full fit, or the batch's inertia per
+        user exceeds AI_DRIFT_MAX_INERTIA_RATIO times the full fit's.
+        """
+        model = self.model
+        if model is None:
+            return
+        user_data = self._get_user_data(db, user_ids=user_ids)
         if user_data.empty:
-            print("⚠️ No valid training data available. Skipping clustering.")
-            return  # No training data
-
-        X = user_data[["emission_value", "miles_traveled"]].values  #  Include miles traveled
-
-        #  Ensure no NaN values before training KMeans
-        if np.isnan(X).any():
-            print("⚠️ NaN detected in training data. Replacing NaNs with 0.")
-            X = np.nan_to_num(X)  #  Replace NaNs with 0 before training
-
-        self.kmeans = KMeans(n_clusters=self.n_clusters, random_state=42, n_init=10)
-        self.kmeans.fit(X)  # Train model
+            return
+
+        X = model.scaler.transform(np.nan_to_num(user_data[FEATURES].values.astype(float)))
+        kmeans = copy.deepcopy(model.kmeans)
+        kmeans.partial_fit(X)
+        batch_inertia = float(-kmeans.score(X)) / len(X)
+
+        with self._train_lock:
+            if self.model is not model:
+                return  #  A full refit replaced the model meanwhile; it already saw these users
+
+            drift = self.drift
+            updated = ClusterModel(model.scaler, kmeans, f"{drift['fit_version']}+{drift['online_updates'] + 1}", model.n_samples)
+            neighbors = self.neighbor_index
+            if neighbors is not None and neighbors.fit_version == model.fit_version:
+                neighbors = neighbors.with_users(updated, user_data)
+                if len(neighbors.overlay) > AI_NEIGHBOR_OVERLAY_MAX:
+                    neighbors = None  #  Rebuilt below, outside the lock
+                self.neighbor_index = neighbors
+            self.model = updated
+
+            baseline = drift["baseline_inertia"]
+            drift["online_updates"] += 1
+            drift["users_updated"] += len(user_data)
+            drift["batch_inertia"] = round(batch_inertia, 4)
+            drift["inertia_ratio"] = round(batch_inertia / baseline, 3) if baseline else None
+            drift["centroid_shift"] = round(float(np.linalg.norm(kmeans.cluster_centers_ - self._fit_centers, axis=1).max()), 4)
+
+            drifted = drift["centroid_shift"] > AI_DRIFT_MAX_CENTROID_SHIFT or (drift["inertia_ratio"] or 0) > AI_DRIFT_MAX_INERTIA_RATIO
+            if drifted and not drift["refit_requested"]:
+                drift["refit_requested"] = True
+                drift["refits_triggered"] += 1
+                self._retrain_requested.set()
+
+        if self.neighbor_index is None:
+            self._current_neighbors(updated, db)
+
+    def _run_online_updates(self, session_factory):
+        while not self._stop.is_set():
+            try:
+                batch = {self._online_queue.get(timeout=AI_ONLINE_FLUSH_SECONDS)}
+            except queue.Empty:
+                continue
+
+            flush_at = time.monotonic() + AI_ONLINE_FLUSH_SECONDS
+            while len(batch) < AI_ONLINE_BATCH_SIZE and not self._stop.is_set():
+                try:
+                    batch.add(self._online_queue.get(timeout=max(0.0, flush_at - time.monotonic())))
+                except queue.Empty:
+                    break
+
+            db = session_factory()
+            try:
+                self.partial_fit(db, list(batch))
+            except Exception as e:
+                print(f"[ERROR] Online clustering update failed: {e}")
+            finally:
+                db.close()
+
+    def start_background_training(self, session_factory, interval_seconds: float = AI_RETRAIN_INTERVAL_SECONDS):
+        """
+        Starts a daemon thread that retrains every `interval_seconds`, when enough new
+        trips were recorded (or, in online mode, when drift is detected), and immediately
+        if no model could be loaded. In online mode a second thread applies partial_fit batches.
+        """
+        if self._trainer is not None:
+            return
+        if self.model is None:
+            self._retrain_requested.set()
+
+        def run():
+            if self.model is not None:
+                #  Loaded from disk: build the similar-user index here, not on the first request
+                db = session_factory()
+                try:
+                    self._current_neighbors(self.model, db)
+                except Exception as e:
+                    print(f"[ERROR] Building the similar-user index failed: {e}")
+                finally:
+                    db.close()
+
+            while not self._stop.is_set():
+                self._retrain_requested.wait(timeout=interval_seconds)
+                if self._stop.is_set():
+                    break
+                self._retrain_requested.clear()
+
+                db = session_factory()
+                try:
+                    started = time.monotonic()
+                    self.train_model(db)
+                    if self.model is not None:
+                        print(f"[INFO] Clustering model {self.model.version} trained in {time.monotonic() - started:.1f}s")
+                except Exception as e:
+                    print(f"[ERROR] Background clustering retrain failed: {e}")
+                finally:
+                    db.close()
+
+        self._trainer = threading.Thread(target=run, name="ai-agent-trainer", daemon=True)
+        self._trainer.start()
+
+        if self.online_learning:
+            self._online_worker = threading.Thread(
+                target=self._run_online_updates, args=(session_factory,), name="ai-agent-online", daemon=True
+            )
+            self._online_worker.start()
+
+    def stop_background_training(self):
+        self._stop.set()
+        self._retrain_requested.set()
+
+    def model_stats(self) -> dict:
+        model = self.model
+        neighbors = self.neighbor_index
+        with self._count_lock:
+            trips = self._trips_since_training
+        return {
+            "version": model.version if model else None,
+            "n_samples": model.n_samples if model else 0,
+            "cluster_sizes": self.cluster_sizes,
+            "neighbor_index": {
+                "users": len(neighbors.user_ids) if neighbors else 0,
+                "overlay": len(neighbors.overlay) if neighbors else 0,
+                "build_ms": round(neighbors.build_seconds * 1000, 1) if neighbors else None,
+                "query": self.neighbor_latency.stats()
+            },
+            "trips_since_training": trips,
+            "retrain_after_trips": AI_RETRAIN_AFTER_TRIPS,
+            "background_training": self._trainer is not None and self._trainer.is_alive(),
+            "online": {
+                "enabled": self._online_worker is not None and self._online_worker.is_alive(),
+                "queued_users": self._online_queue.qsize(),
+                "dropped_users": self._online_dropped,
+                **self.drift
+            }
+        }
 
 
     
@@ -65,35 +454,71 @@ class AIAgent:
         """
         Predict which cluster the user belongs to.
         """
-        if self.kmeans is None:
+        model = self._current_model(db)
+        if model is None:
+            return None
+        return self._predict_user_cluster(model, user_id, db)
+
+    def _current_model(self, db: Session):
+        """
+        The model to use for this request. Without one, trains synchronously unless a
+        background trainer will provide one (then returns None).
+        """
+        if self.model is None:
+            if self._trainer is not None:
+                self._retrain_requested.set()
+                return None  #  Never train on the request path when a trainer is running
             self.train_model(db)  # Train if not already trained
-        
-        user_data = self._get_user_data(db)
-        if user_id not in user_data["user_id"].values:
+        return self.model
+
+    def _current_neighbors(self, model: ClusterModel, db: Session) -> NeighborIndex:
+        """
+        The nearest-neighbour index for `model`'s full fit, rebuilt when missing or stale
+        (e.g. the model was loaded from disk).
+        """
+        neighbors = self.neighbor_index
+        if neighbors is None or neighbors.fit_version != model.fit_version:
+            user_data = self._get_user_data(db)
+            neighbors = NeighborIndex.build(model, user_data)
+            if self.model is model:
+                self.neighbor_index = neighbors
+        return neighbors
+
+    def _user_features(self, user_id: int, db: Session):
+        """
+        The user's feature row as a 2D array, or None if the user has no trips.
+        """
+        user_data = self._get_user_data(db, user_id=user_id)
+        if user_data.empty:
             return None  # User not found
         
-        #  Extract both 'emission_value' and 'miles_traveled'
-        user_features = user_data[user_data["user_id"] == user_id][["emission_value", "miles_traveled"]].values
+        user_features = user_data[FEATURES].values.astype(float)
 
         #  Ensure shape consistency (no NaN values)
         if np.isnan(user_features).any():
             print(f"⚠️ User {user_id} has NaN values. Replacing NaNs with 0.")
             user_features = np.nan_to_num(user_features)
 
-        return self.kmeans.predict(user_features)[0]  #  Now passes 2D input
+        return user_features
+
+    def _predict_user_cluster(self, model: ClusterModel, user_id: int, db: Session):
+        user_features = self._user_features(user_id, db)
+        if user_features is None:
+            return None
+        return model.predict(user_features)[0]  #  Single row, 2D input
 
 
     
     def refine_recommendations(self, user_id: int, recommendations: list, db: Session):
         """
-        Refine AI recommendations using clustering, user feedback, and past similar users' recommendations.
+        Refine AI recommendations using user feedback and the past recommendations of the
+        AI_SIMILAR_USERS nearest users in standardized feature space.
         """
-        user_cluster = self.predict_cluster(user_id, db)
-        if user_cluster is None:
+        model = self._current_model(db)  #  Same model for the user and similar users, even if a retrain swaps it
+        user_features = self._user_features(user_id, db) if model is not None else None
+        if user_features is None:
             return recommendations  #  Return unmodified recommendations if clustering fails.
 
-        user_data = self._get_user_data(db)
-
         #  Fetch user feedback from `recommendation_feedback` and join with `Recommendation` table
         feedback = db.query(RecommendationFeedback, Recommendation).\
             join(Recommendation, Recommendation.id == RecommendationFeedback.recommendation_id).\
@@ -102,16 +527,19 @@ class AIAgent:
         accepted_suggestions = {rec.recommendation_text for fb, rec in feedback if fb.accepted}
         rejected_suggestions = {rec.recommendation_text for fb, rec in feedback if not fb.accepted}
 
-        #  Get past recommendations from similar users in the same cluster
-        similar_users = user_data[user_data["user_id"] != user_id]
-        similar_users = similar_users[
-            similar_users[["emission_value", "miles_traveled"]].apply(
-                lambda x: self.kmeans.predict([x])[0] == user_cluster, axis=1
-            )
-        ]
+        #  Get past recommendations from the nearest similar users
+        neighbors = self.neighbor_index
+        if neighbors is None or neighbors.fit_version != model.fit_version:
+            #  The trainer thread builds the index; never scan all users on the request path while it runs
+            neighbors = self._current_neighbors(model, db) if self._trainer is None else None
+
+        similar_user_ids = []
+        if neighbors is not None:
+            started = time.monotonic()
+            similar_user_ids = neighbors.query(model.scaler.transform(user_features)[0], AI_SIMILAR_USERS, exclude=user_id)
+            self.neighbor_latency.record(time.monotonic() - started)
 
-        if not similar_users.empty:
-            similar_user_ids = similar_users["user_id"].tolist()
+        if similar_user_ids:
             past_recommendations = db.query(Recommendation).filter(
                 Recommendation.user_id.in_(similar_user_ids)
             ).all()
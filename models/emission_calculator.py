@@ -1,48 +1,30 @@
+import numpy as np
+from models.emission_factors import EmissionFactorRegistry, EMISSION_FACTORS
+
+
 class CarbonCalculator:
-    def __init__(self):
+    def __init__(self, registry: EmissionFactorRegistry = EMISSION_FACTORS):
         """
-        Initializes the Carbon Calculator with updated emission factors 
-        for transportation activities based on fuel efficiency and energy sources.
-        Sources: EPA, IPCC, FAA, national transportation & energy reports.
+        Initializes the Carbon Calculator with emission factors for transportation
+        activities based on fuel efficiency and energy sources.
+        Factors come from the shared, immutable `EmissionFactorRegistry`.
         """
+        self.registry = registry
+
         # 🚗 Emission factors (lbs CO2 per mile per vehicle)
-        self.emission_factors = {
-            # Fuel-Based Vehicles (lbs CO₂ per mile per vehicle)
-            "gasoline_car": 0.89,  # Solo driver (~25 MPG)
-            "diesel_car": 1.02,  # Diesel car (~30 MPG)
-            "hybrid_car": 0.43,  # Hybrid (~50 MPG)
-            "motorcycle": 0.46,  # (~55 MPG)
-            "rideshare_solo": 0.89,  # Same as gasoline car if alone
-            "rideshare_shared": 0.45,  # Assumes 2+ people sharing
-
-            # Public Transport (lbs CO₂ per mile per vehicle)
-            "bus": 6.8,  # Public transit bus
-            "diesel_bus": 16,  # Older diesel buses
-            "train": 200,  # Passenger rail (Amtrak)
-            "subway": 80,  # Urban transit systems
-            "high_speed_rail": 100,  # High-speed electric rail
-            "airplane": 54000,  # Short-haul flights
-            "long_haul_flight": 172000,  # More efficient over long distances
-            "ferry": 300,  # Boat/ferry transport
-
-            # Electric Vehicles (lbs CO₂ per mile)
-            "electric_car": 0.06,  # EV based on CA grid
-            "electric_scooter": 0.02,  
-            "electric_bike": 0.01,  
-
-            # No CO2 emissions
-            "bike": 0.00,  
-            "walking": 0.00  
-        }
+        self.emission_factors = registry.factors
 
         #  CO₂ per kWh of electricity;
-        self.co2_per_kwh = 0.450  # U.S. average grid emissions
+        self.co2_per_kwh = registry.co2_per_kwh
 
         #  CO₂ per gallon of fuel burned
-        self.co2_per_gallon = {
-            "gasoline": 19.6,  # lbs CO2 per gallon of gasoline burned
-            "diesel": 22.4   # lbs CO2 per gallon of diesel burned
-        }
+        self.co2_per_gallon = registry.co2_per_gallon
+
+        #  Integer codes for vectorized lookups (code -> row in the factor arrays)
+        self.mode_codes = registry.mode_codes
+        self.mode_factor_array = registry.mode_factor_array
+        self.fuel_codes = registry.fuel_codes
+        self.fuel_factor_array = registry.fuel_factor_array
 
     def estimate_fuel_vehicle_emissions(self, fuel_type: str, mpg: float, miles: float, passengers: int = 1) -> float:
         """
@@ -101,6 +83,24 @@ class CarbonCalculator:
             passengers = 1  # Avoid division by zero
 
         return self.emission_factors.get(transport_type, 0) * miles / passengers
+
+    def estimate_trip_emissions(self, transport_mode: str, miles: float, fuel_type: str = None, mpg: float = 25) -> float:
+        """
+        Estimates total CO₂ emissions for a logged trip (whole vehicle, not per person).
+        - transport_mode: Factor key or alias (driving, electric, public_transport)
+        - miles: Distance traveled
+        - fuel_type: Used with mpg when the mode has no per-mile factor (gasoline, diesel)
+        - mpg: Fuel efficiency for the fuel-based fallback
+        """
+        factor = self.registry.factor(transport_mode)
+        if factor is not None:
+            return factor * miles
+
+        fuel_type = (fuel_type or "").lower()
+        if fuel_type in self.co2_per_gallon and mpg > 0:
+            return (self.co2_per_gallon[fuel_type] / mpg) * miles
+
+        return 0
     
 
     def calculate_co2_savings(self, default_route: dict, eco_route: dict) -> float:
@@ -119,4 +119,120 @@ class CarbonCalculator:
         return round(co2_default - co2_eco, 2)  # CO₂ saved
 
 
+    def rank_routes(self, routes: list, vehicle_type: str = "gasoline_car", fuel_type: str = "gasoline") -> list:
+        """
+        Scores route alternatives by estimated CO₂ in one batched pass and returns
+        new route dicts sorted greenest first, each with `estimated_emissions_lbs` and `rank`.
+        All alternatives are ranked on one basis (`emissions_basis`):
+        - "fuel": every route has a `fuel_consumption_liters` estimate, so CO₂ per gallon burned is used.
+        - "distance": otherwise, the per-mile factor of `vehicle_type` is used for all of them.
+        Both figures are also returned as `fuel_emissions_lbs` (None without a fuel estimate)
+        and `distance_emissions_lbs`.
+        """
+        if not routes:
+            return []
+
+        miles = np.array([route["distance_miles"] for route in routes], dtype=np.float64)
+        fuel_liters = np.array([
+            route.get("fuel_consumption_liters") if route.get("fuel_consumption_liters") is not None else np.nan
+            for route in routes
+        ], dtype=np.float64)
+
+        per_mile_emissions = self.estimate_emissions_batch(np.full(len(routes), vehicle_type), miles)
+        fuel_emissions = fuel_liters / 3.78541 * self.co2_per_gallon.get(fuel_type, 0)  # Liters -> gallons
+        basis = "distance" if np.isnan(fuel_liters).any() else "fuel"
+        emissions = fuel_emissions if basis == "fuel" else per_mile_emissions
+
+        durations = np.array([route.get("duration_minutes", 0) for route in routes], dtype=np.float64)
+        order = np.lexsort((durations, emissions))  # Lowest emissions first, then fastest
+
+        return [
+            {
+                **routes[index],
+                "estimated_emissions_lbs": round(float(emissions[index]), 2),
+                "emissions_basis": basis,
+                "fuel_emissions_lbs": None if np.isnan(fuel_emissions[index]) else round(float(fuel_emissions[index]), 2),
+                "distance_emissions_lbs": round(float(per_mile_emissions[index]), 2),
+                "rank": rank + 1
+            }
+            for rank, index in enumerate(order)
+        ]
+
+    @staticmethod
+    def _encode(names, codes: dict) -> np.ndarray:
+        """
+        Maps an array of names to integer codes (-1 for unknown names).
+        Each distinct name is looked up once, however many rows share it.
+        """
+        names = np.asarray(names, dtype=str)
+        if names.size == 0:
+            return np.empty(0, dtype=np.int64)
+
+        unique_names, inverse = np.unique(names, return_inverse=True)
+        unique_codes = np.array([codes.get(name, -1) for name in unique_names], dtype=np.int64)
+        return unique_codes[inverse.reshape(-1)]
+
+    def encode_modes(self, modes) -> np.ndarray:
+        """
+        Converts transport mode names (e.g. "gasoline_car", "bus") or aliases
+        (e.g. "driving") to integer codes that index `mode_factor_array`. Unknown modes get -1.
+        """
+        return self._encode(modes, self.mode_codes)
+
+    def encode_fuels(self, fuel_types) -> np.ndarray:
+        """
+        Converts fuel names ("gasoline", "diesel") to integer codes that index
+        `fuel_factor_array`. Unknown or missing fuels get -1.
+        """
+        return self._encode(fuel_types, self.fuel_codes)
+
+    def estimate_emissions_batch(self, modes, miles, passengers=None, fuel_types=None, mpg=None, miles_per_kwh=None) -> np.ndarray:
+        """
+        Estimates CO₂ emissions (lbs per person) for many trips in one NumPy pass.
+
+        Each trip follows the same rules as the scalar estimators:
+        - If the mode has a per-mile emission factor, use it.
+        - Else if the fuel type is known and mpg > 0, use CO₂ per gallon burned.
+        - Else if miles_per_kwh > 0, use grid CO₂ per kWh.
+        - Otherwise emissions are 0.
+        Emissions are divided by passengers (values <= 0 count as 1).
+
+        Args:
+        - modes: Mode names, or integer codes from `encode_modes`.
+        - miles: Distance traveled per trip.
+        - passengers: People per trip (defaults to 1).
+        - fuel_types: Fuel names, or integer codes from `encode_fuels` (optional).
+        - mpg: Fuel efficiency per trip (optional).
+        - miles_per_kwh: Electric efficiency per trip (optional).
+
+        Returns:
+        - np.ndarray of emissions, one per trip.
+        """
+        miles = np.asarray(miles, dtype=np.float64).reshape(-1)
+        n = miles.size
+
+        modes = np.asarray(modes)
+        mode_codes = modes.astype(np.int64) if modes.dtype.kind in "iu" else self.encode_modes(modes)
+
+        if fuel_types is None:
+            fuel_codes = np.full(n, -1, dtype=np.int64)
+        else:
+            fuel_types = np.asarray(fuel_types)
+            fuel_codes = fuel_types.astype(np.int64) if fuel_types.dtype.kind in "iu" else self.encode_fuels(fuel_types)
+
+        mpg = np.zeros(n) if mpg is None else np.nan_to_num(np.asarray(mpg, dtype=np.float64))
+        miles_per_kwh = np.zeros(n) if miles_per_kwh is None else np.nan_to_num(np.asarray(miles_per_kwh, dtype=np.float64))
+        passengers = np.ones(n) if passengers is None else np.asarray(passengers, dtype=np.float64)
+        passengers = np.where(passengers > 0, passengers, 1.0)  # Avoid division by zero
+
+        known_mode = mode_codes >= 0
+        use_fuel = ~known_mode & (fuel_codes >= 0) & (mpg > 0)
+        use_kwh = ~known_mode & ~use_fuel & (miles_per_kwh > 0)
+
+        #  Per-mile factor for each trip (0 where no rule applies)
+        per_mile = np.zeros(n)
+        per_mile[known_mode] = self.mode_factor_array[mode_codes[known_mode]]
+        per_mile[use_fuel] = self.fuel_factor_array[fuel_codes[use_fuel]] / mpg[use_fuel]
+        per_mile[use_kwh] = self.co2_per_kwh / miles_per_kwh[use_kwh]
 
+        return per_mile * miles / passengers
@@ -0,0 +1,108 @@
+import sys
+from types import MappingProxyType
+import numpy as np
+
+
+class EmissionFactorRegistry:
+    def __init__(self):
+        """
+        Immutable registry of emission factors shared by the whole app.
+        Built once at import time; every lookup is an O(1) read with no per-request allocation.
+        Sources: EPA, IPCC, FAA, national transportation & energy reports.
+        """
+        # 🚗 Emission factors (lbs CO2 per mile per vehicle)
+        factors = {
+            # Fuel-Based Vehicles (lbs CO₂ per mile per vehicle)
+            "gasoline_car": 0.89,  # Solo driver (~25 MPG)
+            "diesel_car": 1.02,  # Diesel car (~30 MPG)
+            "hybrid_car": 0.43,  # Hybrid (~50 MPG)
+            "motorcycle": 0.46,  # (~55 MPG)
+            "rideshare_solo": 0.89,  # Same as gasoline car if alone
+            "rideshare_shared": 0.45,  # Assumes 2+ people sharing
+
+            # Public Transport (lbs CO₂ per mile per vehicle)
+            "bus": 6.8,  # Public transit bus
+            "diesel_bus": 16,  # Older diesel buses
+            "train": 200,  # Passenger rail (Amtrak)
+            "subway": 80,  # Urban transit systems
+            "high_speed_rail": 100,  # High-speed electric rail
+            "airplane": 54000,  # Short-haul flights
+            "long_haul_flight": 172000,  # More efficient over long distances
+            "ferry": 300,  # Boat/ferry transport
+
+            # Electric Vehicles (lbs CO₂ per mile)
+            "electric_car": 0.06,  # EV based on CA grid
+            "electric_scooter": 0.02,
+            "electric_bike": 0.01,
+
+            # No CO2 emissions
+            "bike": 0.00,
+            "walking": 0.00
+        }
+
+        #  CO₂ per kWh of electricity
+        co2_per_kwh = 0.450  # U.S. average grid emissions
+
+        #  CO₂ per gallon of fuel burned
+        co2_per_gallon = {
+            "gasoline": 19.6,  # lbs CO2 per gallon of gasoline burned
+            "diesel": 22.4   # lbs CO2 per gallon of diesel burned
+        }
+
+        #  Trip-log mode names that map onto a factor key
+        aliases = {
+            "driving": "gasoline_car",
+            "electric": "electric_car",
+            "public_transport": "bus"
+        }
+
+        #  Interned mode IDs; code = row in the flat factor table
+        modes = tuple(sys.intern(mode) for mode in factors)
+        mode_codes = {mode: code for code, mode in enumerate(modes)}
+        alias_codes = {sys.intern(alias): mode_codes[target] for alias, target in aliases.items()}
+
+        mode_factor_array = np.array([factors[mode] for mode in modes], dtype=np.float64)
+        mode_factor_array.setflags(write=False)
+
+        fuels = tuple(sys.intern(fuel) for fuel in co2_per_gallon)
+        fuel_factor_array = np.array([co2_per_gallon[fuel] for fuel in fuels], dtype=np.float64)
+        fuel_factor_array.setflags(write=False)
+
+        self.modes = modes
+        self.factors = MappingProxyType({mode: float(factors[mode]) for mode in modes})
+        self.co2_per_kwh = co2_per_kwh
+        self.co2_per_gallon = MappingProxyType({fuel: co2_per_gallon[fuel] for fuel in fuels})
+        self.aliases = MappingProxyType({sys.intern(alias): modes[code] for alias, code in alias_codes.items()})
+        self.mode_codes = MappingProxyType({**mode_codes, **alias_codes})  # Aliases share their target's code
+        self.fuel_codes = MappingProxyType({fuel: code for code, fuel in enumerate(fuels)})
+        self.mode_factor_array = mode_factor_array
+        self.fuel_factor_array = fuel_factor_array
+        self._frozen = True
+
+    def __setattr__(self, name, value):
+        if getattr(self, "_frozen", False):
+            raise AttributeError("EmissionFactorRegistry is immutable")
+        super().__setattr__(name, value)
+
+    def resolve(self, mode: str) -> str:
+        """
+        Returns the factor key for a mode name, following aliases (e.g. driving -> gasoline_car).
+        Unknown names are returned unchanged.
+        """
+        return self.aliases.get(mode, mode)
+
+    def factor(self, mode: str):
+        """
+        Returns the per-mile emission factor for a mode or alias, or None if it has none.
+        """
+        return self.factors.get(self.aliases.get(mode, mode))
+
+    def mode_code(self, mode: str) -> int:
+        """
+        Returns the integer code of a mode or alias in `mode_factor_array` (-1 if unknown).
+        """
+        return self.mode_codes.get(mode, -1)
+
+
+#  Built once when the module is first imported and shared everywhere
+EMISSION_FACTORS = EmissionFactorRegistry()
@@ -0,0 +1,12 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+#  Point the app at throwaway SQLite files before anything imports backend.dependencies
+_tmp = tempfile.mkdtemp(prefix="eco-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/app.db"
+os.environ["GEOCODE_CACHE_DB"] = f"{_tmp}/geocode_cache.db"
+os.environ["AI_MODEL_DIR"] = f"{_tmp}/model_store"
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -0,0 +1,28 @@
+import pytest
+from backend.address import canonicalize_address
+
+
+@pytest.mark.parametrize("variant", [
+    "123 N. Main St., Springfield",
+    "123  North Main Street, SPRINGFIELD",
+    "123 n main st,springfield",
+])
+def test_variants_share_one_canonical_form(variant):
+    assert canonicalize_address(variant) == "123 north main street springfield"
+
+
+@pytest.mark.parametrize("address, expected", [
+    ("St. Louis, MO", "saint louis mo"),  #  Leading "St" is a saint, not a street
+    ("Main St Apt 4", "main street apartment 4"),  #  Street suffix before a unit designator
+    ("Main St #4", "main street suite 4"),
+    ("100 Broadway NW", "100 broadway northwest"),
+    ("Mt Vernon Ave", "mount vernon avenue"),
+    ("O'Hare Intl Airport", "ohare international airport"),
+])
+def test_abbreviations_are_expanded_by_position(address, expected):
+    assert canonicalize_address(address) == expected
+
+
+def test_lone_direction_and_blank_input_are_kept():
+    assert canonicalize_address("N") == "n"
+    assert canonicalize_address("  ,  ") == ""
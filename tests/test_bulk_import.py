@@ -0,0 +1,54 @@
+import asyncio
+import pytest
+import backend.api as api
+
+GOOD = '{"user_id": 1, "note": "a,]}\\"x"}'
+
+
+class FakeRequest:
+    def __init__(self, body: str, chunk_size: int):
+        self.body = body.encode()
+        self.chunk_size = chunk_size
+
+    async def stream(self):
+        for i in range(0, len(self.body), self.chunk_size):
+            yield self.body[i:i + self.chunk_size]
+
+
+def parse(body: str, chunk_size: int) -> list:
+    async def collect():
+        return [row async for row in api._iter_trip_rows(FakeRequest(body, chunk_size))]
+    return asyncio.run(collect())
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 1000])
+def test_malformed_array_element_is_skipped(chunk_size):
+    rows = parse(f'[{GOOD}, {{"user_id": oops}}, {GOOD}]', chunk_size)
+    assert [index for index, _, _ in rows] == [0, 1, 2]
+    assert rows[0][1] == rows[2][1] == {"user_id": 1, "note": 'a,]}"x'}
+    assert rows[1][1] is None and rows[1][2] == "Invalid JSON array element"
+
+
+@pytest.mark.parametrize("chunk_size", [1, 4, 30, 1000])
+def test_oversized_array_element_is_rejected(monkeypatch, chunk_size):
+    monkeypatch.setattr(api, "MAX_BULK_ROW_CHARS", 50)
+    big = '{"user_id": 2, "x": "' + "y" * 200 + '"}'
+    rows = parse(f"[{GOOD},{big},{GOOD}]", chunk_size)
+    assert [(row and row["user_id"], error) for _, row, error in rows] == [
+        (1, None), (None, "Row exceeds 50 characters"), (1, None)
+    ]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 9, 1000])
+def test_ndjson_skips_oversized_and_malformed_lines(monkeypatch, chunk_size):
+    monkeypatch.setattr(api, "MAX_BULK_ROW_CHARS", 50)
+    big = '{"user_id": 2, "x": "' + "y" * 200 + '"}'
+    rows = parse(f"{GOOD}\n{big}\nnot json\n{GOOD}\n", chunk_size)
+    assert [row and row["user_id"] for _, row, _ in rows] == [1, None, None, 1]
+    assert rows[1][2] == "Row exceeds 50 characters"
+    assert rows[2][2].startswith("Invalid JSON")
+
+
+def test_unterminated_array_reports_the_last_row():
+    rows = parse('[{"user_id": 1}, {"user_id":', 3)
+    assert rows == [(0, {"user_id": 1}, None), (1, None, "Invalid JSON array element or unterminated array")]
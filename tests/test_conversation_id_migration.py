@@ -0,0 +1,45 @@
+import importlib.util
+import io
+from pathlib import Path
+import pytest
+
+pytest.importorskip("alembic.migration")
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+
+MIGRATION = Path(__file__).resolve().parents[1] / "alembic" / "versions" / "e4a8d2c6b913_use_uuid_conversation_ids.py"
+
+
+def render(step: str) -> str:
+    """
+    Offline PostgreSQL SQL for the migration's upgrade() or downgrade().
+    """
+    spec = importlib.util.spec_from_file_location("use_uuid_conversation_ids", MIGRATION)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+
+    buffer = io.StringIO()
+    context = MigrationContext.configure(dialect_name="postgresql", opts={"as_sql": True, "output_buffer": buffer})
+    with Operations.context(context):
+        getattr(migration, step)()
+    return " ".join(buffer.getvalue().split())
+
+
+def test_upgrade_converts_ids_to_strings_keeping_existing_values():
+    sql = render("upgrade")
+    assert "ALTER TABLE conversations ALTER COLUMN id TYPE VARCHAR(32) USING id::text" in sql
+    assert "ALTER TABLE conversations ALTER COLUMN id DROP DEFAULT" in sql
+    assert "DROP SEQUENCE IF EXISTS conversations_id_seq" in sql
+    assert "ALTER TABLE chatbot_responses ALTER COLUMN conversation_id TYPE VARCHAR(32) USING conversation_id::text" in sql
+    #  The foreign key is dropped before either column changes type and recreated after both
+    assert sql.index("DROP CONSTRAINT fk_chatbot_responses_conversation_id") < sql.index("ALTER COLUMN id TYPE")
+    assert sql.rindex("ADD CONSTRAINT fk_chatbot_responses_conversation_id") > sql.index("ALTER COLUMN conversation_id TYPE")
+
+
+def test_downgrade_restores_integer_ids_and_their_sequence():
+    sql = render("downgrade")
+    assert "ALTER TABLE conversations ALTER COLUMN id TYPE INTEGER USING id::integer" in sql
+    assert "CREATE SEQUENCE IF NOT EXISTS conversations_id_seq OWNED BY conversations.id" in sql
+    assert "setval('conversations_id_seq'" in sql
+    assert "ALTER TABLE conversations ALTER COLUMN id SET DEFAULT nextval('conversations_id_seq')" in sql
+    assert sql.rindex("ADD CONSTRAINT fk_chatbot_responses_conversation_id") > sql.index("ALTER COLUMN id TYPE INTEGER")
@@ -0,0 +1,119 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import requests
+from backend.deadline import Deadline, DeadlineExceeded, hedged_call
+
+
+class Response:
+    def __init__(self, name: str):
+        self.name = name
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def attempts(*delays):
+    """
+    A callable whose n-th call sleeps delays[n] seconds and returns a Response named after n.
+    """
+    made = []
+    lock = threading.Lock()
+
+    def fn():
+        with lock:
+            index = len(made)
+            response = Response(f"attempt-{index}")
+            made.append(response)
+        time.sleep(delays[index])
+        return response
+
+    return fn, made
+
+
+@pytest.fixture
+def executor():
+    pool = ThreadPoolExecutor(max_workers=4)
+    yield pool
+    pool.shutdown(wait=True)
+
+
+def test_deadline_caps_timeouts_by_remaining_budget():
+    deadline = Deadline(0.5)
+    assert deadline.timeout(10) <= 0.5
+    assert deadline.timeout(0.1) == 0.1
+    assert not deadline.expired()
+
+
+def test_spent_deadline_raises_a_requests_timeout():
+    deadline = Deadline(0)
+    assert deadline.expired()
+    with pytest.raises(requests.exceptions.Timeout):  #  DeadlineExceeded is one
+        deadline.timeout(1)
+
+
+def test_fast_primary_is_not_hedged(executor):
+    fn, made = attempts(0)
+    result, hedged = hedged_call(executor, fn, hedge_delay=0.5)
+    assert (result.name, hedged) == ("attempt-0", False)
+    assert len(made) == 1
+
+
+def test_slow_primary_loses_to_the_hedge_and_is_closed(executor):
+    fn, made = attempts(0.3, 0)
+    result, hedged = hedged_call(executor, fn, hedge_delay=0.05)
+    assert (result.name, hedged) == ("attempt-1", True)
+    assert not result.closed
+
+    time.sleep(0.4)
+    assert made[0].closed  #  The losing response was released once it finished
+
+
+def test_hedge_is_skipped_when_no_slot_is_free(executor):
+    slots = threading.BoundedSemaphore(1)
+    slots.acquire()
+    fn, made = attempts(0.1, 0)
+    result, hedged = hedged_call(executor, fn, hedge_delay=0.01, slots=slots)
+    assert (result.name, hedged) == ("attempt-0", False)
+    assert len(made) == 1
+
+
+def test_hedge_slot_is_released_when_the_hedge_finishes(executor):
+    slots = threading.BoundedSemaphore(1)
+    fn, _ = attempts(0.2, 0)
+    hedged_call(executor, fn, hedge_delay=0.01, slots=slots)
+    time.sleep(0.05)
+    assert slots.acquire(blocking=False)
+
+
+def test_unstarted_hedge_is_cancelled_on_timeout():
+    pool = ThreadPoolExecutor(max_workers=1)
+    pool.submit(time.sleep, 0.3)  #  Occupies the only worker
+    fn, made = attempts(0, 0)
+    with pytest.raises(DeadlineExceeded):
+        hedged_call(pool, fn, hedge_delay=0.01, timeout=0.05)
+    pool.shutdown(wait=True)
+    assert made == []
+
+
+def test_first_failure_is_raised_only_if_both_attempts_fail(executor):
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) == 1:
+            time.sleep(0.05)
+            raise requests.ConnectionError("reset")
+        time.sleep(0.1)
+        return "ok"
+
+    assert hedged_call(executor, flaky, hedge_delay=0.01) == ("ok", True)
+
+    def broken():
+        time.sleep(0.02)
+        raise requests.ConnectionError("down")
+
+    with pytest.raises(requests.ConnectionError):
+        hedged_call(executor, broken, hedge_delay=0.01)
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.preprocessing import StandardScaler
+from models.ai_agents import FEATURES, ClusterModel, NeighborIndex
+
+
+def users(rows: dict) -> pd.DataFrame:
+    """
+    One user per entry: user_id -> mean_emissions, with every other feature fixed,
+    so distances only depend on mean_emissions.
+    """
+    return pd.DataFrame([
+        {"user_id": user_id, **{feature: 0.0 for feature in FEATURES}, "mean_emissions": value}
+        for user_id, value in rows.items()
+    ])
+
+
+def fit(user_data: pd.DataFrame) -> ClusterModel:
+    X = user_data[FEATURES].values.astype(float)
+    scaler = StandardScaler().fit(X)
+    kmeans = MiniBatchKMeans(n_clusters=2, n_init=3, random_state=0).fit(scaler.transform(X))
+    return ClusterModel(scaler, kmeans, "20260101T000000Z", len(X))
+
+
+def vector(model: ClusterModel, mean_emissions: float) -> np.ndarray:
+    return model.scaler.transform(users({0: mean_emissions})[FEATURES].values.astype(float))[0]
+
+
+def test_query_returns_nearest_users_first_and_skips_the_excluded_one():
+    data = users({1: 1.0, 2: 2.0, 3: 3.0, 4: 10.0, 5: 11.0})
+    model = fit(data)
+    index = NeighborIndex.build(model, data)
+
+    assert index.query(vector(model, 2.1), k=3) == [2, 3, 1]
+    assert index.query(vector(model, 2.1), k=2, exclude=2) == [3, 1]
+
+
+def test_overlay_entries_take_precedence_over_stale_tree_rows():
+    data = users({1: 1.0, 2: 2.0, 3: 3.0, 4: 10.0, 5: 11.0})
+    model = fit(data)
+    index = NeighborIndex.build(model, data)
+
+    #  User 1 now drives a lot more: its tree row (1.0) is stale
+    moved = index.with_users(model, users({1: 10.5}))
+    assert moved.tree is index.tree and index.overlay == {}  #  The original index is untouched
+
+    assert 1 not in moved.query(vector(model, 1.0), k=3)
+    assert moved.query(vector(model, 10.4), k=3) == [1, 4, 5]
+    assert moved.query(vector(model, 10.4), k=2, exclude=1) == [4, 5]
+
+
+def test_overlay_can_add_users_missing_from_the_tree():
+    data = users({1: 1.0, 2: 2.0, 3: 3.0})
+    model = fit(data)
+    index = NeighborIndex.build(model, data).with_users(model, users({9: 2.9}))
+
+    assert index.query(vector(model, 3.0), k=2) == [3, 9]
+    assert len(index.query(vector(model, 3.0), k=10)) == 4
+
+
+def test_empty_index_has_no_neighbours():
+    model = fit(users({1: 1.0, 2: 2.0, 3: 3.0}))
+    index = NeighborIndex.build(model, users({}).reindex(columns=["user_id", *FEATURES]))
+    assert index.query(vector(model, 1.0), k=3) == []
@@ -0,0 +1,125 @@
+import asyncio
+import time
+import pytest
+from backend.deadline import Deadline, DeadlineExceeded
+from backend.resilience import CircuitBreaker, TokenBucket, UpstreamGuard, UpstreamRejected
+
+
+def test_token_bucket_allows_a_burst_then_paces():
+    bucket = TokenBucket(rate_per_second=20, capacity=2)
+    assert bucket.acquire() and bucket.acquire()
+    assert not bucket.acquire()
+    assert bucket.acquire(timeout=0.2)  #  Refilled at 20 tokens/s
+
+
+def test_token_bucket_gives_up_when_the_wait_exceeds_the_timeout():
+    bucket = TokenBucket(rate_per_second=1, capacity=1)
+    bucket.acquire()
+    started = time.monotonic()
+    assert not bucket.acquire(timeout=0.1)
+    assert time.monotonic() - started < 0.1  #  Does not sleep when it cannot succeed
+
+
+def test_breaker_opens_at_the_failure_rate():
+    breaker = CircuitBreaker(failure_rate=0.5, min_calls=4, window=4, cooldown_seconds=60)
+    for success in (True, False, True):
+        breaker.record(success)
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record(False)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert breaker.times_opened == 1
+
+
+def test_breaker_lets_one_trial_through_after_the_cooldown():
+    breaker = CircuitBreaker(min_calls=1, window=1, cooldown_seconds=0.05)
+    breaker.record(False)
+    time.sleep(0.06)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()  #  Only one trial at a time
+
+    breaker.record(None)  #  An abandoned trial only frees the slot
+    assert breaker.allow()
+    breaker.record(True)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_failed_trial_reopens_the_breaker():
+    breaker = CircuitBreaker(min_calls=1, window=1, cooldown_seconds=0.05)
+    breaker.record(False)
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record(False)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.times_opened == 2
+
+
+def make_guard(max_concurrency: int = 2, breaker: CircuitBreaker = None) -> UpstreamGuard:
+    return UpstreamGuard(
+        max_concurrency=max_concurrency,
+        queue_timeout=0.05,
+        rate_limiter=TokenBucket(rate_per_second=1000, capacity=1000),
+        breaker=breaker or CircuitBreaker(min_calls=1, window=1)
+    )
+
+
+def test_slot_counts_each_way_a_call_can_end():
+    guard = make_guard(breaker=CircuitBreaker(failure_rate=0.75, min_calls=2, window=10))
+
+    with guard.slot():
+        pass
+    with pytest.raises(RuntimeError):
+        with guard.slot():
+            raise RuntimeError("500")
+
+    with pytest.raises(DeadlineExceeded):
+        with guard.slot():
+            raise DeadlineExceeded("spent")
+
+    def stream():
+        with guard.slot():
+            yield "chunk"
+            yield "chunk"
+    chunks = stream()
+    next(chunks)
+    chunks.close()  #  Client disconnected mid-stream
+
+    async def call():
+        with guard.slot():
+            await asyncio.sleep(5)
+
+    async def cancel_call():
+        task = asyncio.create_task(call())
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+    asyncio.run(cancel_call())
+
+    stats = guard.stats()
+    assert (stats["successes"], stats["failures"], stats["budget_exhausted"], stats["cancelled"]) == (1, 1, 1, 2)
+    assert stats["in_flight"] == 0
+    assert stats["times_opened"] == 0  #  Only the real failure reached the breaker
+
+
+def test_slot_rejects_when_every_slot_is_busy():
+    guard = make_guard(max_concurrency=1)
+    with guard.slot():
+        with pytest.raises(UpstreamRejected):
+            with guard.slot():
+                pass
+    assert guard.stats()["rejected"]["concurrency"] == 1
+
+
+def test_slot_fails_fast_on_an_open_circuit_or_a_spent_budget():
+    guard = make_guard()
+    guard.breaker.record(False)
+    with pytest.raises(UpstreamRejected):
+        with guard.slot():
+            pass
+    assert guard.stats()["rejected"]["circuit_open"] == 1
+
+    with pytest.raises(DeadlineExceeded):
+        with make_guard().slot(Deadline(0)):
+            pass
@@ -0,0 +1,75 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from backend.singleflight import SingleFlight, AsyncSingleFlight
+
+
+def wait_for_waiters(flight, count: int):
+    give_up_at = time.monotonic() + 5
+    while flight.stats()["shared"] < count and time.monotonic() < give_up_at:
+        time.sleep(0.001)
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def lookup(value):
+        calls.append(value)
+        release.wait(5)
+        return value * 2
+
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        futures = [pool.submit(flight.do, "key", lookup, 21) for _ in range(5)]
+        wait_for_waiters(flight, 4)
+        release.set()
+        results = [future.result(timeout=5) for future in futures]
+
+    assert results == [42] * 5
+    assert calls == [21]
+    assert flight.stats() == {"in_flight": 0, "executed": 1, "shared": 4}
+
+
+def test_errors_reach_every_waiter_and_are_not_cached():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def failing():
+        release.wait(5)
+        raise ValueError("upstream down")
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        futures = [pool.submit(flight.do, "key", failing) for _ in range(2)]
+        wait_for_waiters(flight, 1)
+        release.set()
+        for future in futures:
+            with pytest.raises(ValueError):
+                future.result(timeout=5)
+
+    assert flight.do("key", lambda: "recovered") == "recovered"
+
+
+def test_different_keys_run_separately():
+    flight = SingleFlight()
+    assert flight.do("a", lambda: 1) == 1
+    assert flight.do("b", lambda: 2) == 2
+    assert flight.stats()["executed"] == 2
+
+
+def test_async_waiters_share_one_task():
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def lookup():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "coords"
+
+    async def main():
+        return await asyncio.gather(*[flight.do("key", lookup) for _ in range(3)])
+
+    assert asyncio.run(main()) == ["coords"] * 3
+    assert calls == [1]
@@ -0,0 +1,71 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from backend.dependencies import Base
+from backend.models import EmissionHistory, User, UserFeatures
+from backend.user_features import MODE_GROUP_COLUMNS, add_trip, apply_deltas, empty_delta, mode_group, rebuild_user_features
+
+TRIPS = [
+    (1, "gasoline_car", 12.0, 10.68),
+    (1, "Bus", 5.0, 0.7),
+    (1, "walking", 1.0, 0.0),
+    (2, "long_haul_flight", 900.0, 450.0),
+    (2, "electric_car", 20.0, 2.0),
+    (2, "hovercraft", 3.0, 1.0),
+    (3, "subway", 4.0, 0.4),
+]
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/features.db")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all([User(id=user_id, name=f"u{user_id}", email=f"u{user_id}@example.com", hashed_password="x") for user_id in (1, 2, 3)])
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def features(db) -> dict:
+    columns = ["trip_count", "total_emissions", "total_miles", *MODE_GROUP_COLUMNS.values()]
+    return {
+        row.user_id: {column: round(getattr(row, column), 6) for column in columns}
+        for row in db.query(UserFeatures).all()
+    }
+
+
+def log_trips(db, trips):
+    db.add_all([
+        EmissionHistory(user_id=user_id, origin="a", destination="b", transport_mode=mode, miles=miles,
+                        emission_value=emission, category="transport")
+        for user_id, mode, miles, emission in trips
+    ])
+
+
+def test_mode_groups_are_case_insensitive_with_an_other_bucket():
+    assert mode_group("Bus") == "transit"
+    assert mode_group("hovercraft") == "other"
+    assert mode_group(None) == "other"
+
+
+def test_incremental_deltas_match_a_full_rebuild(db):
+    #  One trip at a time for the first rows (the /log-trip/ path), then a bulk batch
+    for user_id, mode, miles, emission in TRIPS[:3]:
+        log_trips(db, [(user_id, mode, miles, emission)])
+        apply_deltas(db, {user_id: add_trip(empty_delta(), mode, miles, emission)})
+        db.commit()
+
+    deltas = {}
+    for user_id, mode, miles, emission in TRIPS[3:]:
+        add_trip(deltas.setdefault(user_id, empty_delta()), mode, miles, emission)
+    log_trips(db, TRIPS[3:])
+    apply_deltas(db, deltas)
+    db.commit()
+
+    incremental = features(db)
+    assert rebuild_user_features(db) == 3
+    db.expire_all()
+    assert features(db) == incremental
+    assert incremental[1]["trip_count"] == 3 and incremental[2]["other_trips"] == 1
@@ -0,0 +1,71 @@
+import threading
+import time
+from backend.write_behind import WriteBehindQueue
+
+
+class FakeSession:
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_close_writes_everything_queued():
+    written = []
+    writer = WriteBehindQueue(FakeSession, batch_size=10, flush_interval=5)
+    for i in range(25):
+        writer.submit(lambda db, i=i: written.append(i))
+    writer.close()
+
+    assert sorted(written) == list(range(25))
+    stats = writer.stats()
+    assert stats["queued"] == 0 and stats["written"] == 25
+
+
+def test_on_done_runs_after_the_batch_commit():
+    done = threading.Event()
+    writer = WriteBehindQueue(FakeSession, flush_interval=0.01)
+    writer.submit(lambda db: None, on_done=done.set)
+    assert done.wait(2)
+    writer.close()
+
+
+def test_writes_submitted_after_close_run_inline():
+    written = []
+    writer = WriteBehindQueue(FakeSession)
+    writer.close()
+    writer.submit(lambda db: written.append("late"))
+    assert written == ["late"]
+    assert writer.stats()["inline"] == 1
+
+
+def test_no_write_is_stranded_by_a_concurrent_close():
+    for _ in range(50):
+        written = []
+        writer = WriteBehindQueue(FakeSession, flush_interval=0.01)
+        submitter = threading.Thread(
+            target=lambda: [writer.submit(lambda db, i=i: written.append(i)) for i in range(50)]
+        )
+        submitter.start()
+        time.sleep(0.0005)
+        writer.close()
+        submitter.join()
+        assert sorted(written) == list(range(50))
+
+
+def test_failing_write_does_not_lose_the_rest_of_its_batch():
+    def bad(db):
+        raise ValueError("constraint")
+
+    writer = WriteBehindQueue(FakeSession, batch_size=10, flush_interval=5)
+    writer.submit(lambda db: None)
+    writer.submit(bad)
+    writer.submit(lambda db: None)
+    writer.close()
+
+    stats = writer.stats()
+    assert (stats["written"], stats["failed"]) == (2, 1)